@@ -0,0 +1,167 @@
+# benchmark_database.py
+"""
+Measures what moving article bodies out of the articles table buys.
+
+Builds a synthetic database with bodies stored inline (the schema before the
+article_content side table), times metadata and status queries, then applies the
+migrations that compress bodies into article_content and build the full-text index,
+and times the same queries again plus a few searches.
+
+Usage:
+    python benchmark_database.py [--articles 100000] [--output db_bench.json]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from database import ArticleDatabase, decompress_text
+
+
+class InlineContentDatabase(ArticleDatabase):
+    """The schema as it was before bodies moved to article_content"""
+    MIGRATIONS = ArticleDatabase.MIGRATIONS[:5]
+
+
+def synthetic_body(rng, vocabulary, words=550):
+    # Real articles are ~3-4 KB of prose; random words from a small vocabulary compress similarly
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+
+def populate(path, num_articles, seed=0):
+    rng = random.Random(seed)
+    vocabulary = [f"{rng.choice('bcdfghklmnprst')}{rng.choice('aeiou')}{rng.choice('nrst')}{i % 97}"
+                  for i in range(3000)]
+    db = InlineContentDatabase(path)
+    batch = []
+    for i in range(num_articles):
+        batch.append((
+            f"Synthetic headline number {i}",
+            f"https://example.com/2024/10/{i % 28 + 1:02d}/article-{i}/",
+            synthetic_body(rng, vocabulary),
+            f"2024-10-{i % 28 + 1:02d}T{i % 24:02d}:00:00",
+            f"https://example.com/images/{i}.jpg",
+            "2024-10-19 10:00:00",
+        ))
+        if len(batch) == 5000 or i == num_articles - 1:
+            with db.transaction():
+                db.conn.executemany("""
+                    INSERT INTO articles (title, url, content, post_datetime, image_url, crawl_datetime)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, batch)
+            batch = []
+    db.close()
+
+
+def timed(fn, repeats=3):
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return round(statistics.median(durations) * 1000, 2)
+
+
+def table_bytes(conn, table):
+    try:
+        return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (table,)).fetchone()[0]
+    except sqlite3.OperationalError:
+        return None  # SQLite built without the dbstat virtual table
+
+
+def measure(path, sample_urls, inline):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    if inline:
+        def load_bodies():
+            for url in sample_urls:
+                conn.execute("SELECT content FROM articles WHERE url = ?", (url,)).fetchone()
+    else:
+        def load_bodies():
+            for url in sample_urls:
+                row = conn.execute("""
+                    SELECT c.content FROM articles a JOIN article_content c ON c.article_id = a.id
+                    WHERE a.url = ?
+                """, (url,)).fetchone()
+                decompress_text(row[0])
+
+    queries = {
+        'status_scan_ms': lambda: conn.execute(
+            "SELECT COUNT(*) FROM articles WHERE duplicate_of IS NULL").fetchone(),
+        'recent_listing_ms': lambda: conn.execute(
+            "SELECT url, title, post_datetime FROM articles ORDER BY post_datetime DESC LIMIT 100").fetchall(),
+        'metadata_lookups_1000_ms': lambda: [
+            conn.execute("SELECT title, post_datetime, image_url FROM articles WHERE url = ?", (url,)).fetchone()
+            for url in sample_urls
+        ],
+        'body_lookups_1000_ms': load_bodies,
+    }
+    result = {name: timed(query) for name, query in queries.items()}
+    result['file_bytes'] = os.path.getsize(path)
+    result['articles_table_bytes'] = table_bytes(conn, 'articles')
+    result['article_content_bytes'] = None if inline else table_bytes(conn, 'article_content')
+    conn.close()
+    return result
+
+
+def benchmark(num_articles, directory):
+    path = os.path.join(directory, "articles.db")
+    start = time.perf_counter()
+    populate(path, num_articles)
+    populate_seconds = time.perf_counter() - start
+
+    rng = random.Random(1)
+    sample_urls = [f"https://example.com/2024/10/{i % 28 + 1:02d}/article-{i}/"
+                   for i in rng.sample(range(num_articles), min(1000, num_articles))]
+
+    before = measure(path, sample_urls, inline=True)
+
+    start = time.perf_counter()
+    ArticleDatabase(path).close()  # applies the content side-table and search index migrations
+    migration_seconds = time.perf_counter() - start
+    conn = sqlite3.connect(path)
+    conn.execute("VACUUM")  # DROP COLUMN leaves the freed pages in the file until a vacuum
+    conn.close()
+
+    after = measure(path, sample_urls, inline=False)
+
+    db = ArticleDatabase(path)
+    searches = {
+        'headline 4242': False,              # two words, one rare
+        'synthetic headline': False,         # matches every article; ranking cost dominates
+        'number 99*': True,                  # prefix query
+    }
+    after['search_ms'] = {
+        query: timed(lambda: db.search_articles(query, limit=20, raw=raw))
+        for query, raw in searches.items()
+    }
+    db.close()
+    return {
+        'articles': num_articles,
+        'populate_seconds': round(populate_seconds, 2),
+        'migration_seconds': round(migration_seconds, 2),
+        'before': before,
+        'after': after,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inline vs side-table article bodies")
+    parser.add_argument('--articles', type=int, default=100000)
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = benchmark(args.articles, directory)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
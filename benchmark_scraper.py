@@ -0,0 +1,276 @@
+# benchmark_scraper.py
+"""
+Scraper benchmark harness.
+
+`fixtures` serves a folder of saved listing and article pages from a local HTTP server
+and measures every extraction path in scraper.py: pages/second, per-page latency
+percentiles and peak RSS (including Chrome child processes). Results are written as
+JSON so runs can be diffed between commits.
+
+`live` compares the Selenium extractors on real article URLs and counts the WebDriver
+round trips each one needs per page.
+
+Usage:
+    python benchmark_scraper.py fixtures [--fixtures fixtures/techcrunch] [--repeats 3]
+                                         [--paths static,v2,script] [--output bench.json]
+    python benchmark_scraper.py live URL [URL ...] [--repeats 3]
+"""
+import argparse
+import functools
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+import psutil
+from rate_control import AdaptiveRateController
+from scraper import TechCrunchScraper
+
+BROWSER_PATHS = ('v1', 'v2', 'script')
+
+
+def count_round_trips(driver):
+    """Wrap driver.execute so every WebDriver command sent to chromedriver is counted"""
+    counter = {'commands': 0}
+    original_execute = driver.execute
+
+    def counting_execute(driver_command, params=None):
+        counter['commands'] += 1
+        return original_execute(driver_command, params)
+
+    driver.execute = counting_execute
+    return counter
+
+
+def time_selenium_paths(scraper, urls, repeats=3):
+    """Time the per-element extractors against the single-script extractor on one warm browser"""
+    with scraper.pool.driver() as driver:
+        counter = count_round_trips(driver)
+
+        # Warm up: the first page pays for consent handling and the initial cache fill
+        scraper.extract_article_data_v2(urls[0], driver=driver)
+
+        paths = {
+            'extract_article_data': scraper.extract_article_data,
+            'extract_article_data_v2': scraper.extract_article_data_v2,
+            'extract_article_data_script': scraper.extract_article_data_script,
+        }
+        results = {}
+        for name, extract in paths.items():
+            durations = []
+            commands_before = counter['commands']
+            for _ in range(repeats):
+                for url in urls:
+                    start = time.perf_counter()
+                    extract(url, driver=driver)
+                    durations.append(time.perf_counter() - start)
+
+            pages = len(durations)
+            results[name] = {
+                'pages': pages,
+                'mean_seconds': sum(durations) / pages,
+                'total_seconds': sum(durations),
+                'round_trips_per_page': (counter['commands'] - commands_before) / pages,
+            }
+    return results
+
+
+class FixtureServer:
+    """Serves a directory of saved pages on 127.0.0.1; /latest maps to latest/index.html"""
+    def __init__(self, directory):
+        handler = functools.partial(QuietHandler, directory=directory)
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class PeakRssSampler:
+    """Samples the RSS of this process and all of its children (chromedriver, Chrome) in the background"""
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _sample(self):
+        process = psutil.Process()
+        total = 0
+        for p in [process] + process.children(recursive=True):
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass
+        self.peak_bytes = max(self.peak_bytes, total)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._sample()
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(durations, failures, elapsed, peak_rss_bytes):
+    ordered = sorted(durations)
+    return {
+        'pages': len(durations),
+        'failures': failures,
+        'pages_per_second': round(len(durations) / elapsed, 3) if elapsed else None,
+        'latency_ms': {
+            'mean': round(sum(ordered) / len(ordered) * 1000, 2) if ordered else None,
+            'p50': round(percentile(ordered, 50) * 1000, 2) if ordered else None,
+            'p90': round(percentile(ordered, 90) * 1000, 2) if ordered else None,
+            'p99': round(percentile(ordered, 99) * 1000, 2) if ordered else None,
+            'max': round(ordered[-1] * 1000, 2) if ordered else None,
+        },
+        'peak_rss_mb': round(peak_rss_bytes / (1024 * 1024), 1),
+    }
+
+
+def run_path(extract, urls, repeats):
+    durations = []
+    failures = 0
+    with PeakRssSampler() as sampler:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for url in urls:
+                page_start = time.perf_counter()
+                article = extract(url)
+                durations.append(time.perf_counter() - page_start)
+                if not article:
+                    failures += 1
+        elapsed = time.perf_counter() - start
+    return summarize(durations, failures, elapsed, sampler.peak_bytes)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_fixtures(fixtures_dir, repeats=3, paths=None):
+    """Run every requested extraction path against the fixture site and return the results dict"""
+    paths = paths or ['parse', 'static', 'v1', 'v2', 'script', 'auto']
+    results = {}
+
+    with FixtureServer(fixtures_dir) as server, tempfile.TemporaryDirectory() as tmp:
+        scraper = TechCrunchScraper(
+            base_url=server.base_url,
+            profile_dir=None,
+            cookie_file=os.path.join(tmp, "cookies.json"),
+            # Local pages need no politeness; keep the controller from pacing the measurements
+            rate_controller=AdaptiveRateController(initial_concurrency=16, max_concurrency=16, initial_delay=0.0),
+        )
+        try:
+            listing_start = time.perf_counter()
+            urls = scraper.fetch_listing_urls(1)
+            listing_seconds = time.perf_counter() - listing_start
+            pages = {url: scraper.fetch_html(url) for url in urls}
+
+            candidates = {
+                'parse': ('parse_article_html', lambda url: scraper.parse_article_html(pages[url], url)),
+                'static': ('extract_article_data_static', scraper.extract_article_data_static),
+                'v1': ('extract_article_data', scraper.extract_article_data),
+                'v2': ('extract_article_data_v2', scraper.extract_article_data_v2),
+                'script': ('extract_article_data_script', scraper.extract_article_data_script),
+                'auto': ('extract_article', scraper.extract_article),
+            }
+            for key in paths:
+                name, extract = candidates[key]
+                try:
+                    if key in BROWSER_PATHS:
+                        # Start Chrome and handle consent outside the timed loop
+                        extract(urls[0])
+                    results[name] = run_path(extract, urls, repeats)
+                except Exception as e:
+                    results[name] = {'skipped': f"{type(e).__name__}: {e}"}
+                print(f"{name}: {json.dumps(results[name])}")
+        finally:
+            scraper.quit()
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'fixtures': fixtures_dir,
+        'article_pages': len(urls),
+        'repeats': repeats,
+        'listing_fetch_ms': round(listing_seconds * 1000, 2),
+        'results': results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark scraper extraction paths")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    fixtures_parser = subparsers.add_parser('fixtures', help="Benchmark against a local fixture site")
+    fixtures_parser.add_argument('--fixtures', default=os.path.join("fixtures", "techcrunch"))
+    fixtures_parser.add_argument('--repeats', type=int, default=3)
+    fixtures_parser.add_argument('--paths', default="parse,static,v1,v2,script,auto",
+                                 help="Comma-separated subset of parse,static,v1,v2,script,auto")
+    fixtures_parser.add_argument('--output', default="bench_output.json")
+
+    live_parser = subparsers.add_parser('live', help="Compare Selenium extractors on live URLs")
+    live_parser.add_argument('urls', nargs='+', help="Article URLs to extract")
+    live_parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.command == 'fixtures':
+        report = benchmark_fixtures(args.fixtures, repeats=args.repeats, paths=args.paths.split(','))
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+        return
+
+    scraper = TechCrunchScraper()
+    try:
+        results = time_selenium_paths(scraper, args.urls, repeats=args.repeats)
+    finally:
+        scraper.quit()
+
+    for name, result in results.items():
+        print(f"{name}: {result['mean_seconds'] * 1000:.0f} ms/page, "
+              f"{result['round_trips_per_page']:.1f} WebDriver round trips/page")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,105 @@
+import asyncio
+import functools
+import json
+import os
+import re
+import socket
 import sqlite3
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from storage import ArticleStorage, DEFAULT_LEASE_SECONDS, compress_text, decompress_text, open_database, url_digest
 
-class ArticleDatabase:
-    def __init__(self, db_name="articles.db"):
-        self.conn = sqlite3.connect(db_name)
+class ArticleDatabase(ArticleStorage):
+    """SQLite backend: one database file, shared by the processes on one host"""
+    def __init__(self, db_name="articles.db", cache_size_kb=20000, busy_timeout_ms=5000, seen_filter=None):
+        # Source discovery runs in worker threads and reads through this connection
+        self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        # Only takes effect on a new file; vacuum() converts older ones once
+        self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
         self.conn.execute("PRAGMA foreign_keys = ON;")
+        # WAL lets readers proceed while a write is in progress; with WAL, synchronous=NORMAL
+        # only fsyncs at checkpoints and stays durable against application crashes
+        self.conn.execute("PRAGMA journal_mode = WAL;")
+        self.conn.execute("PRAGMA synchronous = NORMAL;")
+        self.conn.execute(f"PRAGMA cache_size = -{int(cache_size_kb)};")
+        self.conn.execute("PRAGMA temp_store = MEMORY;")
+        self.conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)};")
+
+        # Default lease owner for claims made through this connection
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+
+        # Depth of nested transaction() blocks; methods only commit when it is 0
+        self._transaction_depth = 0
+        self._transaction_lock = threading.RLock()
         self.ensure_schema()
 
+        # Optional SeenUrlFilter: URLs it has never seen are new without asking SQLite
+        self.seen_filter = seen_filter
+        if seen_filter is not None:
+            seen_filter.sync(self)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group several updates into one commit:
+
+            with db.transaction():
+                db.mark_as_posted(url, 'telegram')
+                db.store_message_ids(url, message_ids)
+
+        Everything inside the block is rolled back if it raises. Nested blocks join the
+        outermost one.
+        """
+        with self._transaction_lock:
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    self.conn.rollback()
+                raise
+            else:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    self.conn.commit()
+
+    def _commit(self):
+        # Inside transaction() the outermost block commits once on exit
+        if self._transaction_depth == 0:
+            self.conn.commit()
+
     def ensure_schema(self):
-        # Create the articles table if it doesn't exist
-        # Define all columns we need upfront.
+        """
+        Bring the schema up to date. PRAGMA user_version records how many MIGRATIONS have
+        been applied, so an up-to-date database costs one integer read here.
+        """
+        if self.schema_version() >= len(self.MIGRATIONS):
+            return
+
+        with self._transaction_lock:
+            # IMMEDIATE takes the write lock before re-reading the version, so when several
+            # worker processes start together exactly one of them applies each migration
+            self.conn.execute("BEGIN IMMEDIATE")
+            with self.transaction():
+                version = self.schema_version()
+                for number, migration in enumerate(self.MIGRATIONS[version:], start=version + 1):
+                    migration(self)
+                    self.conn.execute(f"PRAGMA user_version = {number}")
+
+    def schema_version(self):
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    # Migrations run in order, once per database, inside one transaction. Databases created
+    # before versioning start at 0, so the early ones also tolerate objects that already exist.
+    # Append new migrations to MIGRATIONS; never edit or reorder applied ones.
+
+    def _migration_1_articles(self):
         # Using INTEGER for boolean columns (0 or 1).
-        create_table_sql = """
+        self.conn.execute("""
         CREATE TABLE IF NOT EXISTS articles (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             title TEXT,
@@ -27,14 +115,10 @@ class ArticleDatabase:
             instagram_last_attempt TEXT,
             instagram_attempts INTEGER DEFAULT 0,
             x_posted BOOLEAN DEFAULT FALSE,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP  
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP
         )
-        """
-        self.conn.execute(create_table_sql)
-        self.conn.commit()
-
-        # Ensure all columns exist, if not add them.
-        # This is defensive in case the DB existed before without some columns.
+        """)
+        # Older databases may predate some of these columns
         self.try_add_column("articles", "message_ids", "TEXT")
         self.try_add_column("articles", "posted_to_telegram", "INTEGER DEFAULT 0")
         self.try_add_column("articles", "instagram_posted", "INTEGER DEFAULT 0")
@@ -42,14 +126,230 @@ class ArticleDatabase:
         self.try_add_column("articles", "instagram_last_attempt", "TEXT")
         self.try_add_column("articles", "instagram_attempts", "INTEGER DEFAULT 0")
         self.try_add_column("articles", "x_posted", "BOOLEAN DEFAULT FALSE")
-        self.try_add_column("articles", "created_at", "TEXT")  # Remove the default value for ALTER TAB
+        self.try_add_column("articles", "created_at", "TEXT")  # ALTER TABLE can't add a CURRENT_TIMESTAMP default
+
+    def _migration_2_crawl_state(self):
+        # Small key/value store for scraper bookkeeping (e.g. listing fingerprints)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS crawl_state (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TEXT
+        )
+        """)
+
+    def _migration_3_minhash(self):
+        # MinHash signatures and their LSH band buckets for near-duplicate lookups
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS article_signatures (
+            article_id INTEGER PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+            signature BLOB NOT NULL
+        )
+        """)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS minhash_buckets (
+            bucket INTEGER NOT NULL,
+            article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE
+        )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_minhash_buckets_bucket ON minhash_buckets (bucket)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_minhash_buckets_article ON minhash_buckets (article_id)")
+        self.try_add_column("articles", "duplicate_of", "TEXT")
+
+    def _migration_4_platform_posts(self):
+        # One row per (article, platform); replaces the per-platform columns on articles
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS platform_posts (
+            article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+            platform TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_attempt TEXT,
+            posted_at TEXT,
+            external_ids TEXT,
+            PRIMARY KEY (article_id, platform)
+        ) WITHOUT ROWID
+        """)
+        # Covers "articles in status S on platform P" without touching the table
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_platform_posts_status ON platform_posts (platform, status, article_id)"
+        )
+        self.migrate_platform_columns()
+
+    def _migration_5_post_leases(self):
+        # Time-limited claims so several posting workers can share the queue
+        self.conn.execute("ALTER TABLE platform_posts ADD COLUMN lease_owner TEXT")
+        self.conn.execute("ALTER TABLE platform_posts ADD COLUMN lease_expires_at TEXT")
+        self.conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_platform_posts_lease ON platform_posts (platform, lease_expires_at)
+        WHERE status = 'in_progress'
+        """)
+
+    def _migration_6_content_tables(self):
+        # Bodies live zlib-compressed in side tables, keeping articles narrow for status scans
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS article_content (
+            article_id INTEGER PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+            content BLOB
+        )
+        """)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS article_translations (
+            article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+            language TEXT NOT NULL,
+            title TEXT,
+            content BLOB,
+            created_at TEXT,
+            PRIMARY KEY (article_id, language)
+        )
+        """)
+        cursor = self.conn.execute("SELECT id, content FROM articles WHERE content IS NOT NULL")
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO article_content (article_id, content) VALUES (?, ?)",
+                [(article_id, compress_text(content)) for article_id, content in rows]
+            )
+        self.conn.execute("ALTER TABLE articles DROP COLUMN content")
+
+    def _migration_7_search_index(self):
+        # Contentless FTS5 index: the text itself stays compressed in the side tables and the
+        # index only maps terms to article ids (rowid = articles.id)
+        self.conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS article_search USING fts5(
+            title, content, translated_title, translated_content,
+            content='', tokenize='unicode61 remove_diacritics 2'
+        )
+        """)
+        self.rebuild_search_index()
+
+    def rebuild_search_index(self):
+        """Re-create every search index entry from the stored articles and translations"""
+        with self.transaction():
+            self.conn.execute("INSERT INTO article_search (article_search) VALUES ('delete-all')")
+            self._index_all_articles()
+
+    def _index_all_articles(self):
+        translations = {}
+        for article_id, title, content in self.conn.execute(
+                "SELECT article_id, title, content FROM article_translations ORDER BY article_id, language"):
+            translations.setdefault(article_id, []).append((title, decompress_text(content)))
+
+        cursor = self.conn.execute("""
+            SELECT a.id, a.title, c.content FROM articles a
+            LEFT JOIN article_content c ON c.article_id = a.id
+        """)
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            self.conn.executemany(self.INDEX_SEARCH_SQL, [
+                (article_id, title, decompress_text(content), *self._join_translations(translations.get(article_id)))
+                for article_id, title, content in rows
+            ])
+
+    def _migration_8_backlog_indexes(self):
+        # Duplicates are never posted; take them out of the pending set so the backlog index stays small
+        self.conn.execute("""
+        UPDATE platform_posts SET status = 'skipped'
+        WHERE status IN ('pending', 'failed')
+          AND article_id IN (SELECT id FROM articles WHERE duplicate_of IS NOT NULL)
+        """)
+        # Partial index over unfinished work only: its size tracks the backlog, not the history
+        self.conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_platform_posts_backlog
+        ON platform_posts (platform, article_id, last_attempt, attempts)
+        WHERE status IN ('pending', 'failed')
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_crawl_datetime ON articles (crawl_datetime)")
+
+    def _migration_9_post_messages(self):
+        # One row per sent message instead of a comma-joined string on platform_posts, so
+        # removal by article, date range or id is an index lookup
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS post_messages (
+            platform TEXT NOT NULL,
+            message_id INTEGER NOT NULL,
+            article_id INTEGER NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+            sent_at TEXT NOT NULL,
+            PRIMARY KEY (platform, message_id)
+        ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_post_messages_article ON post_messages (article_id, platform)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_post_messages_sent ON post_messages (platform, sent_at)")
+
+        now = datetime.now().isoformat()
+        rows = self.conn.execute("""
+            SELECT platform, external_ids, article_id, COALESCE(posted_at, last_attempt)
+            FROM platform_posts WHERE external_ids IS NOT NULL AND external_ids != ''
+        """).fetchall()
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO post_messages (platform, message_id, article_id, sent_at) VALUES (?, ?, ?, ?)",
+            [(platform, int(message_id), article_id, sent_at or now)
+             for platform, external_ids, article_id, sent_at in rows
+             for message_id in external_ids.split(',') if message_id.strip()]
+        )
+        self.conn.execute("ALTER TABLE platform_posts DROP COLUMN external_ids")
+
+    def _migration_10_archived_urls(self):
+        # Articles moved out by the retention job leave only a URL digest behind, so they are
+        # still recognised as seen; article_id keeps the original id for SeenUrlFilter.sync
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS archived_urls (
+            article_id INTEGER PRIMARY KEY,
+            url_digest BLOB NOT NULL UNIQUE
+        )
+        """)
+
+    MIGRATIONS = (
+        _migration_1_articles,
+        _migration_2_crawl_state,
+        _migration_3_minhash,
+        _migration_4_platform_posts,
+        _migration_5_post_leases,
+        _migration_6_content_tables,
+        _migration_7_search_index,
+        _migration_8_backlog_indexes,
+        _migration_9_post_messages,
+        _migration_10_archived_urls,
+    )
+
+    def migrate_platform_columns(self):
+        """
+        One-shot copy of the legacy posted_to_telegram / instagram_* / x_posted / message_ids
+        columns into platform_posts. The old columns are left in place but no longer written.
+        Rows that already exist are kept as they are.
+        """
+        with self.transaction():
+            self.conn.execute("""
+                INSERT OR IGNORE INTO platform_posts (article_id, platform, status, external_ids)
+                SELECT id, 'telegram', CASE WHEN posted_to_telegram = 1 THEN 'posted' ELSE 'pending' END,
+                       message_ids
+                FROM articles
+            """)
+            self.conn.execute("""
+                INSERT OR IGNORE INTO platform_posts (article_id, platform, status, attempts, last_attempt)
+                SELECT id, 'instagram',
+                       CASE WHEN instagram_posted = 1 THEN 'posted'
+                            WHEN instagram_in_progress = 1 THEN 'in_progress'
+                            WHEN instagram_attempts > 0 THEN 'failed'
+                            ELSE 'pending' END,
+                       COALESCE(instagram_attempts, 0), instagram_last_attempt
+                FROM articles
+            """)
+            self.conn.execute("""
+                INSERT OR IGNORE INTO platform_posts (article_id, platform, status)
+                SELECT id, 'x', CASE WHEN x_posted THEN 'posted' ELSE 'pending' END
+                FROM articles
+            """)
 
     def try_add_column(self, table, column, definition):
-        # Add a column if it doesn't exist
+        # Add a column if it doesn't exist; callers run inside a migration's transaction
         if not self.column_exists(table, column):
             alter_sql = f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
             self.conn.execute(alter_sql)
-            self.conn.commit()
 
     def column_exists(self, table, column):
         # Check if a column exists in the table using PRAGMA table_info
@@ -57,148 +357,808 @@ class ArticleDatabase:
         cols = [row[1] for row in cursor]
         return column in cols
 
-    def insert_article(self, article_data):
-        if 'post_datetime' not in article_data:
-            article_data['post_datetime'] = datetime.now().isoformat()
+    SEED_PLATFORM_POSTS_SQL = """
+    INSERT OR IGNORE INTO platform_posts (article_id, platform)
+    SELECT a.id, p.value FROM articles a, json_each(?) p WHERE a.url = ?
+    """
 
-        insert_sql = """
-        INSERT OR IGNORE INTO articles (title, url, content, post_datetime, image_url, crawl_datetime)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """
-        self.conn.execute(insert_sql, (
+    INSERT_CONTENT_SQL = """
+    INSERT OR IGNORE INTO article_content (article_id, content) SELECT id, ? FROM articles WHERE url = ?
+    """
+
+    INDEX_SEARCH_SQL = """
+    INSERT INTO article_search (rowid, title, content, translated_title, translated_content)
+    VALUES (?, ?, ?, ?, ?)
+    """
+    # A contentless index can only forget a row when given exactly the values it was indexed with
+    UNINDEX_SEARCH_SQL = """
+    INSERT INTO article_search (article_search, rowid, title, content, translated_title, translated_content)
+    VALUES ('delete', ?, ?, ?, ?, ?)
+    """
+
+    def insert_articles(self, articles):
+        """Insert a batch of scraped articles with one executemany and one commit. Returns the number inserted."""
+        now = datetime.now().isoformat()
+        articles = list(articles)
+        archived = self._archived_urls(article_data['url'] for article_data in articles)
+        if archived:
+            articles = [article_data for article_data in articles if article_data['url'] not in archived]
+        rows = [(
             article_data['title'],
             article_data['url'],
-            article_data['content'],
-            article_data['post_datetime'],
+            article_data.get('post_datetime') or now,
             article_data['image_url'],
             article_data['crawl_datetime']
-        ))
-        self.conn.commit()
+        ) for article_data in articles]
+        if not rows:
+            return 0
+
+        insert_sql = """
+        INSERT OR IGNORE INTO articles (title, url, post_datetime, image_url, crawl_datetime)
+        VALUES (?, ?, ?, ?, ?)
+        """
+        with self.transaction():
+            existing = self.get_existing_urls(row[1] for row in rows)
+            changes_before = self.conn.total_changes
+            self.conn.executemany(insert_sql, rows)
+            inserted = self.conn.total_changes - changes_before
+            self.conn.executemany(self.INSERT_CONTENT_SQL, (
+                (compress_text(article_data['content']), article_data['url']) for article_data in articles
+            ))
+            platforms = json.dumps(self.PLATFORMS)
+            self.conn.executemany(self.SEED_PLATFORM_POSTS_SQL, ((platforms, row[1]) for row in rows))
+
+            # Index only the articles this call created; the first copy of a repeated URL wins
+            new_articles = {}
+            for article_data in articles:
+                if article_data['url'] not in existing:
+                    new_articles.setdefault(article_data['url'], article_data)
+            if new_articles:
+                ids = self.conn.execute(
+                    "SELECT url, id FROM articles WHERE url IN (SELECT value FROM json_each(?))",
+                    (json.dumps(list(new_articles)),)
+                )
+                ids = ids.fetchall()
+                self.conn.executemany(self.INDEX_SEARCH_SQL, [
+                    (article_id, new_articles[url]['title'], new_articles[url]['content'], None, None)
+                    for url, article_id in ids
+                ])
+                if self.seen_filter is not None:
+                    # A rollback only leaves extra bits set, which the database check absorbs
+                    self.seen_filter.add_inserted((article_id, url) for url, article_id in ids)
+            return inserted
+
+    def _max_article_id(self):
+        return self.conn.execute("SELECT MAX(id) FROM articles").fetchone()[0]
+
+    def get_article_urls_after(self, article_id, limit):
+        return self.conn.execute(
+            "SELECT id, url FROM articles WHERE id > ? ORDER BY id LIMIT ?", (article_id, limit)
+        ).fetchall()
 
     def article_exists(self, url):
-        query = "SELECT 1 FROM articles WHERE url = ?"
-        result = self.conn.execute(query, (url,))
-        return result.fetchone() is not None
+        return bool(self.get_existing_urls([url]))
+
+    def get_existing_urls(self, urls):
+        """Return the subset of urls already stored, using one query per chunk instead of one per URL"""
+        urls = self._maybe_seen(list(urls))
+        existing = set()
+        chunk_size = 500  # stay well below SQLite's bound-parameter limit
+        for i in range(0, len(urls), chunk_size):
+            chunk = urls[i:i + chunk_size]
+            placeholders = ",".join("?" * len(chunk))
+            query = f"SELECT url FROM articles WHERE url IN ({placeholders})"
+            existing.update(row[0] for row in self.conn.execute(query, chunk))
+        return existing | self._archived_urls(url for url in urls if url not in existing)
 
-    def retrieve_article(self, url):
+    def get_batch_status(self, urls, platforms=('telegram', 'instagram', 'x'), include_content=True):
+        """
+        Triage a batch of scraped URLs with a single query.
+        Returns a dict with:
+            'new': URLs not stored yet, in input order
+            'posted': stored URLs already posted to (or skipped on) every platform in `platforms`
+            'duplicates': stored URLs flagged as near-duplicates of another article
+            'pending': {url: (article_data, status)} for stored URLs that still need posting
+        Bodies are only read for pending articles, and only with include_content.
+        """
+        urls = list(dict.fromkeys(urls))
+        result = {'new': [], 'posted': [], 'duplicates': [], 'pending': {}}
+        if not urls:
+            return result
+
+        # The URL list travels as one JSON parameter, so batch size never hits the bound-parameter limit
         query = """
-        SELECT title, url, content, post_datetime, image_url, crawl_datetime
+        SELECT a.title, a.url, a.id, a.post_datetime, a.image_url, a.crawl_datetime, a.duplicate_of,
+               (SELECT group_concat(p.platform) FROM platform_posts p
+                WHERE p.article_id = a.id AND p.status IN ('posted', 'skipped'))
+        FROM articles a
+        WHERE a.url IN (SELECT value FROM json_each(?))
+        """
+        candidates = self._maybe_seen(urls)
+        rows = {row[1]: row for row in self.conn.execute(query, (json.dumps(candidates),))}
+        archived = self._archived_urls(url for url in candidates if url not in rows)
+
+        for url in urls:
+            row = rows.get(url)
+            if url in archived:
+                result['posted'].append(url)
+                continue
+            if row is None:
+                result['new'].append(url)
+                continue
+            if row[6]:
+                result['duplicates'].append(url)
+                continue
+            status = self._status_dict(row[7].split(',') if row[7] else [])
+            if all(status[platform] for platform in platforms):
+                result['posted'].append(url)
+                continue
+            article_data = {
+                "title": row[0],
+                "url": row[1],
+                "post_datetime": row[3],
+                "image_url": row[4],
+                "crawl_datetime": row[5]
+            }
+            result['pending'][url] = (article_data, status)
+
+        if include_content and result['pending']:
+            ids = {rows[url][2]: url for url in result['pending']}
+            contents = self.conn.execute(
+                "SELECT article_id, content FROM article_content WHERE article_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(list(ids)),)
+            )
+            for article_data, _ in result['pending'].values():
+                article_data['content'] = None
+            for article_id, content in contents:
+                result['pending'][ids[article_id]][0]['content'] = decompress_text(content)
+        return result
+
+    def get_crawl_state(self, key):
+        row = self.conn.execute("SELECT value FROM crawl_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_crawl_state(self, key, value):
+        self.conn.execute("""
+            INSERT INTO crawl_state (key, value, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+        """, (key, value, datetime.now().isoformat()))
+        self._commit()
+
+    def retrieve_article(self, url, include_content=True):
+        query = """
+        SELECT title, url, id, post_datetime, image_url, crawl_datetime
         FROM articles
         WHERE url = ?
         """
         result = self.conn.execute(query, (url,)).fetchone()
         if result:
-            return {
+            article_data = {
                 "title": result[0],
                 "url": result[1],
-                "content": result[2],
                 "post_datetime": result[3],
                 "image_url": result[4],
                 "crawl_datetime": result[5]
             }
+            # The body is only read (and decompressed) when the caller needs it
+            if include_content:
+                article_data["content"] = self._load_content(result[2])
+            return article_data
         return None
 
-    def store_message_ids(self, url, message_ids):
-        query = "UPDATE articles SET message_ids = ? WHERE url = ?"
-        self.conn.execute(query, (','.join(map(str, message_ids)), url))
-        self.conn.commit()
+    def _load_content(self, article_id):
+        row = self.conn.execute("SELECT content FROM article_content WHERE article_id = ?", (article_id,)).fetchone()
+        return decompress_text(row[0]) if row else None
 
-    def mark_as_posted(self, url, platform='telegram'):
-        if platform.lower() == 'telegram':
-            query = "UPDATE articles SET posted_to_telegram = 1 WHERE url = ?"
-        elif platform.lower() == 'instagram':
-            query = """
-            UPDATE articles 
-            SET instagram_posted = 1, instagram_in_progress = 0, instagram_last_attempt = ?
-            WHERE url = ?
-            """
-            self.conn.execute(query, (datetime.now().isoformat(), url))
-            self.conn.commit()
+    def get_article_content(self, url):
+        row = self.conn.execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()
+        return self._load_content(row[0]) if row else None
+
+    def store_translation(self, url, language, title, content):
+        """Keep a translated title and body so retries and other platforms reuse it"""
+        row = self.conn.execute("SELECT id, title FROM articles WHERE url = ?", (url,)).fetchone()
+        if not row:
             return
-        elif platform.lower() == 'x':
-            query = "UPDATE articles SET x_posted = TRUE WHERE url = ?"
-        else:
-            raise ValueError(f"Unknown platform: {platform}")
+        article_id, article_title = row
+        article_content = self._load_content(article_id)
+
+        with self.transaction():
+            old_translations = self._join_translations(self._load_translations(article_id))
+            self.conn.execute("""
+                INSERT INTO article_translations (article_id, language, title, content, created_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(article_id, language) DO UPDATE
+                SET title = excluded.title, content = excluded.content, created_at = excluded.created_at
+            """, (article_id, language, title, compress_text(content), datetime.now().isoformat()))
+            new_translations = self._join_translations(self._load_translations(article_id))
 
-        self.conn.execute(query, (url,))
-        self.conn.commit()
+            self.conn.execute(self.UNINDEX_SEARCH_SQL, (article_id, article_title, article_content, *old_translations))
+            self.conn.execute(self.INDEX_SEARCH_SQL, (article_id, article_title, article_content, *new_translations))
 
-    def get_posting_status(self, url):
-        query = """
-        SELECT posted_to_telegram, instagram_posted, x_posted
-        FROM articles
-        WHERE url = ?
+    def _load_translations(self, article_id):
+        rows = self.conn.execute(
+            "SELECT title, content FROM article_translations WHERE article_id = ? ORDER BY language", (article_id,)
+        )
+        return [(title, decompress_text(content)) for title, content in rows]
+
+    def search_articles(self, query, limit=20, raw=False):
+        """
+        Ranked full-text search over titles, bodies and translations.
+        Plain queries match articles containing every word; raw=True passes FTS5 query
+        syntax through (phrases, OR, NEAR, prefix*). Returns dicts with url, title,
+        post_datetime and score (lower is better), best match first.
         """
-        row = self.conn.execute(query, (url,)).fetchone()
+        if not raw:
+            words = re.findall(r"\w+", query)
+            if not words:
+                return []
+            query = " ".join(f'"{word}"' for word in words)
+
+        # Title matches count ten times as much as body matches
+        rows = self.conn.execute("""
+            SELECT a.url, a.title, a.post_datetime, bm25(article_search, 10.0, 1.0, 10.0, 1.0) AS score
+            FROM article_search
+            JOIN articles a ON a.id = article_search.rowid
+            WHERE article_search MATCH ?
+            ORDER BY score
+            LIMIT ?
+        """, (query, limit)).fetchall()
+        return [
+            {'url': url, 'title': title, 'post_datetime': post_datetime, 'score': score}
+            for url, title, post_datetime, score in rows
+        ]
+
+    def get_translation(self, url, language):
+        """Return {'title', 'content'} of a stored translation, or None"""
+        row = self.conn.execute("""
+            SELECT t.title, t.content
+            FROM article_translations t
+            JOIN articles a ON a.id = t.article_id
+            WHERE a.url = ? AND t.language = ?
+        """, (url, language)).fetchone()
         if row:
-            return {
-                'telegram': bool(row[0]),
-                'instagram': bool(row[1]),
-                'x': bool(row[2])
-            }
-        return {'telegram': False, 'instagram': False, 'x': False}
+            return {'title': row[0], 'content': decompress_text(row[1])}
+        return None
 
-    def is_posted_to_instagram(self, url):
-        query = "SELECT instagram_posted FROM articles WHERE url = ?"
-        result = self.conn.execute(query, (url,)).fetchone()
-        return bool(result and result[0])
+    def store_article_signature(self, url, signature, buckets):
+        """Save an article's MinHash signature (bytes) and its LSH bucket hashes"""
+        row = self.conn.execute("SELECT id FROM articles WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return False
+        article_id = row[0]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO article_signatures (article_id, signature) VALUES (?, ?)",
+            (article_id, signature)
+        )
+        self.conn.execute("DELETE FROM minhash_buckets WHERE article_id = ?", (article_id,))
+        self.conn.executemany(
+            "INSERT INTO minhash_buckets (bucket, article_id) VALUES (?, ?)",
+            [(bucket, article_id) for bucket in buckets]
+        )
+        self._commit()
+        return True
 
-    def try_mark_for_instagram_posting(self, url):
+    def find_signature_candidates(self, buckets, exclude_url=None):
+        """Return (url, signature) for every article sharing at least one LSH bucket"""
+        buckets = list(buckets)
+        if not buckets:
+            return []
+        placeholders = ",".join("?" * len(buckets))
+        query = f"""
+        SELECT a.url, s.signature
+        FROM articles a
+        JOIN article_signatures s ON s.article_id = a.id
+        WHERE a.id IN (SELECT article_id FROM minhash_buckets WHERE bucket IN ({placeholders}))
         """
-        Mark article as in_progress for Instagram posting if it's not already posted or in progress.
-        Returns True if successfully marked, False otherwise.
+        rows = self.conn.execute(query, buckets).fetchall()
+        return [(url, signature) for url, signature in rows if url != exclude_url]
+
+    def get_unsigned_articles(self):
+        """Articles that have no MinHash signature yet, for backfilling the duplicate index"""
+        query = """
+        SELECT a.url, a.title, c.content
+        FROM articles a
+        LEFT JOIN article_content c ON c.article_id = a.id
+        LEFT JOIN article_signatures s ON s.article_id = a.id
+        WHERE s.article_id IS NULL
         """
-        try:
-            # Atomic update
-            row = self.conn.execute("""
-                SELECT instagram_posted, instagram_in_progress 
-                FROM articles
-                WHERE url = ?
-            """, (url,)).fetchone()
+        return [(url, title, decompress_text(content)) for url, title, content in self.conn.execute(query)]
 
-            if not row:
-                return False
+    def mark_duplicate(self, url, original_url):
+        with self.transaction():
+            self.conn.execute("UPDATE articles SET duplicate_of = ? WHERE url = ?", (original_url, url))
+            self.conn.execute("""
+                UPDATE platform_posts SET status = 'skipped'
+                WHERE status IN ('pending', 'failed') AND article_id = (SELECT id FROM articles WHERE url = ?)
+            """, (url,))
 
-            posted, in_progress = row
-            if posted == 1 or in_progress == 1:
-                return False
+    def _ensure_platform_post(self, url, platform):
+        self.conn.execute(
+            "INSERT OR IGNORE INTO platform_posts (article_id, platform) SELECT id, ? FROM articles WHERE url = ?",
+            (platform, url)
+        )
 
+    def store_message_ids(self, url, message_ids, platform='telegram', sent_at=None):
+        platform = self._platform(platform)
+        sent_at = sent_at or datetime.now().isoformat()
+        with self.transaction():
+            self._ensure_platform_post(url, platform)
+            self.conn.executemany("""
+                INSERT OR IGNORE INTO post_messages (platform, message_id, article_id, sent_at)
+                SELECT ?, ?, id, ? FROM articles WHERE url = ?
+            """, [(platform, int(message_id), sent_at, url) for message_id in message_ids])
+
+    def get_message_ids(self, platform='telegram', url=None, sent_after=None, sent_before=None,
+                        message_ids=None, limit=None):
+        """
+        Return [(url, message_id, sent_at)] for stored messages on platform, newest first.
+        Every filter is optional; sent_after/sent_before are ISO timestamps (inclusive/exclusive).
+        """
+        conditions = ["m.platform = ?"]
+        params = [self._platform(platform)]
+        if url is not None:
+            conditions.append("m.article_id = (SELECT id FROM articles WHERE url = ?)")
+            params.append(url)
+        if sent_after is not None:
+            conditions.append("m.sent_at >= ?")
+            params.append(sent_after)
+        if sent_before is not None:
+            conditions.append("m.sent_at < ?")
+            params.append(sent_before)
+        if message_ids is not None:
+            conditions.append("m.message_id IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps([int(message_id) for message_id in message_ids]))
+        query = f"""
+        SELECT a.url, m.message_id, m.sent_at
+        FROM post_messages m
+        JOIN articles a ON a.id = m.article_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY m.sent_at DESC, m.message_id DESC
+        """
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        return self.conn.execute(query, params).fetchall()
+
+    def remove_message_ids(self, message_ids, platform='telegram'):
+        """Forget messages that were deleted on the platform. Returns the number of rows removed."""
+        cursor = self.conn.execute("""
+            DELETE FROM post_messages WHERE platform = ? AND message_id IN (SELECT value FROM json_each(?))
+        """, (self._platform(platform), json.dumps([int(message_id) for message_id in message_ids])))
+        self._commit()
+        return cursor.rowcount
+
+    def get_external_ids(self, platform='telegram'):
+        """Return [(url, 'id,id,...')] for every article with stored message ids on platform"""
+        query = """
+        SELECT a.url, group_concat(m.message_id, ',')
+        FROM (SELECT * FROM post_messages WHERE platform = ? ORDER BY article_id, message_id) m
+        JOIN articles a ON a.id = m.article_id
+        GROUP BY m.article_id
+        """
+        return self.conn.execute(query, (self._platform(platform),)).fetchall()
+
+    def clear_external_ids(self, url, platform='telegram'):
+        self.conn.execute("""
+            DELETE FROM post_messages
+            WHERE platform = ? AND article_id = (SELECT id FROM articles WHERE url = ?)
+        """, (self._platform(platform), url))
+        self._commit()
+
+    def mark_as_posted(self, url, platform='telegram'):
+        platform = self._platform(platform)
+        now = datetime.now().isoformat()
+        self.conn.execute("""
+            INSERT INTO platform_posts (article_id, platform, status, last_attempt, posted_at)
+            SELECT id, ?, 'posted', ?, ? FROM articles WHERE url = ?
+            ON CONFLICT(article_id, platform) DO UPDATE
+            SET status = 'posted', last_attempt = excluded.last_attempt, posted_at = excluded.posted_at,
+                lease_owner = NULL, lease_expires_at = NULL
+        """, (platform, now, now, url))
+        self._commit()
+
+    def mark_skipped(self, url, platform):
+        platform = self._platform(platform)
+        self.conn.execute("""
+            INSERT INTO platform_posts (article_id, platform, status, last_attempt)
+            SELECT id, ?, 'skipped', ? FROM articles WHERE url = ?
+            ON CONFLICT(article_id, platform) DO UPDATE
+            SET status = 'skipped', last_attempt = excluded.last_attempt, lease_owner = NULL, lease_expires_at = NULL
+            WHERE platform_posts.status != 'posted'
+        """, (platform, datetime.now().isoformat(), url))
+        self._commit()
+
+    def get_posting_status(self, url):
+        query = """
+        SELECT p.platform
+        FROM platform_posts p
+        JOIN articles a ON a.id = p.article_id
+        WHERE a.url = ? AND p.status = 'posted'
+        """
+        return self._status_dict(row[0] for row in self.conn.execute(query, (url,)))
+
+    def get_pending_articles(self, platform, limit=100, retry_after_minutes=0, max_attempts=None,
+                             max_age_hours=None):
+        """
+        URLs of articles still pending (or failed) on platform, oldest first, skipping any
+        attempted in the last retry_after_minutes, any already tried max_attempts times and,
+        with max_age_hours, any crawled longer ago than that.
+        """
+        now = datetime.now()
+        retry_cutoff = (now - timedelta(minutes=retry_after_minutes)).isoformat()
+        min_article_id = 0
+        if max_age_hours is not None:
+            crawl_cutoff = (now - timedelta(hours=max_age_hours)).strftime("%Y-%m-%d %H:%M:%S")
+            row = self.conn.execute(
+                "SELECT MIN(id) FROM articles WHERE crawl_datetime >= ?", (crawl_cutoff,)
+            ).fetchone()
+            if row[0] is None:
+                return []
+            min_article_id = row[0]
+
+        # The status condition matches idx_platform_posts_backlog's WHERE clause, so this walks
+        # only unfinished rows, in article order, and stops after `limit` matches
+        query = """
+        SELECT a.url
+        FROM platform_posts p
+        JOIN articles a ON a.id = p.article_id
+        WHERE p.platform = ? AND p.status IN ('pending', 'failed')
+          AND p.article_id >= ?
+          AND (p.last_attempt IS NULL OR p.last_attempt < ?)
+          AND p.attempts < ?
+        ORDER BY p.article_id
+        LIMIT ?
+        """
+        params = (self._platform(platform), min_article_id, retry_cutoff,
+                  max_attempts if max_attempts is not None else 2 ** 62, limit)
+        return [row[0] for row in self.conn.execute(query, params)]
+
+    def get_backlog_urls(self, platforms, limit=10, **filters):
+        """Oldest unfinished articles across platforms (see get_pending_articles for filters), at most limit"""
+        urls = {}
+        for platform in platforms:
+            for url in self.get_pending_articles(platform, limit=limit, **filters):
+                urls.setdefault(url, None)
+        # Article ids grow with insertion order, so sort the merged lists back into age order
+        ordered = self.conn.execute("""
+            SELECT url FROM articles WHERE url IN (SELECT value FROM json_each(?)) ORDER BY id LIMIT ?
+        """, (json.dumps(list(urls)), limit))
+        return [row[0] for row in ordered]
+
+    def record_failed_attempt(self, url, platform):
+        """Count a failed post so the backlog waits before retrying it"""
+        platform = self._platform(platform)
+        with self.transaction():
+            self._ensure_platform_post(url, platform)
             self.conn.execute("""
-                UPDATE articles
-                SET instagram_in_progress = 1, 
-                    instagram_attempts = instagram_attempts + 1,
-                    instagram_last_attempt = ?
-                WHERE url = ?
-            """, (datetime.now().isoformat(), url))
-            self.conn.commit()
-            return self.conn.total_changes > 0
+                UPDATE platform_posts
+                SET status = 'failed', attempts = attempts + 1, last_attempt = ?,
+                    lease_owner = NULL, lease_expires_at = NULL
+                WHERE platform = ? AND status != 'posted'
+                  AND article_id = (SELECT id FROM articles WHERE url = ?)
+            """, (datetime.now().isoformat(), platform, url))
+
+    # A post can be claimed when it is pending, failed, or in progress under an expired lease.
+    # Rows marked in_progress before leases existed have no expiry and count as expired.
+    CLAIMABLE_SQL = """
+    (status IN ('pending', 'failed')
+     OR (status = 'in_progress' AND (lease_expires_at IS NULL OR lease_expires_at < :now)))
+    """
+
+    def claim_post(self, url, platform, owner=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """
+        Atomically claim url on platform for `owner` (default: this process) for lease_seconds.
+        Returns True if the claim was granted, False if it is posted or leased to someone else.
+        """
+        platform = self._platform(platform)
+        now, expires = self._lease_times(lease_seconds)
+        try:
+            with self.transaction():
+                self._ensure_platform_post(url, platform)
+                # The availability check and the update are one statement, so two workers can't both win
+                row = self.conn.execute(f"""
+                    UPDATE platform_posts
+                    SET status = 'in_progress', attempts = attempts + 1, last_attempt = :now,
+                        lease_owner = :owner, lease_expires_at = :expires
+                    WHERE platform = :platform
+                      AND article_id = (SELECT id FROM articles WHERE url = :url)
+                      AND {self.CLAIMABLE_SQL}
+                    RETURNING article_id
+                """, {'now': now, 'owner': owner or self.worker_id, 'expires': expires,
+                      'platform': platform, 'url': url}).fetchone()
+                return row is not None
         except Exception as e:
-            print(f"Error marking for Instagram posting: {e}")
+            print(f"Error claiming {platform} post: {e}")
             return False
 
-    def mark_as_posted_instagram(self, url, success=True):
+    def claim_next(self, platform, owner=None, limit=1, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Claim up to `limit` available posts on platform, oldest first. Returns the claimed URLs."""
+        platform = self._platform(platform)
+        now, expires = self._lease_times(lease_seconds)
+        with self.transaction():
+            rows = self.conn.execute(f"""
+                UPDATE platform_posts
+                SET status = 'in_progress', attempts = attempts + 1, last_attempt = :now,
+                    lease_owner = :owner, lease_expires_at = :expires
+                WHERE platform = :platform AND article_id IN (
+                    SELECT article_id FROM platform_posts
+                    WHERE platform = :platform AND {self.CLAIMABLE_SQL}
+                    ORDER BY article_id
+                    LIMIT :limit
+                )
+                RETURNING (SELECT url FROM articles WHERE id = article_id)
+            """, {'now': now, 'owner': owner or self.worker_id, 'expires': expires,
+                  'platform': platform, 'limit': limit}).fetchall()
+        return [row[0] for row in rows]
+
+    def renew_lease(self, url, platform, owner=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Extend a lease this owner still holds. Returns False if the post was reclaimed or finished."""
+        platform = self._platform(platform)
+        _, expires = self._lease_times(lease_seconds)
+        with self.transaction():
+            row = self.conn.execute("""
+                UPDATE platform_posts SET lease_expires_at = ?
+                WHERE platform = ? AND status = 'in_progress' AND lease_owner = ?
+                  AND article_id = (SELECT id FROM articles WHERE url = ?)
+                RETURNING article_id
+            """, (expires, platform, owner or self.worker_id, url)).fetchone()
+        return row is not None
+
+    def reclaim_expired_leases(self, platform=None):
+        """Return posts whose lease ran out (e.g. their worker crashed) to 'failed' so they are retried"""
+        query = """
+        UPDATE platform_posts
+        SET status = 'failed', lease_owner = NULL, lease_expires_at = NULL
+        WHERE status = 'in_progress' AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+        """
+        params = [datetime.now().isoformat(timespec='microseconds')]
+        if platform:
+            query += " AND platform = ?"
+            params.append(self._platform(platform))
+        with self.transaction():
+            return self.conn.execute(query, params).rowcount
+
+    def mark_posting_result(self, url, platform, success=True, owner=None):
         """
-        Mark the final status of Instagram posting.
-        If success is True, instagram_posted = 1.
-        If False, just set in_progress = 0 and update last_attempt.
+        Record the outcome of a claimed post: 'posted' on success, 'failed' (retryable) otherwise,
+        and release the lease. With owner set, only applies while that owner still holds the lease.
+        Returns True if the row was updated.
         """
+        platform = self._platform(platform)
+        now = datetime.now().isoformat()
+        query = """
+        UPDATE platform_posts
+        SET status = ?, last_attempt = ?, posted_at = CASE WHEN ? THEN ? ELSE posted_at END,
+            lease_owner = NULL, lease_expires_at = NULL
+        WHERE platform = ? AND article_id = (SELECT id FROM articles WHERE url = ?)
+        """
+        params = ['posted' if success else 'failed', now, success, now, platform, url]
+        if owner:
+            query += " AND lease_owner = ?"
+            params.append(owner)
         try:
-            posted_val = 1 if success else 0
-            self.conn.execute("""
-                UPDATE articles
-                SET instagram_posted = ?, 
-                    instagram_in_progress = 0,
-                    instagram_last_attempt = ?
-                WHERE url = ?
-            """, (posted_val, datetime.now().isoformat(), url))
-            self.conn.commit()
+            with self.transaction():
+                self._ensure_platform_post(url, platform)
+                return self.conn.execute(query, params).rowcount > 0
         except Exception as e:
-            print(f"Error marking as posted to Instagram: {e}")
+            print(f"Error marking {platform} posting result: {e}")
+            return False
 
-    def get_instagram_attempts(self, url):
-        query = "SELECT instagram_attempts FROM articles WHERE url = ?"
-        result = self.conn.execute(query, (url,)).fetchone()
+    def get_attempts(self, url, platform):
+        query = """
+        SELECT p.attempts
+        FROM platform_posts p
+        JOIN articles a ON a.id = p.article_id
+        WHERE a.url = ? AND p.platform = ?
+        """
+        result = self.conn.execute(query, (url, self._platform(platform))).fetchone()
         return result[0] if result else 0
 
+    def _archived_urls(self, urls):
+        digests = {url_digest(url): url for url in urls}
+        archived = set()
+        chunk_size = 500
+        chunks = list(digests)
+        for i in range(0, len(chunks), chunk_size):
+            chunk = chunks[i:i + chunk_size]
+            query = f"SELECT url_digest FROM archived_urls WHERE url_digest IN ({','.join('?' * len(chunk))})"
+            archived.update(digests[row[0]] for row in self.conn.execute(query, chunk))
+        return archived
+
+    def get_archived_digests_after(self, article_id, limit):
+        return self.conn.execute(
+            "SELECT article_id, url_digest FROM archived_urls WHERE article_id > ? ORDER BY article_id LIMIT ?",
+            (article_id, limit)
+        ).fetchall()
+
+    def export_archivable_articles(self, cutoff, platforms=('telegram', 'instagram', 'x'), limit=500,
+                                   include_unfinished=False):
+        # Walks idx_articles_crawl_datetime from the oldest article and stops after `limit` matches
+        finished = "" if include_unfinished else """
+          AND NOT EXISTS (
+              SELECT 1 FROM json_each(:platforms) p
+              LEFT JOIN platform_posts pp ON pp.article_id = a.id AND pp.platform = p.value
+              WHERE pp.status IS NULL OR pp.status NOT IN ('posted', 'skipped'))
+        """
+        articles = self.conn.execute(f"""
+            SELECT a.id, a.url, a.title, a.post_datetime, a.image_url, a.crawl_datetime, a.duplicate_of, c.content
+            FROM articles a
+            LEFT JOIN article_content c ON c.article_id = a.id
+            WHERE a.crawl_datetime < :cutoff {finished}
+            ORDER BY a.crawl_datetime, a.id
+            LIMIT :limit
+        """, {'cutoff': cutoff, 'platforms': json.dumps([self._platform(p) for p in platforms]),
+              'limit': limit}).fetchall()
+        if not articles:
+            return []
+
+        ids = json.dumps([row[0] for row in articles])
+        related = {}
+        for table, query in (
+            ('translations', "SELECT article_id, language, title, content FROM article_translations "
+                             "WHERE article_id IN (SELECT value FROM json_each(?)) ORDER BY article_id, language"),
+            ('posts', "SELECT article_id, platform, status, attempts, last_attempt, posted_at FROM platform_posts "
+                      "WHERE article_id IN (SELECT value FROM json_each(?)) ORDER BY article_id, platform"),
+            ('messages', "SELECT article_id, platform, message_id, sent_at FROM post_messages "
+                         "WHERE article_id IN (SELECT value FROM json_each(?)) ORDER BY article_id, message_id"),
+        ):
+            related[table] = {}
+            for article_id, *rest in self.conn.execute(query, (ids,)):
+                related[table].setdefault(article_id, []).append(rest)
+        return self._archive_records(articles, related['translations'], related['posts'], related['messages'])
+
+    def remove_archived_articles(self, records):
+        records = list(records)
+        with self.transaction():
+            # The contentless search index forgets a row only given the exact text it indexed
+            self.conn.executemany(self.UNINDEX_SEARCH_SQL, [
+                (record['id'], record['title'], record['content'], *self._join_translations(
+                    [(t['title'], t['content']) for _, t in sorted(record['translations'].items())]))
+                for record in records
+            ])
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO archived_urls (article_id, url_digest) VALUES (?, ?)",
+                [(record['id'], url_digest(record['url'])) for record in records]
+            )
+            # Bodies, translations, posts, messages and signatures go with it (ON DELETE CASCADE)
+            return self.conn.execute(
+                "DELETE FROM articles WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps([record['id'] for record in records]),)
+            ).rowcount
+
+    def vacuum(self, max_pages=None):
+        """
+        Return free pages to the filesystem. A database created before incremental
+        auto-vacuum is converted by one full VACUUM on the first call; after that each call
+        releases up to max_pages free pages (all of them when None) without rewriting the file.
+        """
+        pages_before = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:  # 2 = INCREMENTAL
+            print("Converting database to incremental auto-vacuum (one-time full VACUUM)...")
+            self.conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self.conn.execute("VACUUM")
+        else:
+            # Each step of the pragma frees one page; executescript steps it to the end
+            self.conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages or 0)});")
+        self._commit()
+        # Fold the WAL back into the file so the freed pages actually leave the disk
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self.conn.execute("PRAGMA optimize")
+        return pages_before - self.conn.execute("PRAGMA page_count").fetchone()[0]
+
     def close(self):
         self.conn.close()
+        if self.seen_filter is not None:
+            self.seen_filter.close()
+
+
+class AsyncArticleDatabase:
+    """
+    Awaitable facade over an ArticleStorage backend with the same method names:
+
+        db = AsyncArticleDatabase(ArticleDatabase())
+        status = await db.get_posting_status(url)
+
+    Every call runs on one dedicated thread, so commits never stall the event loop and
+    calls execute in the order they were awaited.
+    """
+    def __init__(self, db=None, db_name="articles.db"):
+        self.db = db if db is not None else ArticleDatabase(db_name)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="article-db")
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(db, *args, **kwargs) on the database thread with the synchronous backend"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, self.db, *args, **kwargs))
+
+    async def run_in_transaction(self, fn, *args, **kwargs):
+        """Like run(), with everything fn does committed (or rolled back) as one transaction"""
+        def in_transaction(db):
+            with db.transaction():
+                return fn(db, *args, **kwargs)
+        return await self.run(in_transaction)
+
+    def transaction(self):
+        # Other coroutines' calls could land inside an awaited block, so group work in one function instead
+        raise TypeError("Use run_in_transaction() to group updates on an AsyncArticleDatabase")
+
+    def blocking(self):
+        """Synchronous view for code on worker threads (e.g. source discovery); calls still run on the database thread"""
+        return BlockingArticleDatabase(self)
+
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await self.run(lambda db: getattr(db, name)(*args, **kwargs))
+        call.__name__ = name
+        call.__doc__ = attr.__doc__
+        return call
+
+    async def close(self):
+        try:
+            await self.run(lambda db: db.close())
+        finally:
+            self._executor.shutdown(wait=True)
+
+
+class BlockingArticleDatabase:
+    """
+    Blocking counterpart of AsyncArticleDatabase for synchronous code running in
+    asyncio.to_thread workers: each call is queued on the facade's database thread and
+    waited for, so it never overlaps a run_in_transaction() on the same connection.
+    """
+    def __init__(self, async_db):
+        self.async_db = async_db
+
+    def transaction(self):
+        raise TypeError("Use AsyncArticleDatabase.run_in_transaction() to group updates")
+
+    def __getattr__(self, name):
+        attr = getattr(self.async_db.db, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self.async_db._executor.submit(
+                lambda: getattr(self.async_db.db, name)(*args, **kwargs)
+            ).result()
+        call.__name__ = name
+        call.__doc__ = attr.__doc__
+        return call
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Article database tools")
+    parser.add_argument('--db', default="articles.db", help="SQLite file or postgresql:// DSN")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    search_parser = subparsers.add_parser('search', help="Full-text search over stored articles")
+    search_parser.add_argument('query')
+    search_parser.add_argument('--limit', type=int, default=20)
+    search_parser.add_argument('--raw', action='store_true', help="Pass FTS5 query syntax through unchanged")
+    subparsers.add_parser('reindex', help="Rebuild the full-text search index")
+    args = parser.parse_args()
+
+    db = open_database(args.db)
+    try:
+        if args.command == 'search':
+            start = time.perf_counter()
+            results = db.search_articles(args.query, limit=args.limit, raw=args.raw)
+            elapsed = time.perf_counter() - start
+            for result in results:
+                print(f"{result['score']:8.2f}  {result['post_datetime'] or '':<19.19}  {result['title']}")
+                print(f"          {result['url']}")
+            print(f"{len(results)} results in {elapsed * 1000:.1f} ms")
+        else:
+            db.rebuild_search_index()
+            print("Search index rebuilt")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
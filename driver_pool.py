@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+import psutil
+
+
+class PooledDriver:
+    """A WebDriver checked out from the pool, with usage counters for recycling"""
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages_served = 0
+
+
+class WebDriverPool:
+    """Bounded pool of reusable Chrome instances.
+
+    Drivers are created lazily up to `size`, handed out one caller at a time and
+    recycled (quit and replaced on next use) after `max_pages_per_driver` pages or
+    once the browser process tree grows past `max_memory_mb`.
+    """
+    def __init__(self, driver_factory: Callable, size: int = 3,
+                 max_pages_per_driver: int = 50, max_memory_mb: Optional[int] = 1024,
+                 quit_driver: Optional[Callable] = None):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.driver_factory = driver_factory
+        self.size = size
+        self.max_pages_per_driver = max_pages_per_driver
+        self.max_memory_mb = max_memory_mb
+        self.quit_driver = quit_driver
+        self.logger = logging.getLogger(__name__)
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {'created': 0, 'recycled': 0, 'pages': 0}
+
+    def acquire(self) -> PooledDriver:
+        """Block until a driver is free, starting a new one if the pool isn't full yet"""
+        self._slots.acquire()
+        try:
+            if self._closed:
+                raise RuntimeError("WebDriver pool is closed")
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            pooled = PooledDriver(self.driver_factory())
+            with self._lock:
+                self.stats['created'] += 1
+            return pooled
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, pooled: PooledDriver, discard: bool = False):
+        """Return a driver to the pool, quitting it instead if it is broken or due for recycling"""
+        try:
+            pooled.pages_served += 1
+            with self._lock:
+                self.stats['pages'] += 1
+
+            if discard or self._closed or self._needs_recycling(pooled):
+                self._quit(pooled)
+                if not discard and not self._closed:
+                    with self._lock:
+                        self.stats['recycled'] += 1
+            else:
+                self._idle.put(pooled)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def driver(self):
+        """Check out a driver for the duration of a `with` block"""
+        pooled = self.acquire()
+        discard = False
+        try:
+            yield pooled.driver
+        except Exception:
+            # The browser may be wedged after a WebDriver error, so don't hand it out again
+            discard = True
+            raise
+        finally:
+            self.release(pooled, discard=discard)
+
+    def run(self, func: Callable, *args):
+        """Call func(driver, *args) with a pooled driver"""
+        with self.driver() as driver:
+            return func(driver, *args)
+
+    async def map_async(self, func: Callable, items: Iterable, max_concurrency: Optional[int] = None):
+        """Run func(driver, item) for every item concurrently, at most max_concurrency at a time.
+
+        Results are returned in input order; exceptions are returned in place of results.
+        """
+        semaphore = asyncio.Semaphore(min(max_concurrency or self.size, self.size))
+        loop = asyncio.get_running_loop()
+
+        async def run_one(item):
+            async with semaphore:
+                return await loop.run_in_executor(None, self.run, func, item)
+
+        return await asyncio.gather(*(run_one(item) for item in items), return_exceptions=True)
+
+    def memory_usage_mb(self, pooled: PooledDriver) -> Optional[float]:
+        """Resident memory of chromedriver and all Chrome processes it spawned"""
+        try:
+            process = psutil.Process(pooled.driver.service.process.pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / (1024 * 1024)
+        except (AttributeError, psutil.Error):
+            return None
+
+    def _needs_recycling(self, pooled: PooledDriver) -> bool:
+        if self.max_pages_per_driver and pooled.pages_served >= self.max_pages_per_driver:
+            self.logger.info(f"Recycling driver after {pooled.pages_served} pages")
+            return True
+        if self.max_memory_mb:
+            memory_mb = self.memory_usage_mb(pooled)
+            if memory_mb is not None and memory_mb > self.max_memory_mb:
+                self.logger.info(f"Recycling driver using {memory_mb:.0f}MB")
+                return True
+        return False
+
+    def _quit(self, pooled: PooledDriver):
+        try:
+            if self.quit_driver:
+                self.quit_driver(pooled.driver)
+            else:
+                pooled.driver.quit()
+        except Exception as e:
+            self.logger.warning(f"Error quitting driver: {e}")
+
+    def close(self):
+        """Quit every driver; drivers still checked out are quit when they are released"""
+        self._closed = True
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(pooled)
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 import logging
 import os
 from pathlib import Path
+from database import AsyncArticleDatabase
 
 @dataclass
 class InstagramQueueItem:
@@ -21,6 +22,9 @@ class InstagramQueue:
         self.instagram_poster = instagram_poster
         self.current_sleep_task = None
         self.max_retry_attempts = 3
+        # Database calls are awaited so a slow commit never stalls the posting loop
+        if database is not None and not isinstance(database, AsyncArticleDatabase):
+            database = AsyncArticleDatabase(database)
         self.database = database
         self.post_delay = 300  # 5 minutes between posts
         self.retry_delay = 1800  # 30 minutes on failure
@@ -33,12 +37,12 @@ class InstagramQueue:
             return False
             
         # Check if already posted or in progress
-        if self.database.is_posted_to_instagram(url):
+        if await self.database.is_posted_to_instagram(url):
             self.logger.info(f"Article already posted to Instagram: {url}")
             return False
             
         # Try to mark for posting
-        if not self.database.try_mark_for_instagram_posting(url):
+        if not await self.database.try_mark_for_instagram_posting(url):
             self.logger.info(f"Article already being processed for Instagram: {url}")
             return False
         
@@ -159,10 +163,16 @@ class InstagramQueue:
         """Process a single queue item"""
         try:
             # Double-check if already posted
-            if self.database.is_posted_to_instagram(item.url):
+            if await self.database.is_posted_to_instagram(item.url):
                 self.logger.info(f"Item already posted: {item.url}")
                 return True
 
+            # Items can wait in the queue for a while; make sure our claim hasn't expired
+            # and been taken over by another worker before posting
+            if not await self.database.renew_lease(item.url, 'instagram'):
+                self.logger.info(f"Lost Instagram claim, another worker has it: {item.url}")
+                return True
+
             success = await self.instagram_poster.process_and_post(
                 content=item.content,
                 media_path=item.media_path
@@ -170,15 +180,15 @@ class InstagramQueue:
 
             # If success, mark as posted and DON'T retry
             if success:
-                self.database.mark_as_posted_instagram(item.url, success=True)
+                await self.database.mark_as_posted_instagram(item.url, success=True)
                 self.logger.info(f"Successfully posted and marked in database: {item.url}")
                 return True
             
             # Only increment attempts and retry for real failures
-            attempts = self.database.get_instagram_attempts(item.url)
+            attempts = await self.database.get_instagram_attempts(item.url)
             if attempts >= self.max_retry_attempts:
                 self.logger.warning(f"Max retry attempts reached for {item.url}")
-                self.database.mark_as_posted_instagram(item.url, success=False)
+                await self.database.mark_as_posted_instagram(item.url, success=False)
                 return True
             
             return False
@@ -1,11 +1,15 @@
 # main_no_instagram.py
 import asyncio
-from scraper import TechCrunchScraper
+from sources import CrawlScheduler, create_sources
+from snapshot_store import SnapshotStore
 from telegram_poster import TelegramPoster
 from test_x_posting import XPoster
 from translator import GroqTranslator
 # from chatgptTranslator import ChatGPTTranslator
-from database import ArticleDatabase
+from database import AsyncArticleDatabase
+from near_duplicates import NearDuplicateDetector
+from seen_filter import SeenUrlFilter
+from storage import open_database
 from logger import log_to_file
 import os
 import aiohttp
@@ -18,10 +22,26 @@ from test_youtube_posting import YouTubeUploader
 
 async def main():
     # Initialize all services
-    scraper = TechCrunchScraper()
+    # Optionally keep the raw HTML of every fetched page for offline re-extraction
+    snapshot_store = SnapshotStore(os.environ['SNAPSHOT_DIR']) if os.environ.get('SNAPSHOT_DIR') else None
+    sources = create_sources(os.environ.get('SCRAPER_SOURCES', 'techcrunch').split(','), options={
+        'techcrunch': {
+            'ingestion_mode': os.environ.get('SCRAPER_MODE', 'selenium'),
+            'pool_size': int(os.environ.get('SCRAPER_POOL_SIZE', 3)),
+            'snapshot_store': snapshot_store,
+            # Only new articles, stopping at the first one already in the database
+            'incremental': os.environ.get('SCRAPER_INCREMENTAL') == '1',
+        },
+    })
+    scheduler = CrawlScheduler(sources)
     telegram_poster = TelegramPoster()
     translator = GroqTranslator(os.environ.get('GROQ_API_KEY'))
-    db = ArticleDatabase()
+    # Coroutines await database work on a dedicated thread instead of blocking the event loop
+    # Optionally answer "already stored?" for discovered URLs from a Bloom filter before SQLite
+    seen_filter = SeenUrlFilter(os.environ['SEEN_FILTER_PATH']) if os.environ.get('SEEN_FILTER_PATH') else None
+    # ARTICLE_DB is a SQLite file path or a postgresql:// DSN shared by several hosts
+    db = AsyncArticleDatabase(open_database(os.environ.get('ARTICLE_DB', 'articles.db'), seen_filter=seen_filter))
+    duplicate_detector = NearDuplicateDetector(db.db)
     video_generator = VideoGenerator()
     llm_assistant = LLMVideoAssistant(api_key=os.environ.get('GROQ_API_KEY'))
     x_poster = XPoster()  # Initialize X poster
@@ -39,19 +59,12 @@ async def main():
         return any(pattern in text for pattern in error_patterns)
 
     try:
-        # Add retry mechanism for scraping
-        max_retries = 3
-        retry_count = 0
-        while retry_count < max_retries:
-            try:
-                article_urls = scraper.scrape_articles(limit=10)
-                break
-            except ConnectionResetError:
-                retry_count += 1
-                if retry_count == max_retries:
-                    raise
-                print(f"Connection reset. Retrying... ({retry_count}/{max_retries})")
-                await asyncio.sleep(5)
+        # Discover from all sources concurrently (each source retries connection errors itself)
+        article_urls = await scheduler.discover_all(limit_per_source=10, db=db.blocking())
+
+        def store_telegram_post(sync_db, url, message_ids):
+            sync_db.mark_as_posted(url, 'telegram')
+            sync_db.store_message_ids(url, message_ids)
 
         async def process_article(url, article_data, status):
             """Process a single article for all platforms except Instagram"""
@@ -63,48 +76,59 @@ async def main():
                     print(f"Content is empty for {url}, skipping this article.")
                     return
 
-                # First, try video generation with original English content
-                original_content = f"{article_data['title']}\n\n{article_data['content']}"
-                try:
-                    print(f"Generating video script for: {url}")
-                    video_script = llm_assistant.generate_video_script(original_content)
-                    if video_script:
-                        print("Video script generated, creating video...")
-                        video_path = await video_generator.generate_video(
-                            content=video_script,
-                            use_videos=False,
-                            total_duration=30,
-                            show_text=True
-                        )
-                        
-                        if video_path:
-                            print("Video generated, uploading to YouTube...")
-                            youtube_uploader = YouTubeUploader()
-                            youtube_response = youtube_uploader.upload_video(
-                                video_path=video_path,
-                                title=f"Tech News: {article_data['title'][:50]}...",
-                                description=original_content[:500]
+                # Skip the video for articles already uploaded on an earlier run
+                if not status.get('youtube'):
+                    # First, try video generation with original English content
+                    original_content = f"{article_data['title']}\n\n{article_data['content']}"
+                    try:
+                        print(f"Generating video script for: {url}")
+                        video_script = llm_assistant.generate_video_script(original_content)
+                        if video_script:
+                            print("Video script generated, creating video...")
+                            video_path = await video_generator.generate_video(
+                                content=video_script,
+                                use_videos=False,
+                                total_duration=30,
+                                show_text=True
                             )
+                        
+                            if video_path:
+                                print("Video generated, uploading to YouTube...")
+                                youtube_uploader = YouTubeUploader()
+                                youtube_response = youtube_uploader.upload_video(
+                                    video_path=video_path,
+                                    title=f"Tech News: {article_data['title'][:50]}...",
+                                    description=original_content[:500]
+                                )
                             
-                            if youtube_response:
-                                print(f"Successfully uploaded to YouTube: {youtube_response['id']}")
-                                db.mark_as_posted(url, 'youtube')
-                            else:
-                                print("Failed to upload to YouTube")
+                                if youtube_response:
+                                    print(f"Successfully uploaded to YouTube: {youtube_response['id']}")
+                                    await db.mark_as_posted(url, 'youtube')
+                                else:
+                                    print("Failed to upload to YouTube")
                             
-                            if os.path.exists(video_path):
-                                os.remove(video_path)
+                                if os.path.exists(video_path):
+                                    os.remove(video_path)
+                            else:
+                                print("Failed to generate video")
                         else:
-                            print("Failed to generate video")
-                    else:
-                        print("Failed to generate video script")
+                            print("Failed to generate video script")
                     
-                except Exception as video_error:
-                    print(f"Error in video processing: {video_error}")
+                    except Exception as video_error:
+                        print(f"Error in video processing: {video_error}")
 
                 # Now continue with translation and other posting
-                translated_title = translator.translate_to_persian(article_data['title'])
-                translated_content = translator.translate_to_persian(article_data['content'])
+                # Reuse a translation stored by an earlier run instead of calling the LLM again
+                translation = await db.get_translation(url, 'fa')
+                if translation:
+                    translated_title, translated_content = translation['title'], translation['content']
+                else:
+                    translated_title = translator.translate_to_persian(article_data['title'])
+                    translated_content = translator.translate_to_persian(article_data['content'])
+                    if (translated_title and translated_content
+                            and not contains_error_message(translated_title)
+                            and not contains_error_message(translated_content)):
+                        await db.store_translation(url, 'fa', translated_title, translated_content)
                 
                 if not translated_title or not translated_content:
                     print(f"Failed to translate content for {url}")
@@ -126,11 +150,21 @@ async def main():
                     
                     if telegram_result and isinstance(telegram_result, list):
                         print(f"Successfully posted to Telegram: {url}")
-                        db.mark_as_posted(url, 'telegram')
-                        db.store_message_ids(url, telegram_result)
+                        await db.run_in_transaction(store_telegram_post, url, telegram_result)
                         telegram_success = True
                     else:
                         print(f"Failed to post to Telegram: {url}")
+                        await db.record_failed_attempt(url, 'telegram')
+
+                # X posts need an image: without one the post is skipped for good, and a failed
+                # download counts as an attempt, so neither sits in the backlog untried
+                if not status.get('x') and not image_path:
+                    if article_data.get('image_url'):
+                        print(f"Image download failed, X post will be retried: {url}")
+                        await db.record_failed_attempt(url, 'x')
+                    else:
+                        print(f"No image, skipping X post: {url}")
+                        await db.mark_skipped(url, 'x')
 
                 # Post to X (Twitter) if image is available
                 x_success = False
@@ -166,9 +200,11 @@ async def main():
                             file_size = os.path.getsize(image_path)
                             if file_size > 5 * 1024 * 1024:  # 5MB limit
                                 print(f"Image too large ({file_size/1024/1024:.2f}MB), skipping X post")
+                                await db.mark_skipped(url, 'x')
                                 return
                         else:
                             print(f"Image file not found: {image_path}")
+                            await db.record_failed_attempt(url, 'x')
                             return
                         
                         # Post to X with validated content and image
@@ -179,18 +215,22 @@ async def main():
                         
                         if x_result:
                             print(f"Successfully posted to X: {url}")
-                            db.mark_as_posted(url, 'x')
+                            await db.mark_as_posted(url, 'x')
                             x_success = True
                         else:
                             print(f"Failed to post to X: {url}")
+                            await db.record_failed_attempt(url, 'x')
                             
                     except Exception as e:
                         print(f"Error posting to X: {type(e).__name__} - {str(e)}")
+                        await db.record_failed_attempt(url, 'x')
                         if hasattr(e, 'response') and hasattr(e.response, 'text'):
                             print(f"X API Response: {e.response.text}")
 
                 # Only proceed to video generation and YouTube if both Telegram and X succeeded
-                if telegram_success and x_success:
+                if status.get('youtube'):
+                    print(f"Already uploaded to YouTube: {url}")
+                elif telegram_success and x_success:
                     # First, try video generation with original English content
                     original_content = f"{article_data['title']}\n\n{article_data['content']}"
                     try:
@@ -216,7 +256,7 @@ async def main():
                                 
                                 if youtube_response:
                                     print(f"Successfully uploaded to YouTube: {youtube_response['id']}")
-                                    db.mark_as_posted(url, 'youtube')
+                                    await db.mark_as_posted(url, 'youtube')
                                 else:
                                     print("Failed to upload to YouTube")
                                 
@@ -235,23 +275,63 @@ async def main():
             except Exception as e:
                 print(f"Error processing article {url}: {e}")
 
+        # Check article status, collecting new URLs so they can be extracted concurrently
+        batch_status = await db.get_batch_status(article_urls)
+        for url in batch_status['posted']:
+            print(f"Article already posted to all platforms: {url}")
+        for url in batch_status['duplicates']:
+            print(f"Skipping stored near-duplicate: {url}")
+        articles_to_process = batch_status['pending']
+        new_urls = batch_status['new']
+
+        extracted_articles = await scheduler.extract_all(new_urls)
+        new_articles = [(url, article_data) for url, article_data in zip(new_urls, extracted_articles) if article_data]
+
+        def store_new_articles(sync_db):
+            """Store the batch, its duplicate signatures and duplicate flags; returns what still needs posting"""
+            sync_db.insert_articles(article_data for _, article_data in new_articles)
+            unique_articles = []
+            for url, article_data in new_articles:
+                # Syndicated or updated copies of a stored story skip translation, video and posting
+                duplicates = duplicate_detector.check_and_add(article_data)
+                if duplicates:
+                    original_url, similarity = duplicates[0]
+                    print(f"Skipping near-duplicate of {original_url} ({similarity:.0%} similar): {url}")
+                    sync_db.mark_duplicate(url, original_url)
+                    continue
+                unique_articles.append((url, article_data))
+            return unique_articles
+
+        for url, article_data in await db.run_in_transaction(store_new_articles):
+            articles_to_process[url] = (article_data, {'telegram': False, 'instagram': False, 'x': False})
+
+        # Failed extractions are retried next run, so only remember the listing once all are stored
+        if all(extracted_articles):
+            await db.run(scheduler.discovery_complete)
+
+        # Older articles that failed or were never finished get retried alongside the fresh ones
+        await db.reclaim_expired_leases()
+        backlog_urls = [
+            url for url in await db.get_backlog_urls(
+                ('telegram', 'x'),
+                limit=int(os.environ.get('BACKLOG_SIZE', 5)),
+                retry_after_minutes=int(os.environ.get('BACKLOG_RETRY_MINUTES', 60)),
+                max_attempts=int(os.environ.get('BACKLOG_MAX_ATTEMPTS', 5)),
+                max_age_hours=int(os.environ.get('BACKLOG_MAX_AGE_HOURS', 72)),
+            )
+            if url not in articles_to_process and url not in article_urls
+        ]
+        backlog = await db.get_batch_status(backlog_urls, platforms=('telegram', 'x'))
+        articles_to_process.update(backlog['pending'])
+        if backlog['pending']:
+            print(f"Retrying {len(backlog['pending'])} backlog articles")
+
         # Process articles
-        for url in article_urls:
+        for url in list(article_urls) + backlog_urls:
+            if url not in articles_to_process:
+                continue
             try:
-                # Check article status
-                status = {'telegram': False, 'instagram': False, 'x': False}
-                if db.article_exists(url):
-                    status = db.get_posting_status(url)
-                    if status['telegram'] and status['instagram'] and status['x']:
-                        print(f"Article already posted to all platforms: {url}")
-                        continue
-                    article_data = db.retrieve_article(url)
-                else:
-                    article_data = scraper.extract_article_data(url)
-                    if not article_data:
-                        continue
-                    db.insert_article(article_data)
-
+                article_data, status = articles_to_process[url]
                 await process_article(url, article_data, status)
 
             except Exception as e:
@@ -259,8 +339,11 @@ async def main():
                 continue
 
     finally:
-        scraper.quit()
-        db.close()
+        print(f"Extraction stats: {scheduler.get_stats()}")
+        scheduler.close()
+        if snapshot_store:
+            snapshot_store.close()
+        await db.close()
 
 async def download_image(url: str) -> Optional[str]:
     """Download image from URL to temporary file"""
@@ -0,0 +1,176 @@
+# near_duplicates.py
+"""
+Near-duplicate article detection with word shingles, MinHash and LSH banding.
+
+Signatures and band buckets live in ArticleDatabase (article_signatures / minhash_buckets),
+so a lookup is a handful of indexed bucket probes plus a vectorized comparison against
+the few candidates they return.
+
+Usage:
+    python near_duplicates.py backfill [--db articles.db]
+    python near_duplicates.py benchmark [--articles 100000]
+"""
+import argparse
+import hashlib
+import re
+import time
+import numpy as np
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class MinHasher:
+    def __init__(self, num_perm=128, bands=16, shingle_size=5, seed=42):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        # a and b below 2**32 keep a * h + b inside uint64 for 32-bit shingle hashes
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+
+    def shingle_hashes(self, text):
+        words = re.findall(r"\w+", text.lower())
+        if len(words) < self.shingle_size:
+            shingles = {" ".join(words)} if words else set()
+        else:
+            shingles = {
+                " ".join(words[i:i + self.shingle_size])
+                for i in range(len(words) - self.shingle_size + 1)
+            }
+        return np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles)
+        )
+
+    def signature(self, text):
+        """MinHash signature as a uint32 array of length num_perm"""
+        hashes = self.shingle_hashes(text)
+        if hashes.size == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        # One permutation per row, every shingle per column
+        permuted = (np.outer(self.a, hashes) + self.b[:, None]) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def buckets(self, signature):
+        """One 64-bit bucket hash per LSH band; the band index is mixed in so bands never collide"""
+        bands = signature.reshape(self.bands, self.rows)
+        return [
+            int.from_bytes(
+                hashlib.blake2b(band_index.to_bytes(2, 'little') + band.tobytes(), digest_size=8).digest(),
+                'little', signed=True
+            )
+            for band_index, band in enumerate(bands)
+        ]
+
+
+class NearDuplicateDetector:
+    """Flags articles whose estimated Jaccard similarity to a stored article passes a threshold"""
+    def __init__(self, db, threshold=0.8, hasher=None):
+        self.db = db
+        self.threshold = threshold
+        self.hasher = hasher or MinHasher()
+
+    def _text(self, article_data):
+        return f"{article_data.get('title') or ''}\n{article_data.get('content') or ''}"
+
+    def find_duplicates(self, article_data, signature=None):
+        """Return [(url, similarity)] of stored near-duplicates, most similar first"""
+        if signature is None:
+            signature = self.hasher.signature(self._text(article_data))
+        candidates = self.db.find_signature_candidates(
+            self.hasher.buckets(signature), exclude_url=article_data.get('url')
+        )
+        if not candidates:
+            return []
+
+        urls = [url for url, _ in candidates]
+        signatures = np.frombuffer(b"".join(blob for _, blob in candidates), dtype=np.uint32)
+        similarities = (signatures.reshape(len(candidates), -1) == signature).mean(axis=1)
+
+        matches = [(url, float(sim)) for url, sim in zip(urls, similarities) if sim >= self.threshold]
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def add(self, article_data, signature=None):
+        """Index a stored article so later articles can be matched against it"""
+        if signature is None:
+            signature = self.hasher.signature(self._text(article_data))
+        return self.db.store_article_signature(
+            article_data['url'], signature.tobytes(), self.hasher.buckets(signature)
+        )
+
+    def check_and_add(self, article_data):
+        """Look up near-duplicates of a freshly inserted article, then index it"""
+        signature = self.hasher.signature(self._text(article_data))
+        duplicates = self.find_duplicates(article_data, signature=signature)
+        self.add(article_data, signature=signature)
+        return duplicates
+
+    def backfill(self):
+        """Index every stored article that has no signature yet"""
+        count = 0
+        for url, title, content in self.db.get_unsigned_articles():
+            self.add({'url': url, 'title': title, 'content': content})
+            count += 1
+        return count
+
+
+def benchmark(num_articles, lookups=200):
+    """Time lookups against a synthetic in-memory history of num_articles signatures"""
+    from database import ArticleDatabase
+
+    db = ArticleDatabase(':memory:')
+    detector = NearDuplicateDetector(db)
+    hasher = detector.hasher
+    rng = np.random.default_rng(0)
+
+    # Random signatures stand in for real ones; lookup cost doesn't depend on the text
+    signatures = rng.integers(0, 1 << 32, size=(num_articles, hasher.num_perm), dtype=np.uint32)
+    db.conn.executemany(
+        "INSERT INTO articles (id, title, url) VALUES (?, '', ?)",
+        ((i + 1, f"https://example.com/{i}") for i in range(num_articles))
+    )
+    db.conn.executemany(
+        "INSERT INTO article_signatures (article_id, signature) VALUES (?, ?)",
+        ((i + 1, signatures[i].tobytes()) for i in range(num_articles))
+    )
+    db.conn.executemany(
+        "INSERT INTO minhash_buckets (bucket, article_id) VALUES (?, ?)",
+        ((bucket, i + 1) for i in range(num_articles) for bucket in hasher.buckets(signatures[i]))
+    )
+    db.conn.commit()
+
+    text = " ".join(f"word{i}" for i in range(800))
+    start = time.perf_counter()
+    for i in range(lookups):
+        detector.find_duplicates({'url': f"https://example.com/new-{i}", 'title': str(i), 'content': text})
+    elapsed = time.perf_counter() - start
+    db.close()
+    return {'articles': num_articles, 'lookups': lookups, 'ms_per_lookup': elapsed / lookups * 1000}
+
+
+def main():
+    from database import ArticleDatabase
+
+    parser = argparse.ArgumentParser(description="Near-duplicate index maintenance")
+    parser.add_argument('command', choices=['backfill', 'benchmark'])
+    parser.add_argument('--db', default="articles.db")
+    parser.add_argument('--articles', type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.command == 'backfill':
+        db = ArticleDatabase(args.db)
+        print(f"Indexed {NearDuplicateDetector(db).backfill()} articles")
+        db.close()
+    else:
+        print(benchmark(args.articles))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,814 @@
+# postgres_database.py
+"""
+PostgreSQL backend for ArticleStorage.
+
+Same methods, return shapes and claim semantics as the SQLite ArticleDatabase, for
+deployments where crawlers and posting workers run on several hosts. Connections come
+from a psycopg_pool pool; every call borrows one for a single transaction, and calls
+inside db.transaction() share the connection of the enclosing block (per thread).
+
+Differences from SQLite worth knowing:
+  - Claims use row locks: claim_post's UPDATE re-checks the row after a concurrent claim
+    commits, and claim_next picks rows with FOR UPDATE SKIP LOCKED, so workers never wait
+    on each other's batches.
+  - Search uses a tsvector per article (GIN-indexed, 'simple' configuration, titles
+    weighted above bodies); raw=True takes PostgreSQL tsquery syntax ('a & b', 'word:*').
+  - A new database gets the current schema in one migration; there is no legacy data.
+"""
+import os
+import re
+import socket
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from psycopg_pool import ConnectionPool
+from storage import ArticleStorage, DEFAULT_LEASE_SECONDS, compress_text, decompress_text, url_digest
+
+
+class PostgresArticleDatabase(ArticleStorage):
+    """PostgreSQL backend: any number of processes and hosts share one database through pooled connections"""
+    # Key of the advisory lock that lets exactly one starting process apply migrations
+    MIGRATION_LOCK_ID = 7_368_001
+    # Key of the advisory lock that makes article ids commit in id order (see insert_articles)
+    ARTICLE_INSERT_LOCK_ID = 7_368_002
+
+    def __init__(self, dsn, min_pool_size=1, max_pool_size=10, seen_filter=None, **connect_kwargs):
+        # connect_kwargs go to every connection, e.g. options="-c search_path=articles"
+        self.pool = ConnectionPool(dsn, min_size=min_pool_size, max_size=max_pool_size,
+                                   kwargs=connect_kwargs, open=True)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{id(self):x}"
+        # The connection of the transaction() block the current thread is in, if any
+        self._local = threading.local()
+        self.ensure_schema()
+
+        self.seen_filter = seen_filter
+        if seen_filter is not None:
+            seen_filter.sync(self)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group several updates into one commit on one pooled connection. Everything inside
+        the block is rolled back if it raises. Nested blocks join the outermost one.
+        """
+        if getattr(self._local, 'conn', None) is not None:
+            yield self
+            return
+        # The pool commits when the block exits cleanly and rolls back on an exception
+        with self.pool.connection() as conn:
+            self._local.conn = conn
+            try:
+                yield self
+            finally:
+                self._local.conn = None
+
+    def _execute(self, query, params=None):
+        """Run one statement in the current transaction (or its own) and return the row count"""
+        with self.transaction():
+            return self._local.conn.execute(query, params).rowcount
+
+    def _executemany(self, query, params_seq):
+        params_seq = list(params_seq)
+        if params_seq:
+            with self.transaction():
+                self._local.conn.cursor().executemany(query, params_seq)
+
+    def _fetchone(self, query, params=None):
+        with self.transaction():
+            return self._local.conn.execute(query, params).fetchone()
+
+    def _fetchall(self, query, params=None):
+        with self.transaction():
+            return self._local.conn.execute(query, params).fetchall()
+
+    def ensure_schema(self):
+        """Apply outstanding MIGRATIONS; an up-to-date database costs two catalog reads here"""
+        if self.schema_version() >= len(self.MIGRATIONS):
+            return
+        with self.transaction():
+            # Held until commit: processes starting together queue here, then see the new version
+            self._execute("SELECT pg_advisory_xact_lock(%s)", (self.MIGRATION_LOCK_ID,))
+            self._execute("CREATE TABLE IF NOT EXISTS schema_migrations (version INTEGER NOT NULL)")
+            version = self.schema_version()
+            for number, migration in enumerate(self.MIGRATIONS[version:], start=version + 1):
+                migration(self)
+                self._execute("DELETE FROM schema_migrations")
+                self._execute("INSERT INTO schema_migrations (version) VALUES (%s)", (number,))
+
+    def schema_version(self):
+        if self._fetchone("SELECT to_regclass('schema_migrations')")[0] is None:
+            return 0
+        return self._fetchone("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")[0]
+
+    # Append new migrations to MIGRATIONS; never edit or reorder applied ones.
+
+    def _migration_1_schema(self):
+        # The SQLite schema as of its 9th migration; timestamps stay ISO strings for parity
+        for statement in """
+        CREATE TABLE articles (
+            id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+            title TEXT,
+            url TEXT NOT NULL UNIQUE,
+            post_datetime TEXT,
+            image_url TEXT,
+            crawl_datetime TEXT,
+            duplicate_of TEXT,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        CREATE INDEX idx_articles_crawl_datetime ON articles (crawl_datetime);
+        CREATE TABLE crawl_state (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TEXT
+        );
+        CREATE TABLE article_content (
+            article_id BIGINT PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+            content BYTEA
+        );
+        CREATE TABLE article_translations (
+            article_id BIGINT NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+            language TEXT NOT NULL,
+            title TEXT,
+            content BYTEA,
+            created_at TEXT,
+            PRIMARY KEY (article_id, language)
+        );
+        CREATE TABLE article_search (
+            article_id BIGINT PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+            document TSVECTOR NOT NULL
+        );
+        CREATE INDEX idx_article_search_document ON article_search USING GIN (document);
+        CREATE TABLE article_signatures (
+            article_id BIGINT PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+            signature BYTEA NOT NULL
+        );
+        CREATE TABLE minhash_buckets (
+            bucket BIGINT NOT NULL,
+            article_id BIGINT NOT NULL REFERENCES articles(id) ON DELETE CASCADE
+        );
+        CREATE INDEX idx_minhash_buckets_bucket ON minhash_buckets (bucket);
+        CREATE INDEX idx_minhash_buckets_article ON minhash_buckets (article_id);
+        CREATE TABLE platform_posts (
+            article_id BIGINT NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+            platform TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_attempt TEXT,
+            posted_at TEXT,
+            lease_owner TEXT,
+            lease_expires_at TEXT,
+            PRIMARY KEY (article_id, platform)
+        );
+        CREATE INDEX idx_platform_posts_status ON platform_posts (platform, status, article_id);
+        CREATE INDEX idx_platform_posts_lease ON platform_posts (platform, lease_expires_at)
+            WHERE status = 'in_progress';
+        CREATE INDEX idx_platform_posts_backlog ON platform_posts (platform, article_id, last_attempt, attempts)
+            WHERE status IN ('pending', 'failed');
+        CREATE TABLE post_messages (
+            platform TEXT NOT NULL,
+            message_id BIGINT NOT NULL,
+            article_id BIGINT NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+            sent_at TEXT NOT NULL,
+            PRIMARY KEY (platform, message_id)
+        );
+        CREATE INDEX idx_post_messages_article ON post_messages (article_id, platform);
+        CREATE INDEX idx_post_messages_sent ON post_messages (platform, sent_at)
+        """.split(';'):
+            self._execute(statement)
+
+    def _migration_2_archived_urls(self):
+        # URL digests of articles moved out by the retention job, so they still count as seen
+        self._execute("""
+        CREATE TABLE archived_urls (
+            article_id BIGINT PRIMARY KEY,
+            url_digest BYTEA NOT NULL UNIQUE
+        )
+        """)
+
+    MIGRATIONS = (
+        _migration_1_schema,
+        _migration_2_archived_urls,
+    )
+
+    # Titles (A) rank above bodies (D), matching the SQLite bm25 weights
+    INDEX_SEARCH_SQL = """
+    INSERT INTO article_search (article_id, document)
+    VALUES (%s, setweight(to_tsvector('simple', COALESCE(%s, '')), 'A')
+                || setweight(to_tsvector('simple', COALESCE(%s, '')), 'D')
+                || setweight(to_tsvector('simple', COALESCE(%s, '')), 'A')
+                || setweight(to_tsvector('simple', COALESCE(%s, '')), 'D'))
+    ON CONFLICT (article_id) DO UPDATE SET document = excluded.document
+    """
+
+    def insert_articles(self, articles):
+        """Insert a batch of scraped articles in one transaction. Returns the number inserted."""
+        now = datetime.now().isoformat()
+        new_articles = {}
+        for article_data in articles:
+            # The first copy of a repeated URL wins
+            new_articles.setdefault(article_data['url'], article_data)
+        if not new_articles:
+            return 0
+
+        for url in self._archived_urls(list(new_articles)):
+            del new_articles[url]
+        if not new_articles:
+            return 0
+        batch = list(new_articles.values())
+        urls = list(new_articles)
+        with self.transaction():
+            # Held until commit, so a transaction that draws later ids from the sequence commits
+            # later too: a SeenUrlFilter that synced past an id never misses a lower one
+            self._execute("SELECT pg_advisory_xact_lock(%s)", (self.ARTICLE_INSERT_LOCK_ID,))
+            inserted = self._fetchall("""
+                INSERT INTO articles (title, url, post_datetime, image_url, crawl_datetime)
+                SELECT * FROM unnest(%s::text[], %s::text[], %s::text[], %s::text[], %s::text[])
+                ON CONFLICT (url) DO NOTHING
+                RETURNING id, url
+            """, ([a['title'] for a in batch], urls, [a.get('post_datetime') or now for a in batch],
+                  [a['image_url'] for a in batch], [a['crawl_datetime'] for a in batch]))
+            self._executemany(
+                "INSERT INTO article_content (article_id, content) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+                [(article_id, compress_text(new_articles[url]['content'])) for article_id, url in inserted]
+            )
+            self._execute("""
+                INSERT INTO platform_posts (article_id, platform)
+                SELECT a.id, p.platform FROM articles a, unnest(%s::text[]) AS p(platform)
+                WHERE a.url = ANY(%s::text[])
+                ON CONFLICT DO NOTHING
+            """, (list(self.PLATFORMS), urls))
+            self._executemany(self.INDEX_SEARCH_SQL, [
+                (article_id, new_articles[url]['title'], new_articles[url]['content'], None, None)
+                for article_id, url in inserted
+            ])
+            if inserted and self.seen_filter is not None:
+                self.seen_filter.add_inserted(inserted)
+        return len(inserted)
+
+    def _max_article_id(self):
+        return self._fetchone("SELECT MAX(id) FROM articles")[0]
+
+    def get_article_urls_after(self, article_id, limit):
+        return self._fetchall("SELECT id, url FROM articles WHERE id > %s ORDER BY id LIMIT %s", (article_id, limit))
+
+    def article_exists(self, url):
+        return bool(self.get_existing_urls([url]))
+
+    def get_existing_urls(self, urls):
+        urls = self._maybe_seen(list(urls))
+        if not urls:
+            return set()
+        existing = {row[0] for row in self._fetchall("SELECT url FROM articles WHERE url = ANY(%s::text[])", (urls,))}
+        return existing | self._archived_urls(url for url in urls if url not in existing)
+
+    def get_batch_status(self, urls, platforms=('telegram', 'instagram', 'x'), include_content=True):
+        urls = list(dict.fromkeys(urls))
+        result = {'new': [], 'posted': [], 'duplicates': [], 'pending': {}}
+        if not urls:
+            return result
+
+        candidates = self._maybe_seen(urls)
+        rows = {row[1]: row for row in self._fetchall("""
+            SELECT a.title, a.url, a.id, a.post_datetime, a.image_url, a.crawl_datetime, a.duplicate_of,
+                   (SELECT string_agg(p.platform, ',') FROM platform_posts p
+                    WHERE p.article_id = a.id AND p.status IN ('posted', 'skipped'))
+            FROM articles a
+            WHERE a.url = ANY(%s::text[])
+        """, (candidates,))}
+        archived = self._archived_urls(url for url in candidates if url not in rows)
+
+        for url in urls:
+            row = rows.get(url)
+            if url in archived:
+                result['posted'].append(url)
+                continue
+            if row is None:
+                result['new'].append(url)
+                continue
+            if row[6]:
+                result['duplicates'].append(url)
+                continue
+            status = self._status_dict(row[7].split(',') if row[7] else [])
+            if all(status[platform] for platform in platforms):
+                result['posted'].append(url)
+                continue
+            article_data = {
+                "title": row[0],
+                "url": row[1],
+                "post_datetime": row[3],
+                "image_url": row[4],
+                "crawl_datetime": row[5]
+            }
+            result['pending'][url] = (article_data, status)
+
+        if include_content and result['pending']:
+            ids = {rows[url][2]: url for url in result['pending']}
+            for article_data, _ in result['pending'].values():
+                article_data['content'] = None
+            for article_id, content in self._fetchall(
+                    "SELECT article_id, content FROM article_content WHERE article_id = ANY(%s::bigint[])",
+                    (list(ids),)):
+                result['pending'][ids[article_id]][0]['content'] = decompress_text(content)
+        return result
+
+    def get_crawl_state(self, key):
+        row = self._fetchone("SELECT value FROM crawl_state WHERE key = %s", (key,))
+        return row[0] if row else None
+
+    def set_crawl_state(self, key, value):
+        self._execute("""
+            INSERT INTO crawl_state (key, value, updated_at) VALUES (%s, %s, %s)
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+        """, (key, value, datetime.now().isoformat()))
+
+    def retrieve_article(self, url, include_content=True):
+        row = self._fetchone("""
+            SELECT title, url, id, post_datetime, image_url, crawl_datetime FROM articles WHERE url = %s
+        """, (url,))
+        if row:
+            article_data = {
+                "title": row[0],
+                "url": row[1],
+                "post_datetime": row[3],
+                "image_url": row[4],
+                "crawl_datetime": row[5]
+            }
+            if include_content:
+                article_data["content"] = self._load_content(row[2])
+            return article_data
+        return None
+
+    def _load_content(self, article_id):
+        row = self._fetchone("SELECT content FROM article_content WHERE article_id = %s", (article_id,))
+        return decompress_text(row[0]) if row else None
+
+    def get_article_content(self, url):
+        row = self._fetchone("SELECT id FROM articles WHERE url = %s", (url,))
+        return self._load_content(row[0]) if row else None
+
+    def store_translation(self, url, language, title, content):
+        """Keep a translated title and body so retries and other platforms reuse it"""
+        row = self._fetchone("SELECT id, title FROM articles WHERE url = %s", (url,))
+        if not row:
+            return
+        article_id, article_title = row
+
+        with self.transaction():
+            self._execute("""
+                INSERT INTO article_translations (article_id, language, title, content, created_at)
+                VALUES (%s, %s, %s, %s, %s)
+                ON CONFLICT (article_id, language) DO UPDATE
+                SET title = excluded.title, content = excluded.content, created_at = excluded.created_at
+            """, (article_id, language, title, compress_text(content), datetime.now().isoformat()))
+            # Unlike the contentless FTS5 table, a tsvector row is simply replaced
+            self._execute(self.INDEX_SEARCH_SQL, (article_id, article_title, self._load_content(article_id),
+                                                  *self._join_translations(self._load_translations(article_id))))
+
+    def _load_translations(self, article_id):
+        rows = self._fetchall(
+            "SELECT title, content FROM article_translations WHERE article_id = %s ORDER BY language", (article_id,)
+        )
+        return [(title, decompress_text(content)) for title, content in rows]
+
+    def get_translation(self, url, language):
+        row = self._fetchone("""
+            SELECT t.title, t.content
+            FROM article_translations t
+            JOIN articles a ON a.id = t.article_id
+            WHERE a.url = %s AND t.language = %s
+        """, (url, language))
+        if row:
+            return {'title': row[0], 'content': decompress_text(row[1])}
+        return None
+
+    def search_articles(self, query, limit=20, raw=False):
+        """
+        Ranked full-text search over titles, bodies and translations. Plain queries match
+        articles containing every word; raw=True passes tsquery syntax through. Scores are
+        negated ts_rank_cd values, so lower is better as with SQLite.
+        """
+        if raw:
+            tsquery = "to_tsquery('simple', %s)"
+        else:
+            words = re.findall(r"\w+", query)
+            if not words:
+                return []
+            query = " ".join(words)
+            tsquery = "plainto_tsquery('simple', %s)"
+
+        rows = self._fetchall(f"""
+            SELECT a.url, a.title, a.post_datetime, -ts_rank_cd(s.document, q) AS score
+            FROM article_search s
+            JOIN articles a ON a.id = s.article_id,
+                 {tsquery} AS q
+            WHERE s.document @@ q
+            ORDER BY score, a.id
+            LIMIT %s
+        """, (query, limit))
+        return [
+            {'url': url, 'title': title, 'post_datetime': post_datetime, 'score': score}
+            for url, title, post_datetime, score in rows
+        ]
+
+    def rebuild_search_index(self):
+        """Re-create every search document from the stored articles and translations"""
+        with self.transaction():
+            self._execute("DELETE FROM article_search")
+            translations = {}
+            for article_id, title, content in self._fetchall(
+                    "SELECT article_id, title, content FROM article_translations ORDER BY article_id, language"):
+                translations.setdefault(article_id, []).append((title, decompress_text(content)))
+
+            # Server-side cursor, so bodies stream in batches instead of loading at once
+            with self._local.conn.cursor(name='rebuild_search_index') as cursor:
+                cursor.execute("""
+                    SELECT a.id, a.title, c.content FROM articles a
+                    LEFT JOIN article_content c ON c.article_id = a.id
+                """)
+                while True:
+                    rows = cursor.fetchmany(1000)
+                    if not rows:
+                        break
+                    self._executemany(self.INDEX_SEARCH_SQL, [
+                        (article_id, title, decompress_text(content),
+                         *self._join_translations(translations.get(article_id)))
+                        for article_id, title, content in rows
+                    ])
+
+    def store_article_signature(self, url, signature, buckets):
+        row = self._fetchone("SELECT id FROM articles WHERE url = %s", (url,))
+        if not row:
+            return False
+        article_id = row[0]
+        with self.transaction():
+            self._execute("""
+                INSERT INTO article_signatures (article_id, signature) VALUES (%s, %s)
+                ON CONFLICT (article_id) DO UPDATE SET signature = excluded.signature
+            """, (article_id, signature))
+            self._execute("DELETE FROM minhash_buckets WHERE article_id = %s", (article_id,))
+            self._executemany("INSERT INTO minhash_buckets (bucket, article_id) VALUES (%s, %s)",
+                              [(bucket, article_id) for bucket in buckets])
+        return True
+
+    def find_signature_candidates(self, buckets, exclude_url=None):
+        buckets = list(buckets)
+        if not buckets:
+            return []
+        rows = self._fetchall("""
+            SELECT a.url, s.signature
+            FROM articles a
+            JOIN article_signatures s ON s.article_id = a.id
+            WHERE a.id IN (SELECT article_id FROM minhash_buckets WHERE bucket = ANY(%s::bigint[]))
+        """, (buckets,))
+        return [(url, bytes(signature)) for url, signature in rows if url != exclude_url]
+
+    def get_unsigned_articles(self):
+        rows = self._fetchall("""
+            SELECT a.url, a.title, c.content
+            FROM articles a
+            LEFT JOIN article_content c ON c.article_id = a.id
+            LEFT JOIN article_signatures s ON s.article_id = a.id
+            WHERE s.article_id IS NULL
+        """)
+        return [(url, title, decompress_text(content)) for url, title, content in rows]
+
+    def mark_duplicate(self, url, original_url):
+        with self.transaction():
+            self._execute("UPDATE articles SET duplicate_of = %s WHERE url = %s", (original_url, url))
+            self._execute("""
+                UPDATE platform_posts SET status = 'skipped'
+                WHERE status IN ('pending', 'failed') AND article_id = (SELECT id FROM articles WHERE url = %s)
+            """, (url,))
+
+    def _ensure_platform_post(self, url, platform):
+        self._execute("""
+            INSERT INTO platform_posts (article_id, platform) SELECT id, %s FROM articles WHERE url = %s
+            ON CONFLICT DO NOTHING
+        """, (platform, url))
+
+    def store_message_ids(self, url, message_ids, platform='telegram', sent_at=None):
+        platform = self._platform(platform)
+        sent_at = sent_at or datetime.now().isoformat()
+        with self.transaction():
+            self._ensure_platform_post(url, platform)
+            self._executemany("""
+                INSERT INTO post_messages (platform, message_id, article_id, sent_at)
+                SELECT %s, %s, id, %s FROM articles WHERE url = %s
+                ON CONFLICT DO NOTHING
+            """, [(platform, int(message_id), sent_at, url) for message_id in message_ids])
+
+    def get_message_ids(self, platform='telegram', url=None, sent_after=None, sent_before=None,
+                        message_ids=None, limit=None):
+        conditions = ["m.platform = %s"]
+        params = [self._platform(platform)]
+        if url is not None:
+            conditions.append("m.article_id = (SELECT id FROM articles WHERE url = %s)")
+            params.append(url)
+        if sent_after is not None:
+            conditions.append("m.sent_at >= %s")
+            params.append(sent_after)
+        if sent_before is not None:
+            conditions.append("m.sent_at < %s")
+            params.append(sent_before)
+        if message_ids is not None:
+            conditions.append("m.message_id = ANY(%s::bigint[])")
+            params.append([int(message_id) for message_id in message_ids])
+        query = f"""
+        SELECT a.url, m.message_id, m.sent_at
+        FROM post_messages m
+        JOIN articles a ON a.id = m.article_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY m.sent_at DESC, m.message_id DESC
+        """
+        if limit is not None:
+            query += " LIMIT %s"
+            params.append(int(limit))
+        return self._fetchall(query, params)
+
+    def remove_message_ids(self, message_ids, platform='telegram'):
+        return self._execute(
+            "DELETE FROM post_messages WHERE platform = %s AND message_id = ANY(%s::bigint[])",
+            (self._platform(platform), [int(message_id) for message_id in message_ids])
+        )
+
+    def get_external_ids(self, platform='telegram'):
+        return self._fetchall("""
+            SELECT a.url, string_agg(m.message_id::text, ',' ORDER BY m.message_id)
+            FROM post_messages m
+            JOIN articles a ON a.id = m.article_id
+            WHERE m.platform = %s
+            GROUP BY m.article_id, a.url
+            ORDER BY m.article_id
+        """, (self._platform(platform),))
+
+    def clear_external_ids(self, url, platform='telegram'):
+        self._execute("""
+            DELETE FROM post_messages
+            WHERE platform = %s AND article_id = (SELECT id FROM articles WHERE url = %s)
+        """, (self._platform(platform), url))
+
+    def mark_as_posted(self, url, platform='telegram'):
+        platform = self._platform(platform)
+        now = datetime.now().isoformat()
+        self._execute("""
+            INSERT INTO platform_posts (article_id, platform, status, last_attempt, posted_at)
+            SELECT id, %s, 'posted', %s, %s FROM articles WHERE url = %s
+            ON CONFLICT (article_id, platform) DO UPDATE
+            SET status = 'posted', last_attempt = excluded.last_attempt, posted_at = excluded.posted_at,
+                lease_owner = NULL, lease_expires_at = NULL
+        """, (platform, now, now, url))
+
+    def mark_skipped(self, url, platform):
+        platform = self._platform(platform)
+        self._execute("""
+            INSERT INTO platform_posts (article_id, platform, status, last_attempt)
+            SELECT id, %s, 'skipped', %s FROM articles WHERE url = %s
+            ON CONFLICT (article_id, platform) DO UPDATE
+            SET status = 'skipped', last_attempt = excluded.last_attempt, lease_owner = NULL, lease_expires_at = NULL
+            WHERE platform_posts.status <> 'posted'
+        """, (platform, datetime.now().isoformat(), url))
+
+    def get_posting_status(self, url):
+        rows = self._fetchall("""
+            SELECT p.platform
+            FROM platform_posts p
+            JOIN articles a ON a.id = p.article_id
+            WHERE a.url = %s AND p.status = 'posted'
+        """, (url,))
+        return self._status_dict(row[0] for row in rows)
+
+    def get_pending_articles(self, platform, limit=100, retry_after_minutes=0, max_attempts=None,
+                             max_age_hours=None):
+        """
+        URLs of articles still pending (or failed) on platform, oldest first, skipping any
+        attempted in the last retry_after_minutes, any already tried max_attempts times and,
+        with max_age_hours, any crawled longer ago than that.
+        """
+        now = datetime.now()
+        retry_cutoff = (now - timedelta(minutes=retry_after_minutes)).isoformat()
+        min_article_id = 0
+        if max_age_hours is not None:
+            crawl_cutoff = (now - timedelta(hours=max_age_hours)).strftime("%Y-%m-%d %H:%M:%S")
+            row = self._fetchone("SELECT MIN(id) FROM articles WHERE crawl_datetime >= %s", (crawl_cutoff,))
+            if row[0] is None:
+                return []
+            min_article_id = row[0]
+
+        rows = self._fetchall("""
+            SELECT a.url
+            FROM platform_posts p
+            JOIN articles a ON a.id = p.article_id
+            WHERE p.platform = %s AND p.status IN ('pending', 'failed')
+              AND p.article_id >= %s
+              AND (p.last_attempt IS NULL OR p.last_attempt < %s)
+              AND p.attempts < %s
+            ORDER BY p.article_id
+            LIMIT %s
+        """, (self._platform(platform), min_article_id, retry_cutoff,
+              max_attempts if max_attempts is not None else 2 ** 31 - 1, limit))
+        return [row[0] for row in rows]
+
+    def get_backlog_urls(self, platforms, limit=10, **filters):
+        urls = {}
+        for platform in platforms:
+            for url in self.get_pending_articles(platform, limit=limit, **filters):
+                urls.setdefault(url, None)
+        rows = self._fetchall("SELECT url FROM articles WHERE url = ANY(%s::text[]) ORDER BY id LIMIT %s",
+                              (list(urls), limit))
+        return [row[0] for row in rows]
+
+    def record_failed_attempt(self, url, platform):
+        platform = self._platform(platform)
+        with self.transaction():
+            self._ensure_platform_post(url, platform)
+            self._execute("""
+                UPDATE platform_posts
+                SET status = 'failed', attempts = attempts + 1, last_attempt = %s,
+                    lease_owner = NULL, lease_expires_at = NULL
+                WHERE platform = %s AND status != 'posted'
+                  AND article_id = (SELECT id FROM articles WHERE url = %s)
+            """, (datetime.now().isoformat(), platform, url))
+
+    # Rows marked in_progress without an expiry count as expired, as in the SQLite backend
+    CLAIMABLE_SQL = """
+    (status IN ('pending', 'failed')
+     OR (status = 'in_progress' AND (lease_expires_at IS NULL OR lease_expires_at < %(now)s)))
+    """
+
+    def claim_post(self, url, platform, owner=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        platform = self._platform(platform)
+        now, expires = self._lease_times(lease_seconds)
+        try:
+            with self.transaction():
+                self._ensure_platform_post(url, platform)
+                # A concurrent claimer blocks on the row lock, then re-evaluates the WHERE clause
+                # against the committed claim and updates nothing
+                row = self._fetchone(f"""
+                    UPDATE platform_posts
+                    SET status = 'in_progress', attempts = attempts + 1, last_attempt = %(now)s,
+                        lease_owner = %(owner)s, lease_expires_at = %(expires)s
+                    WHERE platform = %(platform)s
+                      AND article_id = (SELECT id FROM articles WHERE url = %(url)s)
+                      AND {self.CLAIMABLE_SQL}
+                    RETURNING article_id
+                """, {'now': now, 'owner': owner or self.worker_id, 'expires': expires,
+                      'platform': platform, 'url': url})
+                return row is not None
+        except Exception as e:
+            print(f"Error claiming {platform} post: {e}")
+            return False
+
+    def claim_next(self, platform, owner=None, limit=1, lease_seconds=DEFAULT_LEASE_SECONDS):
+        platform = self._platform(platform)
+        now, expires = self._lease_times(lease_seconds)
+        rows = self._fetchall(f"""
+            UPDATE platform_posts p
+            SET status = 'in_progress', attempts = attempts + 1, last_attempt = %(now)s,
+                lease_owner = %(owner)s, lease_expires_at = %(expires)s
+            FROM articles a
+            WHERE a.id = p.article_id AND p.platform = %(platform)s AND p.article_id IN (
+                SELECT article_id FROM platform_posts
+                WHERE platform = %(platform)s AND {self.CLAIMABLE_SQL}
+                ORDER BY article_id
+                LIMIT %(limit)s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING a.id, a.url
+        """, {'now': now, 'owner': owner or self.worker_id, 'expires': expires,
+              'platform': platform, 'limit': limit})
+        return [url for _, url in sorted(rows)]
+
+    def renew_lease(self, url, platform, owner=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        platform = self._platform(platform)
+        _, expires = self._lease_times(lease_seconds)
+        row = self._fetchone("""
+            UPDATE platform_posts SET lease_expires_at = %s
+            WHERE platform = %s AND status = 'in_progress' AND lease_owner = %s
+              AND article_id = (SELECT id FROM articles WHERE url = %s)
+            RETURNING article_id
+        """, (expires, platform, owner or self.worker_id, url))
+        return row is not None
+
+    def reclaim_expired_leases(self, platform=None):
+        query = """
+        UPDATE platform_posts
+        SET status = 'failed', lease_owner = NULL, lease_expires_at = NULL
+        WHERE status = 'in_progress' AND (lease_expires_at IS NULL OR lease_expires_at < %s)
+        """
+        params = [datetime.now().isoformat(timespec='microseconds')]
+        if platform:
+            query += " AND platform = %s"
+            params.append(self._platform(platform))
+        return self._execute(query, params)
+
+    def mark_posting_result(self, url, platform, success=True, owner=None):
+        platform = self._platform(platform)
+        now = datetime.now().isoformat()
+        query = """
+        UPDATE platform_posts
+        SET status = %s, last_attempt = %s, posted_at = CASE WHEN %s THEN %s ELSE posted_at END,
+            lease_owner = NULL, lease_expires_at = NULL
+        WHERE platform = %s AND article_id = (SELECT id FROM articles WHERE url = %s)
+        """
+        params = ['posted' if success else 'failed', now, bool(success), now, platform, url]
+        if owner:
+            query += " AND lease_owner = %s"
+            params.append(owner)
+        try:
+            with self.transaction():
+                self._ensure_platform_post(url, platform)
+                return self._execute(query, params) > 0
+        except Exception as e:
+            print(f"Error marking {platform} posting result: {e}")
+            return False
+
+    def get_attempts(self, url, platform):
+        row = self._fetchone("""
+            SELECT p.attempts
+            FROM platform_posts p
+            JOIN articles a ON a.id = p.article_id
+            WHERE a.url = %s AND p.platform = %s
+        """, (url, self._platform(platform)))
+        return row[0] if row else 0
+
+    def _archived_urls(self, urls):
+        digests = {url_digest(url): url for url in urls}
+        if not digests:
+            return set()
+        rows = self._fetchall("SELECT url_digest FROM archived_urls WHERE url_digest = ANY(%s::bytea[])",
+                              (list(digests),))
+        return {digests[bytes(row[0])] for row in rows}
+
+    def get_archived_digests_after(self, article_id, limit):
+        rows = self._fetchall(
+            "SELECT article_id, url_digest FROM archived_urls WHERE article_id > %s ORDER BY article_id LIMIT %s",
+            (article_id, limit)
+        )
+        return [(article_id, bytes(digest)) for article_id, digest in rows]
+
+    def export_archivable_articles(self, cutoff, platforms=('telegram', 'instagram', 'x'), limit=500,
+                                   include_unfinished=False):
+        finished = "" if include_unfinished else """
+          AND NOT EXISTS (
+              SELECT 1 FROM unnest(%(platforms)s::text[]) AS p(platform)
+              LEFT JOIN platform_posts pp ON pp.article_id = a.id AND pp.platform = p.platform
+              WHERE pp.status IS NULL OR pp.status NOT IN ('posted', 'skipped'))
+        """
+        articles = self._fetchall(f"""
+            SELECT a.id, a.url, a.title, a.post_datetime, a.image_url, a.crawl_datetime, a.duplicate_of, c.content
+            FROM articles a
+            LEFT JOIN article_content c ON c.article_id = a.id
+            WHERE a.crawl_datetime < %(cutoff)s {finished}
+            ORDER BY a.crawl_datetime, a.id
+            LIMIT %(limit)s
+        """, {'cutoff': cutoff, 'platforms': [self._platform(p) for p in platforms], 'limit': limit})
+        if not articles:
+            return []
+
+        ids = [row[0] for row in articles]
+        related = {}
+        for table, query in (
+            ('translations', "SELECT article_id, language, title, content FROM article_translations "
+                             "WHERE article_id = ANY(%s::bigint[]) ORDER BY article_id, language"),
+            ('posts', "SELECT article_id, platform, status, attempts, last_attempt, posted_at FROM platform_posts "
+                      "WHERE article_id = ANY(%s::bigint[]) ORDER BY article_id, platform"),
+            ('messages', "SELECT article_id, platform, message_id, sent_at FROM post_messages "
+                         "WHERE article_id = ANY(%s::bigint[]) ORDER BY article_id, message_id"),
+        ):
+            related[table] = {}
+            for article_id, *rest in self._fetchall(query, (ids,)):
+                related[table].setdefault(article_id, []).append(rest)
+        return self._archive_records(articles, related['translations'], related['posts'], related['messages'])
+
+    def remove_archived_articles(self, records):
+        records = list(records)
+        with self.transaction():
+            self._executemany(
+                "INSERT INTO archived_urls (article_id, url_digest) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+                [(record['id'], url_digest(record['url'])) for record in records]
+            )
+            # Everything else about the article, its search document included, cascades
+            return self._execute("DELETE FROM articles WHERE id = ANY(%s::bigint[])",
+                                 ([record['id'] for record in records],))
+
+    def vacuum(self, max_pages=None):
+        """
+        VACUUM (ANALYZE) the tables retention deletes from. PostgreSQL reuses the freed space
+        rather than shrinking files, and autovacuum would get there too; this just does it
+        right after a large archive run. max_pages does not apply.
+        """
+        with self.pool.connection() as conn:
+            # VACUUM refuses to run inside a transaction block
+            conn.autocommit = True
+            try:
+                for table in ('articles', 'article_content', 'article_translations', 'article_search',
+                              'article_signatures', 'minhash_buckets', 'platform_posts', 'post_messages'):
+                    conn.execute(f"VACUUM (ANALYZE) {table}")
+            finally:
+                conn.autocommit = False
+        return None
+
+    def close(self):
+        self.pool.close()
+        if self.seen_filter is not None:
+            self.seen_filter.close()
@@ -0,0 +1,169 @@
+# rate_control.py
+"""
+Adaptive per-host request pacing (additive-increase / multiplicative-decrease).
+
+Every request to a host takes a slot from that host's current concurrency limit and
+waits out its inter-request delay. Successful, fast responses slowly raise the limit
+and shrink the delay; 429/503 responses, connection errors and latency spikes halve the
+limit and double the delay, honoring Retry-After when the server sends one.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+
+THROTTLE_STATUSES = {429, 503}
+
+
+class HostRateState:
+    def __init__(self, concurrency, delay):
+        self.concurrency = concurrency
+        self.delay = delay
+        self.in_flight = 0
+        self.next_request_at = 0.0
+        self.latency_ewma = None
+        self.latency_floor = None
+        self.error_ewma = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.completed = deque()
+
+
+class RequestOutcome:
+    """Filled in by the caller inside AdaptiveRateController.request()"""
+    def __init__(self):
+        self.status = None
+        self.retry_after = None
+
+
+class AdaptiveRateController:
+    def __init__(self, initial_concurrency: float = 2, min_concurrency: float = 1, max_concurrency: float = 8,
+                 initial_delay: float = 0.5, min_delay: float = 0.0, max_delay: float = 60.0,
+                 increase_step: float = 1.0, decrease_factor: float = 0.5, delay_step: float = 0.05,
+                 latency_spike_ratio: float = 3.0, ewma_alpha: float = 0.2):
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.delay_step = delay_step
+        self.latency_spike_ratio = latency_spike_ratio
+        self.ewma_alpha = ewma_alpha
+        self.logger = logging.getLogger(__name__)
+
+        self._hosts = {}
+        self._condition = threading.Condition()
+
+    def _state(self, host: str) -> HostRateState:
+        if host not in self._hosts:
+            self._hosts[host] = HostRateState(self.initial_concurrency, self.initial_delay)
+        return self._hosts[host]
+
+    def acquire(self, host: str):
+        """Block until the host has a free slot and its inter-request delay has passed"""
+        with self._condition:
+            state = self._state(host)
+            while True:
+                now = time.monotonic()
+                if state.in_flight < int(state.concurrency):
+                    if now >= state.next_request_at:
+                        break
+                    self._condition.wait(state.next_request_at - now)
+                else:
+                    self._condition.wait()
+            state.in_flight += 1
+            state.requests += 1
+            state.next_request_at = now + state.delay
+
+    def release(self, host: str, latency: Optional[float], status: Optional[int] = None,
+                error: bool = False, retry_after: Optional[float] = None):
+        """Record a finished request and adjust the host's limits; latency=None skips latency tracking"""
+        with self._condition:
+            state = self._state(host)
+            state.in_flight -= 1
+            state.completed.append(time.monotonic())
+
+            throttled = error or status in THROTTLE_STATUSES
+            state.error_ewma += self.ewma_alpha * ((1.0 if throttled else 0.0) - state.error_ewma)
+
+            if not throttled and latency is not None:
+                state.latency_floor = latency if state.latency_floor is None else min(state.latency_floor, latency)
+                state.latency_ewma = latency if state.latency_ewma is None else (
+                    state.latency_ewma + self.ewma_alpha * (latency - state.latency_ewma)
+                )
+
+            latency_spike = (
+                not throttled
+                and latency is not None
+                and state.latency_floor
+                and latency > state.latency_floor * self.latency_spike_ratio
+                and state.latency_ewma > state.latency_floor * self.latency_spike_ratio
+            )
+
+            if throttled or latency_spike:
+                # Multiplicative decrease
+                state.concurrency = max(self.min_concurrency, state.concurrency * self.decrease_factor)
+                state.delay = min(self.max_delay, max(state.delay * 2, self.delay_step * 2))
+                if throttled:
+                    state.errors += 1
+                if status in THROTTLE_STATUSES:
+                    state.throttled += 1
+                backoff = max(state.delay, retry_after or 0)
+                state.next_request_at = max(state.next_request_at, time.monotonic() + backoff)
+                self.logger.warning(
+                    f"Backing off {host}: concurrency {state.concurrency:.1f}, delay {state.delay:.2f}s"
+                    f" (status={status}, error={error}, latency={latency}s)"
+                )
+            else:
+                # Additive increase, spread over roughly one window of requests
+                state.concurrency = min(self.max_concurrency,
+                                        state.concurrency + self.increase_step / max(state.concurrency, 1))
+                state.delay = max(self.min_delay, state.delay - self.delay_step)
+
+            self._condition.notify_all()
+
+    @contextmanager
+    def request(self, host: str, track_latency: bool = True):
+        """Hold a slot for one request; set outcome.status / outcome.retry_after inside the block"""
+        self.acquire(host)
+        outcome = RequestOutcome()
+        start = time.monotonic()
+        error = False
+        try:
+            yield outcome
+        except Exception:
+            error = outcome.status is None
+            raise
+        finally:
+            latency = time.monotonic() - start if track_latency else None
+            self.release(host, latency, status=outcome.status,
+                         error=error, retry_after=outcome.retry_after)
+
+    def get_metrics(self, window: float = 60.0) -> dict:
+        """Current limits per host, plus the request rate they allow and the rate actually observed"""
+        metrics = {}
+        with self._condition:
+            now = time.monotonic()
+            for host, state in self._hosts.items():
+                while state.completed and state.completed[0] < now - window:
+                    state.completed.popleft()
+                per_request = (state.latency_ewma or 0) + state.delay
+                metrics[host] = {
+                    'concurrency': round(state.concurrency, 2),
+                    'delay_seconds': round(state.delay, 3),
+                    'allowed_rate_per_second': round(int(state.concurrency) / per_request, 2) if per_request else None,
+                    'observed_rate_per_second': round(len(state.completed) / window, 3),
+                    'latency_ewma_seconds': round(state.latency_ewma, 3) if state.latency_ewma is not None else None,
+                    'error_rate': round(state.error_ewma, 3),
+                    'requests': state.requests,
+                    'errors': state.errors,
+                    'throttled': state.throttled,
+                    'in_flight': state.in_flight,
+                }
+        return metrics
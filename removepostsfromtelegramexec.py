@@ -1,55 +1,112 @@
 # delete_messages.py
+"""
+Delete posted messages from the Telegram channel and forget them in the database.
+
+Messages are selected with one indexed query (by article, date range or id) and removed
+with the Bot API's deleteMessages, up to 100 ids per call, a few calls at a time. Flood
+control (RetryAfter) pauses every worker for the time Telegram asks for.
+
+Usage:
+    python removepostsfromtelegramexec.py [--limit 10] [--url URL] [--since ISO] [--until ISO]
+                                          [--message-id ID] [--all] [--concurrency 4]
+
+At least one filter is required; --all deletes every stored message.
+"""
+import argparse
 import asyncio
+import os
+import time
 from telegram import Bot
+from telegram.error import RetryAfter
 from config import Config
-from database import ArticleDatabase
+from storage import open_database
+
+BATCH_SIZE = 100  # deleteMessages accepts at most 100 ids per call
+
+
+class FloodControl:
+    """Shared pause: when one call is told to retry after N seconds, all calls wait"""
+    def __init__(self):
+        self.resume_at = 0.0
+
+    def pause(self, seconds):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    async def wait(self):
+        delay = self.resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
 
-async def delete_messages(limit=None, specific_message_id=None):
-    bot = Bot(token=Config.TELEGRAM_BOT_TOKEN)
-    chat_id = Config.TELEGRAM_CHAT_ID
-    db = ArticleDatabase()
+
+async def delete_batch(bot, chat_id, message_ids, semaphore, flood_control, max_retries=5):
+    for attempt in range(1, max_retries + 1):
+        await flood_control.wait()
+        async with semaphore:
+            try:
+                await bot.delete_messages(chat_id=chat_id, message_ids=message_ids)
+                return True
+            except RetryAfter as e:
+                # python-telegram-bot 21 reports seconds, later versions a timedelta
+                value = e.retry_after
+                retry_after = getattr(value, 'total_seconds', lambda: value)()
+                print(f"Flood control: waiting {retry_after}s (attempt {attempt}/{max_retries})")
+                flood_control.pause(retry_after)
+            except Exception as e:
+                print(f"Failed to delete messages {message_ids[0]}..{message_ids[-1]}: {e}")
+                return False
+    return False
+
+
+async def delete_messages(limit=None, specific_message_id=None, url=None, since=None, until=None,
+                          concurrency=4, db=None, bot=None, chat_id=None):
+    bot = bot or Bot(token=Config.TELEGRAM_BOT_TOKEN)
+    chat_id = chat_id or Config.TELEGRAM_CHAT_ID
+    own_db = db is None
+    db = db or open_database(os.environ.get('ARTICLE_DB', 'articles.db'))
 
     try:
-        # Retrieve articles with message_ids
-        query = "SELECT url, message_ids FROM articles WHERE message_ids IS NOT NULL"
-        articles = db.conn.execute(query).fetchall()
-
-        deleted_count = 0
-        for article in articles:
-            url, message_ids_str = article
-            if not message_ids_str:
-                continue
-
-            message_ids = list(map(int, message_ids_str.split(',')))
-
-            for message_id in message_ids:
-                # Check if we should stop after reaching the limit
-                if limit is not None and deleted_count >= limit:
-                    print(f"Deleted {deleted_count} messages as requested.")
-                    return
-
-                # Check if we are deleting only a specific message ID
-                if specific_message_id is not None and message_id != specific_message_id:
-                    continue
-
-                try:
-                    await bot.delete_message(chat_id=chat_id, message_id=message_id)
-                    print(f"Deleted message {message_id}")
-                    deleted_count += 1
-                except Exception as e:
-                    print(f"Failed to delete message {message_id}: {e}")
-
-            # Optionally, remove message_ids from the database after deletion if all messages are deleted
-            db.conn.execute("UPDATE articles SET message_ids = NULL WHERE url = ?", (url,))
-            db.conn.commit()
+        records = db.get_message_ids(
+            'telegram', url=url, sent_after=since, sent_before=until, limit=limit,
+            message_ids=[specific_message_id] if specific_message_id is not None else None,
+        )
+        message_ids = [message_id for _, message_id, _ in records]
+        batches = [message_ids[i:i + BATCH_SIZE] for i in range(0, len(message_ids), BATCH_SIZE)]
+
+        semaphore = asyncio.Semaphore(concurrency)
+        flood_control = FloodControl()
+        results = await asyncio.gather(*(delete_batch(bot, chat_id, batch, semaphore, flood_control)
+                                         for batch in batches))
 
+        deleted = [message_id for batch, ok in zip(batches, results) if ok for message_id in batch]
+        # Failed batches stay in the database so a later run can retry them
+        db.remove_message_ids(deleted, 'telegram')
+        print(f"Deleted {len(deleted)} of {len(message_ids)} messages in {len(batches)} calls.")
+        return len(deleted)
     except Exception as e:
         print(f"An error occurred: {e}")
+        return 0
     finally:
-        db.close()
+        if own_db:
+            db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Delete posted Telegram messages")
+    parser.add_argument('--limit', type=int, help="Only the N most recent messages")
+    parser.add_argument('--url', help="Only messages of this article")
+    parser.add_argument('--since', help="Only messages sent at or after this ISO timestamp")
+    parser.add_argument('--until', help="Only messages sent before this ISO timestamp")
+    parser.add_argument('--message-id', type=int, help="Only this message")
+    parser.add_argument('--all', action='store_true', help="Delete every stored message")
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+    filters = (args.limit, args.url, args.since, args.until, args.message_id)
+    if all(value is None for value in filters) and not args.all:
+        parser.error("give --limit, --url, --since, --until or --message-id, or --all to delete every message")
+    asyncio.run(delete_messages(limit=args.limit, specific_message_id=args.message_id, url=args.url,
+                                since=args.since, until=args.until, concurrency=args.concurrency))
+
 
 # Usage example
 if __name__ == "__main__":
-    asyncio.run(delete_messages(limit=10))  # Example: delete the 10 most recent messages
-    # asyncio.run(delete_messages(specific_message_id=123456))  # Example: delete a specific message ID
-
+    main()  # e.g. --limit 10 deletes the 10 most recent messages, --all deletes them all
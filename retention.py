@@ -0,0 +1,134 @@
+# retention.py
+"""
+Move old, fully posted articles out of the live database into a compressed archive.
+
+Each run exports articles crawled more than --older-than-days ago whose posts are posted or
+skipped on every platform, writes them to the archive (one zlib-compressed JSON record per
+article, in a separate SQLite file), deletes them from the live database and reclaims the
+freed pages. Only a 16-byte digest of each archived URL stays behind, so the scraper still
+treats it as seen and a SeenUrlFilter rebuilt from the database still contains it.
+
+The archive is written before the live rows are deleted, so an interrupted run is simply
+picked up again by the next one.
+
+Usage:
+    python retention.py run [--db articles.db] [--archive articles-archive.db] [--older-than-days 90]
+                            [--platforms telegram instagram x] [--include-unfinished] [--vacuum-pages N]
+    python retention.py show URL [--archive articles-archive.db]
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from storage import open_database
+
+
+class ArticleArchive:
+    def __init__(self, path="articles-archive.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS archived_articles (
+            article_id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL UNIQUE,
+            title TEXT,
+            post_datetime TEXT,
+            crawl_datetime TEXT,
+            archived_at TEXT NOT NULL,
+            record BLOB NOT NULL
+        )
+        """)
+        self.conn.commit()
+
+    def add_many(self, records):
+        """Store exported records; a record archived by an interrupted run is replaced"""
+        archived_at = datetime.now().isoformat()
+        with self._lock:
+            self.conn.executemany("""
+                INSERT OR REPLACE INTO archived_articles
+                    (article_id, url, title, post_datetime, crawl_datetime, archived_at, record)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(record['id'], record['url'], record['title'], record['post_datetime'],
+                   record['crawl_datetime'], archived_at,
+                   zlib.compress(json.dumps(record, ensure_ascii=False).encode('utf-8'), 9))
+                  for record in records])
+            self.conn.commit()
+
+    def get(self, url):
+        with self._lock:
+            row = self.conn.execute("SELECT record FROM archived_articles WHERE url = ?", (url,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM archived_articles").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def run_retention(db, archive, older_than_days=90, platforms=('telegram', 'instagram', 'x'),
+                  batch_size=500, include_unfinished=False, vacuum_pages=None):
+    """Archive everything eligible in batches, then vacuum. Returns counts and timings."""
+    start = time.perf_counter()
+    # Same format the scrapers store crawl_datetime in, so string comparison orders correctly
+    cutoff = (datetime.now() - timedelta(days=older_than_days)).strftime("%Y-%m-%d %H:%M:%S")
+    archived = 0
+    while True:
+        records = db.export_archivable_articles(cutoff, platforms, limit=batch_size,
+                                                include_unfinished=include_unfinished)
+        if not records:
+            break
+        archive.add_many(records)
+        archived += db.remove_archived_articles(records)
+        print(f"Archived {archived} articles (up to {records[-1]['crawl_datetime']})")
+
+    vacuum_start = time.perf_counter()
+    pages_freed = db.vacuum(vacuum_pages) if archived else 0
+    return {
+        'cutoff': cutoff,
+        'archived': archived,
+        'pages_freed': pages_freed,
+        'archive_seconds': round(vacuum_start - start, 3),
+        'vacuum_seconds': round(time.perf_counter() - vacuum_start, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old posted articles out of the live database")
+    parser.add_argument('command', choices=['run', 'show'])
+    parser.add_argument('url', nargs='?', help="Article to show from the archive")
+    parser.add_argument('--db', default=os.environ.get('ARTICLE_DB', 'articles.db'))
+    parser.add_argument('--archive', default="articles-archive.db")
+    parser.add_argument('--older-than-days', type=int, default=90)
+    parser.add_argument('--platforms', nargs='+', default=['telegram', 'instagram', 'x'])
+    parser.add_argument('--include-unfinished', action='store_true',
+                        help="Also archive articles that were never posted everywhere")
+    parser.add_argument('--vacuum-pages', type=int, help="Free at most N pages (default: all)")
+    args = parser.parse_args()
+
+    archive = ArticleArchive(args.archive)
+    try:
+        if args.command == 'show':
+            if not args.url:
+                parser.error("show needs a URL")
+            print(json.dumps(archive.get(args.url), indent=2, ensure_ascii=False))
+            return
+        db = open_database(args.db)
+        try:
+            result = run_retention(db, archive, args.older_than_days, args.platforms,
+                                   include_unfinished=args.include_unfinished, vacuum_pages=args.vacuum_pages)
+        finally:
+            db.close()
+        print(json.dumps(result, indent=2))
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,165 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
 from datetime import datetime
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from driver_pool import WebDriverPool
+from sources import ArticleSource, host_of
+from rate_control import AdaptiveRateController, THROTTLE_STATUSES
+from email.utils import parsedate_to_datetime
+import asyncio
+import hashlib
+import html as html_lib
+import json
+import os
+import requests
+import threading
 import time
+import weakref
+
+class SnapshotMissingError(requests.RequestException):
+    """Raised in replay mode when a page was never stored"""
+
+
+_chromedriver_lock = threading.Lock()
+_chromedriver_path = None
+
+
+def resolve_chromedriver_path(cache_file="config/chromedriver_path.txt", refresh=False):
+    """Locate chromedriver once and cache it, instead of asking webdriver-manager on every start"""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if not refresh:
+            if _chromedriver_path and os.path.exists(_chromedriver_path):
+                return _chromedriver_path
+            if os.path.exists(cache_file):
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    cached_path = f.read().strip()
+                if cached_path and os.path.exists(cached_path):
+                    _chromedriver_path = cached_path
+                    return _chromedriver_path
+
+        _chromedriver_path = ChromeDriverManager().install()
+        try:
+            os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                f.write(_chromedriver_path)
+        except OSError as e:
+            print(f"Could not cache chromedriver path: {e}")
+        return _chromedriver_path
+
+
+class TechCrunchScraper(ArticleSource):
+    name = 'techcrunch'
+    # Pacing is done per request by the adaptive rate controller rather than a fixed delay
+    politeness_delay = 0.0
+
+    # Articles shorter than this are assumed to be rendered client-side and are retried in Chrome
+    MIN_STATIC_CONTENT_LENGTH = 200
+    INGESTION_MODES = ('selenium', 'api')
+
+    # Blocked through Chrome DevTools; attributes like <img src> are still readable
+    BLOCKED_URL_PATTERNS = [
+        '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+        '*.woff', '*.woff2', '*.ttf', '*.otf', '*.mp4', '*.webm',
+        '*doubleclick.net*', '*googlesyndication.com*', '*googleadservices.com*',
+        '*google-analytics.com*', '*googletagmanager.com*', '*amazon-adsystem.com*',
+        '*adnxs.com*', '*scorecardresearch.com*', '*chartbeat.com*', '*parsely.com*',
+    ]
+
+    # Collects every field extract_article_data_v2 reads in one WebDriver round trip
+    EXTRACT_ARTICLE_SCRIPT = """
+        const first = selector => document.querySelector(selector);
+        const text = element => element ? element.innerText.trim() : null;
+        const title = first('.wp-block-post-title');
+        if (!title) {
+            return null;
+        }
+        const date = first('.wp-block-post-date > time');
+        const image = first('.wp-block-post-featured-image img');
+        return {
+            title: text(title),
+            post_datetime: date ? date.getAttribute('datetime') : null,
+            image_url: image ? image.src : null,
+            author: text(first('.post-authors-list__author')),
+            paragraphs: Array.from(document.querySelectorAll('.entry-content p'), text),
+            tags: Array.from(document.querySelectorAll('.tc23-post-relevant-terms__terms a'), text)
+        };
+    """
+
+    def __init__(self, base_url="https://techcrunch.com", ingestion_mode="selenium", pool_size=3,
+                 block_resources=True, cookie_file="config/techcrunch_cookies.json",
+                 profile_dir="config/chrome_profile", driver_cache_file="config/chromedriver_path.txt",
+                 snapshot_store=None, replay=False, incremental=False, rate_controller=None):
+        if ingestion_mode not in self.INGESTION_MODES:
+            raise ValueError(f"Unknown ingestion mode: {ingestion_mode}")
+        if replay and snapshot_store is None:
+            raise ValueError("Replay mode needs a snapshot store")
+        self.base_url = base_url.rstrip('/')
+        self.ingestion_mode = ingestion_mode
+        self._pool = None
+        self.pool_size = pool_size
+        self.rate_controller = rate_controller or AdaptiveRateController()
+        self.max_http_retries = 3
+        # Upper bound for the crawl scheduler; the rate controller adapts below it
+        self.max_concurrency = max(pool_size, int(self.rate_controller.max_concurrency))
+        self.incremental = incremental
+        self.session = self.setup_session()
+        self.request_timeout = 15
+        self.block_resources = block_resources
+
+        # Explicit waits for required elements; optional ones are probed without waiting
+        self.element_timeout = 5
+        self.consent_timeout = 2
+        self.cookie_file = cookie_file
+        self._consent_handled = weakref.WeakSet()
+
+        # Each running Chrome needs its own user-data-dir, so profiles are handed out as numbered slots
+        self.profile_dir = profile_dir
+        self.driver_cache_file = driver_cache_file
+        self._profile_lock = threading.Lock()
+        self._profile_slots = {}
+        self._starting_profiles = set()
+        self.driver_startup_seconds = []
+
+        # Fetched pages are kept in the snapshot store; in replay mode they are served from it instead
+        self.snapshot_store = snapshot_store
+        self.replay = replay
+
+        # Listing fingerprint from the last incremental discovery, saved once its articles are stored
+        self.fingerprint_key = f"listing_fingerprint:{self.base_url}"
+        self._pending_fingerprint = None
+
+        # Articles that arrived complete from the REST API, keyed by URL
+        self.prefetched_articles = {}
+
+        # Number of articles served by each extraction path
+        self.extraction_stats = {'api': 0, 'static': 0, 'browser': 0, 'failed': 0}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        # Browser fallbacks share a bounded set of Chrome instances, started on demand
+        if self._pool is None:
+            self._pool = WebDriverPool(self.setup_driver, size=self.pool_size, quit_driver=self.quit_driver)
+        return self._pool
+
+    def setup_session(self):
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': (
+                'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                '(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36'
+            ),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.9',
+        })
+        return session
 
-class TechCrunchScraper:
-    def __init__(self):
-        self.driver = self.setup_driver()
-        
     def setup_driver(self):
         chrome_options = Options()
         chrome_options.add_argument('--ignore-certificate-errors')
@@ -19,67 +171,289 @@ class TechCrunchScraper:
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument('--disable-gpu')
         chrome_options.add_argument('--window-size=1920,1080')
-        
+
+        # Reuse a persistent profile so the HTTP cache and consent cookies survive between runs
+        profile_slot = self._claim_profile_slot()
+        if profile_slot is not None:
+            chrome_options.add_argument(f'--user-data-dir={self._profile_path(profile_slot)}')
+
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+                start = time.perf_counter()
+                # A cached driver may no longer match an updated Chrome, so re-resolve on retries
+                driver_path = resolve_chromedriver_path(self.driver_cache_file, refresh=attempt > 0)
+                driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+                # Missing elements must fail fast; required ones use explicit waits instead
+                driver.implicitly_wait(0)
+                if self.block_resources:
+                    self.block_heavy_resources(driver)
+                # Saved consent goes in before the first page load, so no page shows the banner
+                if self.restore_consent_cookies(driver):
+                    self._consent_handled.add(driver)
+
+                elapsed = time.perf_counter() - start
+                self.driver_startup_seconds.append(elapsed)
+                print(f"Chrome driver started in {elapsed:.2f}s")
+                if profile_slot is not None:
+                    with self._profile_lock:
+                        self._profile_slots[driver] = profile_slot
+                        self._starting_profiles.discard(profile_slot)
                 return driver
             except Exception as e:
                 if attempt == max_retries - 1:
+                    self._release_profile_slot(profile_slot)
                     raise
                 print(f"Failed to initialize driver, attempt {attempt + 1}/{max_retries}")
                 time.sleep(2)
 
+    def _profile_path(self, slot):
+        return os.path.abspath(os.path.join(self.profile_dir, f"worker-{slot}"))
+
+    def _claim_profile_slot(self):
+        if not self.profile_dir:
+            return None
+        with self._profile_lock:
+            in_use = set(self._profile_slots.values()) | self._starting_profiles
+            slot = 0
+            while slot in in_use:
+                slot += 1
+            self._starting_profiles.add(slot)
+        return slot
+
+    def _release_profile_slot(self, slot):
+        with self._profile_lock:
+            self._starting_profiles.discard(slot)
+
+    def quit_driver(self, driver):
+        """Quit a Chrome instance and free its profile directory for the next one"""
+        try:
+            driver.quit()
+        finally:
+            with self._profile_lock:
+                self._profile_slots.pop(driver, None)
+
+    def block_heavy_resources(self, driver):
+        """Stop Chrome from downloading images, fonts and ad/analytics scripts"""
+        try:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.BLOCKED_URL_PATTERNS})
+        except Exception as e:
+            print(f"Could not enable request blocking: {e}")
+
+    def wait_for_element(self, driver, by, selector, timeout=None):
+        """Wait briefly for an element the page can't be parsed without"""
+        return WebDriverWait(driver, timeout or self.element_timeout).until(
+            EC.presence_of_element_located((by, selector))
+        )
+
+    def find_optional_element(self, driver, by, selector):
+        """Return the first matching element or None without waiting"""
+        elements = driver.find_elements(by, selector)
+        return elements[0] if elements else None
+
+    def hosts(self):
+        return [host_of(self.base_url)]
+
+    def discover_urls(self, limit=10, db=None):
+        """ArticleSource entry point: incremental discovery when enabled, otherwise the latest `limit` URLs"""
+        if self.incremental and db is not None:
+            return self.discover_new_articles(db)
+        return self.scrape_latest(limit=limit)
+
+    def discovery_complete(self, db):
+        self.save_listing_fingerprint(db)
+
+    def get_stats(self):
+        stats = self.get_extraction_stats()
+        stats['hosts'] = self.rate_controller.get_metrics()
+        return stats
+
+    def scrape_latest(self, limit=10):
+        """Return the latest article URLs using the configured ingestion mode"""
+        if self.ingestion_mode == 'api':
+            articles = self.scrape_articles_api(limit=limit)
+            # Only this run's listing is kept; articles already stored are never extracted, so never popped
+            self.prefetched_articles = {article['url']: article for article in articles}
+            return [article['url'] for article in articles]
+        return self.scrape_articles(limit=limit)
+
     def scrape_articles(self, limit=20):
-        # Open TechCrunch latest page
-        self.driver.get("https://techcrunch.com/latest")
-        self.driver.implicitly_wait(10)
+        """Latest article URLs from the first listing page, over HTTP with the Chrome pool as fallback"""
+        return self.fetch_listing_urls(1)[:limit]
+
+    def listing_url(self, page):
+        if page == 1:
+            return f"{self.base_url}/latest"
+        return f"{self.base_url}/latest/page/{page}/"
 
-        # Accept cookie popup
-        self.accept_cookie_popup()
+    def fetch_listing_urls(self, page):
+        """Return the article URLs on one listing page, newest first, over HTTP when possible"""
+        url = self.listing_url(page)
+        try:
+            soup = BeautifulSoup(self.fetch_html(url), "html.parser")
+            links = [urljoin(url, a["href"]) for a in soup.select("a.loop-card__title-link[href]")]
+            if links:
+                return list(dict.fromkeys(links))
+        except requests.RequestException as e:
+            print(f"Static fetch failed for {url}: {e}")
 
-        # Extract article URLs (limit to 20)
-        articles = self.driver.find_elements(By.CLASS_NAME, 'loop-card__title-link')
-        article_urls = [article.get_attribute('href') for article in articles[:limit]]
-        return article_urls
+        if self.replay:
+            return []
 
-    def accept_cookie_popup(self):
-        # Old popup (Didomi)
+        print(f"Static listing parse found no links on {url}, falling back to browser")
+        with self.pool.driver() as driver:
+            driver.get(url)
+            self.accept_cookie_popup(driver)
+            try:
+                self.wait_for_element(driver, By.CLASS_NAME, 'loop-card__title-link')
+            except TimeoutException:
+                return []
+            links = driver.execute_script(
+                "return Array.from(document.querySelectorAll('a.loop-card__title-link'), a => a.href);"
+            )
+        return list(dict.fromkeys(links))
+
+    def listing_fingerprint(self, urls):
+        return hashlib.sha256("\n".join(urls).encode('utf-8')).hexdigest()
+
+    def discover_new_articles(self, db, max_pages=5, fingerprint_size=10):
+        """
+        Walk listing pages newest-first and return only URLs that are not in the database yet.
+        Stops at the first already-ingested article, and returns nothing at all when the top
+        of the listing is unchanged since the last run. Call save_listing_fingerprint once
+        the returned articles have been stored.
+        """
+        self._pending_fingerprint = None
+        new_urls = []
+        for page in range(1, max_pages + 1):
+            page_urls = self.fetch_listing_urls(page)
+            if not page_urls:
+                break
+
+            if page == 1:
+                fingerprint = self.listing_fingerprint(page_urls[:fingerprint_size])
+                if db.get_crawl_state(self.fingerprint_key) == fingerprint:
+                    print("Listing unchanged since last run, nothing new to scrape")
+                    return []
+                self._pending_fingerprint = fingerprint
+
+            existing = db.get_existing_urls(page_urls)
+            reached_known = False
+            for url in page_urls:
+                if url in existing:
+                    reached_known = True
+                    break
+                if url not in new_urls:
+                    new_urls.append(url)
+
+            if reached_known:
+                break
+
+        print(f"Discovered {len(new_urls)} new articles")
+        return new_urls
+
+    def save_listing_fingerprint(self, db):
+        """Remember the listing seen by the last discover_new_articles call"""
+        if self._pending_fingerprint:
+            db.set_crawl_state(self.fingerprint_key, self._pending_fingerprint)
+            self._pending_fingerprint = None
+
+    def accept_cookie_popup(self, driver):
+        """Handle the consent popup once per browser; browsers started with saved consent skip it"""
+        if driver in self._consent_handled:
+            return
+        self._consent_handled.add(driver)
+
+        # The banner is injected by script, so give it a moment to appear on the first page only
         try:
-            accept_button = self.driver.find_element(By.ID, "didomi-notice-agree-button")
-            accept_button.click()
-            print("Cookie consent accepted (Didomi).")
+            WebDriverWait(driver, self.consent_timeout).until(EC.any_of(
+                EC.presence_of_element_located((By.ID, "didomi-notice-agree-button")),
+                EC.presence_of_element_located((By.CSS_SELECTOR, ".fc-button.fc-cta-consent"))
+            ))
+        except TimeoutException:
+            print("Cookie popup not found or already accepted.")
             return
-        except:
-            pass  # Not found, try new popup
+
+        # Old popup (Didomi)
+        try:
+            accept_button = self.find_optional_element(driver, By.ID, "didomi-notice-agree-button")
+            if accept_button:
+                accept_button.click()
+                print("Cookie consent accepted (Didomi).")
+                self.save_consent_cookies(driver)
+                return
+        except Exception as e:
+            print(f"Error handling Didomi consent popup: {e}")
 
         # New popup (OneTrust/FC)
         try:
             # Try to find the new consent button by class and text
-            buttons = self.driver.find_elements(By.CSS_SELECTOR, ".fc-button.fc-cta-consent")
+            buttons = driver.find_elements(By.CSS_SELECTOR, ".fc-button.fc-cta-consent")
             for btn in buttons:
                 if "Consent" in btn.text:
                     btn.click()
                     print("Cookie consent accepted (FC).")
+                    self.save_consent_cookies(driver)
                     return
         except Exception as e:
             print(f"Error handling new consent popup: {e}")
 
         print("Cookie popup not found or already accepted.")
 
-    def extract_article_data(self, url):
-        self.driver.get(url)
-        self.driver.implicitly_wait(10)
+    def save_consent_cookies(self, driver):
+        try:
+            with open(self.cookie_file, 'w', encoding='utf-8') as f:
+                json.dump(driver.get_cookies(), f)
+        except Exception as e:
+            print(f"Could not save consent cookies: {e}")
+
+    def restore_consent_cookies(self, driver):
+        """
+        Load the saved, unexpired consent cookies into a new browser. DevTools sets them
+        without the browser having opened the site first, which add_cookie requires.
+        """
+        if not os.path.exists(self.cookie_file):
+            return False
+        try:
+            with open(self.cookie_file, 'r', encoding='utf-8') as f:
+                cookies = json.load(f)
+            now = time.time()
+            # Expired consent is dropped, so the banner is shown and accepted again
+            cookies = [cookie for cookie in cookies if cookie.get('expiry', now + 1) > now]
+            if not cookies:
+                return False
+            driver.execute_cdp_cmd('Network.setCookies', {'cookies': [self._cdp_cookie(c) for c in cookies]})
+            print("Cookie consent restored from saved cookies.")
+            return True
+        except Exception as e:
+            print(f"Could not restore consent cookies: {e}")
+            return False
+
+    def _cdp_cookie(self, cookie):
+        """Selenium cookie dict -> DevTools CookieParam, keeping its expiry"""
+        params = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')
+                  if key in cookie}
+        if 'expiry' in cookie:
+            params['expires'] = cookie['expiry']
+        if 'domain' not in params:
+            params['url'] = self.base_url
+        return params
+
+    def extract_article_data(self, url, driver=None):
+        if driver is None:
+            with self.pool.driver() as driver:
+                return self.extract_article_data(url, driver=driver)
+        driver.get(url)
 
         # Accept cookie on article page
-        self.accept_cookie_popup()
+        self.accept_cookie_popup(driver)
 
         try:
-            title_element = self.driver.find_element(By.CLASS_NAME, 'wp-block-post-title')
+            title_element = self.wait_for_element(driver, By.CLASS_NAME, 'wp-block-post-title')
             title = title_element.text
 
-            content_elements = self.driver.find_elements(By.CSS_SELECTOR, '.entry-content p')
+            content_elements = driver.find_elements(By.CSS_SELECTOR, '.entry-content p')
             full_article_content = " ".join([element.text for element in content_elements])
 
             # Print the extracted data
@@ -87,18 +461,12 @@ class TechCrunchScraper:
             print(f"Content length: {len(full_article_content)} characters")
 
             # Extract image URL
-            try:
-                image_element = self.driver.find_element(By.CSS_SELECTOR, '.wp-block-post-featured-image img')
-                image_url = image_element.get_attribute('src')
-            except:
-                image_url = None
+            image_element = self.find_optional_element(driver, By.CSS_SELECTOR, '.wp-block-post-featured-image img')
+            image_url = image_element.get_attribute('src') if image_element else None
 
             # Get post date from <time>
-            try:
-                date_element = self.driver.find_element(By.TAG_NAME, 'time')
-                post_datetime = date_element.get_attribute('datetime')
-            except:
-                post_datetime = None
+            date_element = self.find_optional_element(driver, By.TAG_NAME, 'time')
+            post_datetime = date_element.get_attribute('datetime') if date_element else None
 
             return {
                 "title": title,
@@ -112,50 +480,40 @@ class TechCrunchScraper:
             print(f"Error scraping {url}: {e}")
             return None
 
-    def extract_article_data_v2(self, url):
+    def extract_article_data_v2(self, url, driver=None):
         """Extract article data using updated TechCrunch selectors"""
-        self.driver.get(url)
-        self.driver.implicitly_wait(10)
+        if driver is None:
+            with self.pool.driver() as driver:
+                return self.extract_article_data_v2(url, driver=driver)
+        driver.get(url)
         
         # Accept cookie on article page
-        self.accept_cookie_popup()
+        self.accept_cookie_popup(driver)
         
         try:
             # 1. Title
-            title_element = self.driver.find_element(By.CSS_SELECTOR, ".wp-block-post-title")
+            title_element = self.wait_for_element(driver, By.CSS_SELECTOR, ".wp-block-post-title")
             title = title_element.text
             
             # 2. Posted Date
-            try:
-                date_element = self.driver.find_element(By.CSS_SELECTOR, ".wp-block-post-date > time")
-                post_datetime = date_element.get_attribute("datetime")
-            except:
-                post_datetime = None
+            date_element = self.find_optional_element(driver, By.CSS_SELECTOR, ".wp-block-post-date > time")
+            post_datetime = date_element.get_attribute("datetime") if date_element else None
             
             # 3. Featured Image
-            try:
-                image_element = self.driver.find_element(By.CSS_SELECTOR, ".wp-block-post-featured-image img")
-                image_url = image_element.get_attribute("src")
-            except:
-                image_url = None
+            image_element = self.find_optional_element(driver, By.CSS_SELECTOR, ".wp-block-post-featured-image img")
+            image_url = image_element.get_attribute("src") if image_element else None
             
             # 4. Author
-            try:
-                author_element = self.driver.find_element(By.CSS_SELECTOR, ".post-authors-list__author")
-                author = author_element.text
-            except:
-                author = None
+            author_element = self.find_optional_element(driver, By.CSS_SELECTOR, ".post-authors-list__author")
+            author = author_element.text if author_element else None
             
             # 5. Content (all paragraphs)
-            content_elements = self.driver.find_elements(By.CSS_SELECTOR, ".entry-content p")
+            content_elements = driver.find_elements(By.CSS_SELECTOR, ".entry-content p")
             full_article_content = " ".join([element.text for element in content_elements])
             
             # 6. Tags
-            try:
-                tag_elements = self.driver.find_elements(By.CSS_SELECTOR, ".tc23-post-relevant-terms__terms a")
-                tags = [tag.text for tag in tag_elements]
-            except:
-                tags = []
+            tag_elements = driver.find_elements(By.CSS_SELECTOR, ".tc23-post-relevant-terms__terms a")
+            tags = [tag.text for tag in tag_elements]
 
             print(f"Scraped article: {title}")
             print(f"Content length: {len(full_article_content)} characters")
@@ -175,7 +533,282 @@ class TechCrunchScraper:
             print(f"Error scraping {url}: {e}")
             return None
 
+    def extract_article_data_script(self, url, driver=None):
+        """Extract article data with one injected script instead of a WebDriver call per element"""
+        if driver is None:
+            with self.pool.driver() as driver:
+                return self.extract_article_data_script(url, driver=driver)
+        driver.get(url)
+
+        # Accept cookie on article page
+        self.accept_cookie_popup(driver)
+
+        try:
+            payload = driver.execute_script(self.EXTRACT_ARTICLE_SCRIPT)
+            if payload is None:
+                # Title not rendered yet, wait for it and read the page again
+                self.wait_for_element(driver, By.CSS_SELECTOR, ".wp-block-post-title")
+                payload = driver.execute_script(self.EXTRACT_ARTICLE_SCRIPT)
+
+            full_article_content = " ".join(payload['paragraphs'])
+
+            print(f"Scraped article: {payload['title']}")
+            print(f"Content length: {len(full_article_content)} characters")
+
+            return {
+                "title": payload['title'],
+                "url": url,
+                "content": full_article_content,
+                "post_datetime": payload['post_datetime'],
+                "image_url": payload['image_url'],
+                "author": payload['author'],
+                "tags": payload['tags'],
+                "crawl_datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            }
+
+        except Exception as e:
+            print(f"Error scraping {url}: {e}")
+            return None
+
+    def scrape_articles_api(self, limit=10):
+        """Fetch the latest posts with full content through the WordPress REST API"""
+        per_page = min(limit, 100)  # WordPress caps per_page at 100
+        endpoint = f"{self.base_url}/wp-json/wp/v2/posts"
+        articles = []
+        page = 1
+
+        while len(articles) < limit:
+            response = self.http_get(endpoint, params={
+                'per_page': per_page,
+                'page': page,
+                '_embed': 'author,wp:featuredmedia,wp:term',
+            })
+            posts = response.json()
+
+            articles.extend(self.parse_api_post(post) for post in posts)
+            print(f"Fetched {len(posts)} posts from {endpoint} (page {page})")
+
+            total_pages = int(response.headers.get('X-WP-TotalPages', page))
+            if len(posts) < per_page or page >= total_pages:
+                break
+            page += 1
+
+        return articles[:limit]
+
+    def parse_api_post(self, post):
+        """Convert a REST API post into the same dict as extract_article_data_v2"""
+        embedded = post.get('_embedded', {})
+
+        content_soup = BeautifulSoup(post['content']['rendered'], "html.parser")
+        full_article_content = " ".join([self._element_text(element) for element in content_soup.find_all('p')])
+
+        # The rendered page exposes an ISO timestamp with offset; date_gmt has none, so add it
+        post_datetime = f"{post['date_gmt']}+00:00" if post.get('date_gmt') else None
+
+        image_url = None
+        media = embedded.get('wp:featuredmedia') or []
+        if media and media[0].get('source_url'):
+            image_url = media[0]['source_url']
+
+        authors = embedded.get('author') or []
+        author = authors[0].get('name') if authors else None
+
+        tags = [
+            html_lib.unescape(term['name'])
+            for terms in embedded.get('wp:term', [])
+            for term in terms
+            if term.get('taxonomy') == 'post_tag'
+        ]
+
+        return {
+            "title": self._element_text(BeautifulSoup(post['title']['rendered'], "html.parser")),
+            "url": post['link'],
+            "content": full_article_content,
+            "post_datetime": post_datetime,
+            "image_url": image_url,
+            "author": author,
+            "tags": tags,
+            "crawl_datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def fetch_html(self, url):
+        if self.replay:
+            html = self.snapshot_store.get(url)
+            if html is None:
+                raise SnapshotMissingError(f"No snapshot stored for {url}")
+            return html
+
+        response = self.http_get(url)
+        self.save_snapshot(url, response.text)
+        return response.text
+
+    def http_get(self, url, **kwargs):
+        """GET through the per-host rate controller, retrying throttled responses and dropped connections"""
+        host = host_of(url)
+        for attempt in range(1, self.max_http_retries + 1):
+            try:
+                with self.rate_controller.request(host) as outcome:
+                    response = self.session.get(url, timeout=self.request_timeout, **kwargs)
+                    outcome.status = response.status_code
+                    outcome.retry_after = self._retry_after(response)
+            except requests.ConnectionError:
+                if attempt == self.max_http_retries:
+                    raise
+                print(f"Connection error from {host}, retrying ({attempt}/{self.max_http_retries})")
+                continue
+
+            if response.status_code in THROTTLE_STATUSES and attempt < self.max_http_retries:
+                # The controller has already pushed the next request for this host past the backoff
+                print(f"Throttled by {host} ({response.status_code}), retrying ({attempt}/{self.max_http_retries})")
+                continue
+            response.raise_for_status()
+            return response
+
+    def _retry_after(self, response):
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, (retry_at - datetime.now(retry_at.tzinfo)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+
+    def save_snapshot(self, url, html):
+        if self.snapshot_store is None or self.replay:
+            return
+        try:
+            self.snapshot_store.put(url, html)
+        except Exception as e:
+            print(f"Could not store snapshot for {url}: {e}")
+
+    def extract_article_data_static(self, url):
+        """Extract article data from the raw HTML without starting a browser"""
+        try:
+            html = self.fetch_html(url)
+        except requests.RequestException as e:
+            print(f"Static fetch failed for {url}: {e}")
+            return None
+        return self.parse_article_html(html, url)
+
+    def parse_article_html(self, html, url):
+        """Parse an article page with the same selectors as extract_article_data_v2"""
+        soup = BeautifulSoup(html, "html.parser")
+
+        # 1. Title
+        title_element = soup.select_one(".wp-block-post-title")
+        if title_element is None:
+            return None
+        title = self._element_text(title_element)
+
+        # 2. Posted Date
+        date_element = soup.select_one(".wp-block-post-date > time") or soup.find("time")
+        post_datetime = date_element.get("datetime") if date_element else None
+
+        # 3. Featured Image
+        image_element = soup.select_one(".wp-block-post-featured-image img")
+        image_url = None
+        if image_element is not None and image_element.get("src"):
+            image_url = urljoin(url, image_element["src"])
+
+        # 4. Author
+        author_element = soup.select_one(".post-authors-list__author")
+        author = self._element_text(author_element) if author_element else None
+
+        # 5. Content (all paragraphs)
+        content_elements = soup.select(".entry-content p")
+        full_article_content = " ".join([self._element_text(element) for element in content_elements])
+
+        # 6. Tags
+        tags = [self._element_text(tag) for tag in soup.select(".tc23-post-relevant-terms__terms a")]
+
+        return {
+            "title": title,
+            "url": url,
+            "content": full_article_content,
+            "post_datetime": post_datetime,
+            "image_url": image_url,
+            "author": author,
+            "tags": tags,
+            "crawl_datetime": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+    def _element_text(self, element):
+        # Collapse whitespace the same way WebElement.text does for inline content
+        return " ".join(element.get_text().split())
+
+    def is_valid_article(self, article_data):
+        """Check that a parsed article is complete enough to skip the browser"""
+        if not article_data:
+            return False
+        if not article_data.get("title"):
+            return False
+        return len(article_data.get("content") or "") >= self.MIN_STATIC_CONTENT_LENGTH
+
+    def extract_article(self, url):
+        """Extract article data over plain HTTP, falling back to Chrome when the static parse fails validation"""
+        article_data = self.prefetched_articles.pop(url, None)
+        if article_data:
+            self._count('api')
+            return article_data
+
+        article_data = self.extract_article_data_static(url)
+        if self.is_valid_article(article_data):
+            self._count('static')
+            print(f"Scraped article: {article_data['title']}")
+            print(f"Content length: {len(article_data['content'])} characters")
+            return article_data
+
+        if self.replay:
+            print(f"Stored snapshot of {url} failed validation")
+            self._count('failed')
+            return None
+
+        print(f"Static extraction incomplete for {url}, falling back to browser")
+        # Page loads share the host's slots, but their latency isn't comparable to plain HTTP fetches
+        with self.pool.driver() as driver, self.rate_controller.request(host_of(url), track_latency=False):
+            article_data = self.extract_article_data_script(url, driver=driver)
+            if article_data and self.snapshot_store is not None:
+                self.save_snapshot(url, driver.page_source)
+        self._count('browser' if article_data else 'failed')
+        return article_data
+
+    async def extract_articles_async(self, urls, max_concurrency=None):
+        """Extract many articles concurrently; browser fallbacks share the Chrome pool"""
+        semaphore = asyncio.Semaphore(max_concurrency or self.pool_size)
+        loop = asyncio.get_running_loop()
+
+        async def extract(url):
+            async with semaphore:
+                try:
+                    return await loop.run_in_executor(None, self.extract_article, url)
+                except Exception as e:
+                    print(f"Error scraping {url}: {e}")
+                    self._count('failed')
+                    return None
+
+        return await asyncio.gather(*(extract(url) for url in urls))
+
+    def _count(self, path):
+        with self._stats_lock:
+            self.extraction_stats[path] += 1
+
+    def get_extraction_stats(self):
+        """Return per-path counters and the fraction of pages that still needed the browser"""
+        stats = dict(self.extraction_stats)
+        total = sum(self.extraction_stats.values())
+        stats['total'] = total
+        stats['browser_fraction'] = self.extraction_stats['browser'] / total if total else 0.0
+        return stats
+
     def quit(self):
-        self.driver.quit()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
+        self.session.close()
 
 
@@ -0,0 +1,229 @@
+# seen_filter.py
+"""
+Persistent, memory-mapped Bloom filter of article URLs already stored.
+
+A negative answer is certain, so discovery can drop known-new URLs without touching
+SQLite; a positive answer is confirmed against the database. The filter file records the
+highest article id it has seen, so opening it next to a database catches up on anything
+inserted while it was closed (or rebuilds it if the file is new).
+
+Usage:
+    python seen_filter.py stats [--path articles.seen]
+    python seen_filter.py rebuild [--path articles.seen] [--db articles.db]
+    python seen_filter.py benchmark [--urls 10000000]
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import numpy as np
+import psutil
+from storage import url_digest
+
+MAGIC = b"SEENBF01"
+# magic, bit count, hash count, padding, items added, highest synced article id
+HEADER = struct.Struct("<8sQIIQQ")
+HEADER_SIZE = 64
+
+
+class SeenUrlFilter:
+    def __init__(self, path="articles.seen", capacity=10_000_000, error_rate=0.001):
+        self.path = path
+        self._lock = threading.Lock()
+        self.created = not os.path.exists(path)
+
+        if self.created:
+            num_bits = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2 / 8)) * 8
+            num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, num_bits, num_hashes, 0, 0, 0).ljust(HEADER_SIZE, b"\0"))
+                f.truncate(HEADER_SIZE + num_bits // 8)
+
+        self._file = open(path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        magic, self.num_bits, self.num_hashes, _, self.count, self.synced_id = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            self._file.close()
+            raise ValueError(f"{path} is not a seen-URL filter")
+        self._bits = np.frombuffer(self._mmap, dtype=np.uint8, count=self.num_bits // 8, offset=HEADER_SIZE)
+
+    def _positions(self, urls):
+        """k bit positions per URL by double hashing its 128-bit url_digest; shape (len(urls), k)"""
+        return self._digest_positions(b"".join(url_digest(url) for url in urls))
+
+    def _digest_positions(self, digests):
+        halves = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+        h1, h2 = halves[:, 0:1], halves[:, 1:2] | np.uint64(1)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1 + steps * h2) % np.uint64(self.num_bits)
+
+    def contains_many(self, urls):
+        """Boolean array: False means the URL was certainly never added"""
+        urls = list(urls)
+        if not urls:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(urls)
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        return ((self._bits[positions >> np.uint64(3)] & masks) != 0).all(axis=1)
+
+    def __contains__(self, url):
+        return bool(self.contains_many([url])[0])
+
+    def add_many(self, urls, synced_id=None):
+        """Add URLs; synced_id records the highest article id now covered"""
+        self.add_digests([url_digest(url) for url in urls], synced_id)
+
+    def add_digests(self, digests, synced_id=None):
+        """Add URLs known only by url_digest (e.g. archived articles)"""
+        digests = list(digests)
+        with self._lock:
+            if digests:
+                positions = self._digest_positions(b"".join(digests)).ravel()
+                masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+                # .at applies every OR even when several positions share a byte
+                np.bitwise_or.at(self._bits, positions >> np.uint64(3), masks)
+                self.count += len(digests)
+            if synced_id is not None:
+                self.synced_id = max(self.synced_id, synced_id)
+            HEADER.pack_into(self._mmap, 0, MAGIC, self.num_bits, self.num_hashes, 0, self.count, self.synced_id)
+
+    def add(self, url):
+        self.add_many([url])
+
+    def add_inserted(self, rows):
+        """
+        Add articles this process just inserted, as (id, url) rows. synced_id only advances
+        through ids that follow on directly from it: a gap may be another writer's article
+        this filter has not read yet, and the next sync() picks it up.
+        """
+        rows = sorted(rows)
+        synced_id = self.synced_id
+        for article_id, _ in rows:
+            if article_id != synced_id + 1:
+                break
+            synced_id = article_id
+        self.add_many((url for _, url in rows), synced_id=synced_id)
+
+    def sync(self, db, batch_size=100_000):
+        """
+        Add every article the database stored since the filter last saw it, archived ones
+        included. Stepping synced_id past what it read is safe because backends commit
+        article ids in id order (see ArticleStorage.get_article_urls_after).
+        """
+        archived_after = self.synced_id
+        while True:
+            rows = db.get_archived_digests_after(archived_after, batch_size)
+            if not rows:
+                break
+            self.add_digests(digest for _, digest in rows)
+            archived_after = rows[-1][0]
+        while True:
+            rows = db.get_article_urls_after(self.synced_id, batch_size)
+            if not rows:
+                break
+            self.add_many((url for _, url in rows), synced_id=rows[-1][0])
+        self.add_digests([], synced_id=archived_after)
+        self.flush()
+
+    def estimated_error_rate(self):
+        return (1 - math.exp(-self.num_hashes * self.count / self.num_bits)) ** self.num_hashes
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'bits': self.num_bits,
+            'hashes': self.num_hashes,
+            'items': self.count,
+            'synced_article_id': self.synced_id,
+            'file_bytes': HEADER_SIZE + self.num_bits // 8,
+            'estimated_error_rate': self.estimated_error_rate(),
+        }
+
+    def flush(self):
+        self._mmap.flush()
+
+    def close(self):
+        if self._mmap.closed:
+            return
+        self.flush()
+        # numpy's view must go before the mapping can be closed
+        del self._bits
+        self._mmap.close()
+        self._file.close()
+
+
+def benchmark(num_urls, lookups=1_000_000, batch_size=100_000):
+    process = psutil.Process()
+    with tempfile.TemporaryDirectory() as directory:
+        rss_before = process.memory_info().rss
+        seen = SeenUrlFilter(os.path.join(directory, "bench.seen"), capacity=num_urls)
+
+        start = time.perf_counter()
+        for offset in range(0, num_urls, batch_size):
+            seen.add_many(f"https://techcrunch.com/2024/10/19/article-{i}/"
+                          for i in range(offset, min(offset + batch_size, num_urls)))
+        add_seconds = time.perf_counter() - start
+        # Taken before the lookup phase builds its URL lists, so it is the filter's own footprint
+        rss_increase = process.memory_info().rss - rss_before
+
+        present = [f"https://techcrunch.com/2024/10/19/article-{i}/" for i in range(0, num_urls, max(1, num_urls // lookups))]
+        absent = [f"https://techcrunch.com/2024/10/19/unseen-{i}/" for i in range(len(present))]
+        start = time.perf_counter()
+        found = sum(int(seen.contains_many(present[i:i + batch_size]).sum()) for i in range(0, len(present), batch_size))
+        false_positives = sum(int(seen.contains_many(absent[i:i + batch_size]).sum())
+                              for i in range(0, len(absent), batch_size))
+        lookup_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for url in absent[:10000]:
+            url in seen
+        single_seconds = time.perf_counter() - start
+
+        result = {
+            'urls': num_urls,
+            'file_mb': round(seen.stats()['file_bytes'] / 2 ** 20, 1),
+            'rss_increase_mb': round(rss_increase / 2 ** 20, 1),
+            'hashes': seen.num_hashes,
+            'adds_per_second': round(num_urls / add_seconds),
+            'batched_lookups_per_second': round((len(present) + len(absent)) / lookup_seconds),
+            'single_lookups_per_second': round(10000 / single_seconds),
+            'false_negatives': len(present) - found,
+            'false_positive_rate': false_positives / len(absent),
+            'estimated_error_rate': seen.estimated_error_rate(),
+        }
+        seen.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seen-URL Bloom filter tools")
+    parser.add_argument('command', choices=['stats', 'rebuild', 'benchmark'])
+    parser.add_argument('--path', default="articles.seen")
+    parser.add_argument('--db', default="articles.db")
+    parser.add_argument('--urls', type=int, default=10_000_000)
+    args = parser.parse_args()
+
+    if args.command == 'benchmark':
+        print(json.dumps(benchmark(args.urls), indent=2))
+        return
+
+    if args.command == 'rebuild' and os.path.exists(args.path):
+        os.remove(args.path)
+    seen = SeenUrlFilter(args.path)
+    if args.command == 'rebuild':
+        from database import ArticleDatabase
+        db = ArticleDatabase(args.db)
+        seen.sync(db)
+        db.close()
+    print(json.dumps(seen.stats(), indent=2))
+    seen.close()
+
+
+if __name__ == "__main__":
+    main()
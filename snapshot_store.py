@@ -0,0 +1,171 @@
+# snapshot_store.py
+"""
+Compressed, content-addressed store of fetched HTML pages.
+
+Pages are stored once per distinct body under objects/<sha256[:2]>/<sha256>.html.gz and
+indexed by URL and fetch time in index.db, so extraction can be re-run offline.
+
+Usage:
+    python snapshot_store.py stats [--root snapshots]
+    python snapshot_store.py reextract [--root snapshots] [--output articles.jsonl]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+class SnapshotStore:
+    def __init__(self, root="snapshots"):
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        # Scraper threads share the index, so serialize access to the connection
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self.conn.execute("""
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            fetched_at TEXT NOT NULL,
+            sha256 TEXT NOT NULL,
+            size INTEGER
+        )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_url ON snapshots (url, fetched_at)")
+        self.conn.commit()
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], f"{digest}.html.gz")
+
+    def put(self, url, html, fetched_at=None):
+        """Store a page body and record that url served it at fetched_at. Returns the content hash."""
+        data = html.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file first so a crash never leaves a truncated object behind
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        fetched_at = fetched_at or datetime.now().isoformat()
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO snapshots (url, fetched_at, sha256, size) VALUES (?, ?, ?, ?)",
+                (url, fetched_at, digest, len(data))
+            )
+            self.conn.commit()
+        return digest
+
+    def load(self, digest):
+        with gzip.open(self._object_path(digest), 'rb') as f:
+            return f.read().decode('utf-8')
+
+    def get(self, url, before=None):
+        """Return the latest stored HTML for url (optionally fetched no later than `before`), or None"""
+        query = "SELECT sha256 FROM snapshots WHERE url = ?"
+        params = [url]
+        if before:
+            query += " AND fetched_at <= ?"
+            params.append(before)
+        query += " ORDER BY fetched_at DESC LIMIT 1"
+
+        with self._lock:
+            row = self.conn.execute(query, params).fetchone()
+        return self.load(row[0]) if row else None
+
+    def iter_snapshots(self, latest_only=True):
+        """Yield (url, fetched_at, html) for every stored page, or only the newest per URL"""
+        if latest_only:
+            query = """
+            SELECT url, MAX(fetched_at), sha256 FROM snapshots GROUP BY url ORDER BY url
+            """
+        else:
+            query = "SELECT url, fetched_at, sha256 FROM snapshots ORDER BY url, fetched_at"
+        with self._lock:
+            rows = self.conn.execute(query).fetchall()
+        for url, fetched_at, digest in rows:
+            yield url, fetched_at, self.load(digest)
+
+    def stats(self):
+        with self._lock:
+            snapshots, urls, objects, raw_bytes = self.conn.execute("""
+                SELECT COUNT(*), COUNT(DISTINCT url), COUNT(DISTINCT sha256),
+                       COALESCE(SUM(size), 0)
+                FROM snapshots
+            """).fetchone()
+        stored_bytes = 0
+        for dirpath, _, filenames in os.walk(self.objects_dir):
+            stored_bytes += sum(os.path.getsize(os.path.join(dirpath, name)) for name in filenames)
+        return {
+            'snapshots': snapshots,
+            'urls': urls,
+            'objects': objects,
+            'raw_bytes': raw_bytes,
+            'stored_bytes': stored_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def reextract_snapshots(store, scraper):
+    """Run the static extractor over every stored page; returns (articles, failed_urls)"""
+    articles = []
+    failed = []
+    for url, fetched_at, html in store.iter_snapshots():
+        article = scraper.parse_article_html(html, url)
+        if scraper.is_valid_article(article):
+            # Use the fetch time so repeated runs over the same corpus give identical output
+            article['crawl_datetime'] = datetime.fromisoformat(fetched_at).strftime("%Y-%m-%d %H:%M:%S")
+            articles.append(article)
+        else:
+            failed.append(url)
+    return articles, failed
+
+
+def main():
+    from scraper import TechCrunchScraper
+
+    parser = argparse.ArgumentParser(description="Inspect and re-extract stored HTML snapshots")
+    parser.add_argument('command', choices=['stats', 'reextract'])
+    parser.add_argument('--root', default="snapshots", help="Snapshot store directory")
+    parser.add_argument('--output', help="Write re-extracted articles to this JSON Lines file")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.root)
+    try:
+        if args.command == 'stats':
+            print(json.dumps(store.stats(), indent=2))
+            return
+
+        scraper = TechCrunchScraper()
+        start = time.perf_counter()
+        articles, failed = reextract_snapshots(store, scraper)
+        elapsed = time.perf_counter() - start
+        scraper.quit()
+
+        print(f"Re-extracted {len(articles)} articles in {elapsed:.2f}s, {len(failed)} pages failed validation")
+        for url in failed:
+            print(f"Failed: {url}")
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                for article in articles:
+                    f.write(json.dumps(article, ensure_ascii=False) + "\n")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
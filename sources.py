@@ -0,0 +1,162 @@
+# sources.py
+"""
+Pluggable news sources and a scheduler that crawls them concurrently.
+
+A source discovers article URLs and extracts each one into the standard article dict
+(title, url, content, post_datetime, image_url, crawl_datetime, ...), so everything
+downstream of ArticleDatabase.insert_article stays unchanged. Sources are registered
+by name with the import path of their class and selected through SCRAPER_SOURCES.
+"""
+import asyncio
+import importlib
+import logging
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+import requests
+
+
+class ArticleSource:
+    """Interface every news source implements"""
+    name = None
+
+    # Per-source crawl budget, applied per host by CrawlScheduler
+    max_concurrency = 2
+    politeness_delay = 1.0
+
+    def hosts(self) -> List[str]:
+        """Hostnames whose article URLs this source can extract"""
+        raise NotImplementedError
+
+    def discover_urls(self, limit: int = 10, db=None) -> List[str]:
+        """Return article URLs to consider, newest first"""
+        raise NotImplementedError
+
+    def extract_article(self, url: str) -> Optional[dict]:
+        """Return the article dict for url, or None if it could not be extracted"""
+        raise NotImplementedError
+
+    def discovery_complete(self, db):
+        """Called once every discovered article has been stored"""
+        pass
+
+    def get_stats(self) -> dict:
+        return {}
+
+    def quit(self):
+        pass
+
+
+# name -> "module.ClassName", imported on first use so sources don't import each other
+SOURCE_REGISTRY = {
+    'techcrunch': 'scraper.TechCrunchScraper',
+}
+
+
+def register_source(name: str, class_path: str):
+    SOURCE_REGISTRY[name] = class_path
+
+
+def load_source_class(name: str):
+    if name not in SOURCE_REGISTRY:
+        raise ValueError(f"Unknown source: {name}")
+    module_name, class_name = SOURCE_REGISTRY[name].rsplit('.', 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def create_sources(names: Iterable[str], options: Optional[Dict[str, dict]] = None) -> List[ArticleSource]:
+    """Instantiate the named sources, passing each its own constructor options"""
+    options = options or {}
+    names = [name.strip() for name in names if name.strip()]
+    return [load_source_class(name)(**options.get(name, {})) for name in names]
+
+
+def host_of(url: str) -> str:
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+class CrawlScheduler:
+    """Crawls several sources at once with per-host concurrency and politeness limits"""
+    def __init__(self, sources: List[ArticleSource], max_retries: int = 3, retry_delay: float = 5):
+        self.sources = sources
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.logger = logging.getLogger(__name__)
+
+        self._host_sources = {}
+        for source in sources:
+            for host in source.hosts():
+                self._host_sources[host] = source
+
+        self._host_semaphores = {}
+        self._host_locks = {}
+        self._host_last_request = {}
+
+    def source_for(self, url: str) -> Optional[ArticleSource]:
+        return self._host_sources.get(host_of(url))
+
+    async def _discover_source(self, source: ArticleSource, limit: int, db) -> List[str]:
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                return await asyncio.to_thread(source.discover_urls, limit, db)
+            except (ConnectionError, requests.ConnectionError) as e:
+                if attempt == self.max_retries:
+                    self.logger.error(f"Discovery failed for {source.name}: {e}")
+                    return []
+                self.logger.warning(f"Connection error discovering {source.name}. Retrying... ({attempt}/{self.max_retries})")
+                await asyncio.sleep(self.retry_delay)
+            except Exception as e:
+                self.logger.error(f"Discovery failed for {source.name}: {e}")
+                return []
+
+    async def discover_all(self, limit_per_source: int = 10, db=None) -> List[str]:
+        """Discover URLs from every source concurrently; one failing source doesn't stop the others"""
+        results = await asyncio.gather(*(self._discover_source(source, limit_per_source, db)
+                                         for source in self.sources))
+        return list(dict.fromkeys(url for urls in results for url in urls))
+
+    async def _wait_for_host(self, host: str, source: ArticleSource):
+        # Space out request starts to the same host by the source's politeness delay
+        lock = self._host_locks.setdefault(host, asyncio.Lock())
+        async with lock:
+            last = self._host_last_request.get(host)
+            if last is not None:
+                wait = source.politeness_delay - (time.monotonic() - last)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            self._host_last_request[host] = time.monotonic()
+
+    async def extract(self, url: str) -> Optional[dict]:
+        source = self.source_for(url)
+        if source is None:
+            self.logger.warning(f"No source registered for {url}")
+            return None
+
+        host = host_of(url)
+        semaphore = self._host_semaphores.setdefault(host, asyncio.Semaphore(source.max_concurrency))
+        async with semaphore:
+            await self._wait_for_host(host, source)
+            try:
+                return await asyncio.to_thread(source.extract_article, url)
+            except Exception as e:
+                self.logger.error(f"Error extracting {url}: {e}")
+                return None
+
+    async def extract_all(self, urls: Iterable[str]) -> List[Optional[dict]]:
+        """Extract every URL through its source; results are in input order"""
+        return await asyncio.gather(*(self.extract(url) for url in urls))
+
+    def discovery_complete(self, db):
+        for source in self.sources:
+            source.discovery_complete(db)
+
+    def get_stats(self) -> dict:
+        return {source.name: source.get_stats() for source in self.sources}
+
+    def close(self):
+        for source in self.sources:
+            try:
+                source.quit()
+            except Exception as e:
+                self.logger.error(f"Error closing source {source.name}: {e}")
@@ -0,0 +1,329 @@
+# storage.py
+"""
+Storage interface shared by the article database backends.
+
+ArticleDatabase (database.py) keeps everything in one SQLite file; PostgresArticleDatabase
+(postgres_database.py) talks to a PostgreSQL server through a connection pool so several
+hosts can crawl and post against the same data. Both implement ArticleStorage with the
+same method names, return shapes and claim semantics. open_database() picks the backend
+from a DSN:
+
+    open_database("articles.db")                          # SQLite file
+    open_database("postgresql://user@host/articles")      # PostgreSQL
+"""
+import hashlib
+import importlib
+import zlib
+from datetime import datetime, timedelta
+
+# How long a claimed post stays reserved for its worker before others may take it over
+DEFAULT_LEASE_SECONDS = 3600
+
+
+def compress_text(text):
+    return zlib.compress(text.encode('utf-8'), 6) if text is not None else None
+
+
+def decompress_text(blob):
+    return zlib.decompress(blob).decode('utf-8') if blob is not None else None
+
+
+def url_digest(url):
+    """128-bit URL fingerprint; archived URLs are remembered by it and SeenUrlFilter hashes with it"""
+    return hashlib.blake2b(url.encode('utf-8'), digest_size=16).digest()
+
+
+class ArticleStorage:
+    """
+    Interface every storage backend implements. Timestamps are ISO strings; post states
+    per platform are 'pending', 'in_progress' (leased), 'posted', 'failed' or 'skipped'.
+    """
+    # Platforms every new article gets a pending platform_posts row for; any other
+    # platform name works too and gets its row on first use
+    PLATFORMS = ('telegram', 'instagram', 'x', 'youtube')
+
+    seen_filter = None
+
+    def transaction(self):
+        """Context manager grouping several calls into one commit; nested blocks join the outer one"""
+        raise NotImplementedError
+
+    def schema_version(self):
+        raise NotImplementedError
+
+    # Articles
+
+    def insert_article(self, article_data):
+        if 'post_datetime' not in article_data:
+            article_data['post_datetime'] = datetime.now().isoformat()
+        self.insert_articles([article_data])
+
+    def insert_articles(self, articles):
+        """Insert a batch of scraped articles; already stored URLs are ignored. Returns the number inserted."""
+        raise NotImplementedError
+
+    def article_exists(self, url):
+        raise NotImplementedError
+
+    def get_existing_urls(self, urls):
+        """Return the subset of urls already stored"""
+        raise NotImplementedError
+
+    def get_article_urls_after(self, article_id, limit):
+        """
+        [(id, url)] of articles with id > article_id in id order, for keeping a SeenUrlFilter in sync.
+        Backends must make article ids visible in id order (no id may commit after a higher one),
+        or a sync could step past an id that commits later.
+        """
+        raise NotImplementedError
+
+    def _max_article_id(self):
+        raise NotImplementedError
+
+    def _maybe_seen(self, urls):
+        """
+        The URLs that may already be stored; the rest are certainly new.
+        Articles written by other processes or hosts are pulled into the filter first, so it
+        never answers "new" for a stored URL.
+        """
+        if self.seen_filter is None:
+            return urls
+        max_id = self._max_article_id()
+        if max_id is not None and max_id > self.seen_filter.synced_id:
+            self.seen_filter.sync(self)
+        return [url for url, hit in zip(urls, self.seen_filter.contains_many(urls)) if hit]
+
+    def get_batch_status(self, urls, platforms=('telegram', 'instagram', 'x'), include_content=True):
+        """
+        Triage scraped URLs into 'new', 'posted', 'duplicates' and 'pending' {url: (article_data, status)}.
+        Skipped posts count as done in status, and archived articles as posted.
+        """
+        raise NotImplementedError
+
+    def retrieve_article(self, url, include_content=True):
+        raise NotImplementedError
+
+    def get_article_content(self, url):
+        raise NotImplementedError
+
+    def get_crawl_state(self, key):
+        raise NotImplementedError
+
+    def set_crawl_state(self, key, value):
+        raise NotImplementedError
+
+    # Translations and search
+
+    def store_translation(self, url, language, title, content):
+        raise NotImplementedError
+
+    def get_translation(self, url, language):
+        """Return {'title', 'content'} of a stored translation, or None"""
+        raise NotImplementedError
+
+    def search_articles(self, query, limit=20, raw=False):
+        """Ranked full-text search; dicts with url, title, post_datetime and score (lower is better)"""
+        raise NotImplementedError
+
+    def rebuild_search_index(self):
+        raise NotImplementedError
+
+    @staticmethod
+    def _join_translations(translations):
+        """All translations of an article as one (titles, contents) pair for the search index"""
+        if not translations:
+            return None, None
+        return ("\n".join(title or '' for title, _ in translations),
+                "\n".join(content or '' for _, content in translations))
+
+    # Near-duplicates
+
+    def store_article_signature(self, url, signature, buckets):
+        raise NotImplementedError
+
+    def find_signature_candidates(self, buckets, exclude_url=None):
+        raise NotImplementedError
+
+    def get_unsigned_articles(self):
+        raise NotImplementedError
+
+    def mark_duplicate(self, url, original_url):
+        raise NotImplementedError
+
+    # Posting status and sent messages
+
+    def _platform(self, platform):
+        platform = (platform or '').strip().lower()
+        if not platform:
+            raise ValueError("Platform name is required")
+        return platform
+
+    def _status_dict(self, posted_platforms):
+        status = {platform: False for platform in self.PLATFORMS}
+        status.update({platform: True for platform in posted_platforms})
+        return status
+
+    def store_message_ids(self, url, message_ids, platform='telegram', sent_at=None):
+        raise NotImplementedError
+
+    def get_message_ids(self, platform='telegram', url=None, sent_after=None, sent_before=None,
+                        message_ids=None, limit=None):
+        """[(url, message_id, sent_at)] for stored messages on platform, newest first"""
+        raise NotImplementedError
+
+    def remove_message_ids(self, message_ids, platform='telegram'):
+        raise NotImplementedError
+
+    def get_external_ids(self, platform='telegram'):
+        raise NotImplementedError
+
+    def clear_external_ids(self, url, platform='telegram'):
+        raise NotImplementedError
+
+    def mark_as_posted(self, url, platform='telegram'):
+        raise NotImplementedError
+
+    def mark_skipped(self, url, platform):
+        """Record that url will never be posted to platform (e.g. X without an image); it leaves the backlog"""
+        raise NotImplementedError
+
+    def get_posting_status(self, url):
+        """{platform: posted?} for every platform in PLATFORMS plus any other with a post"""
+        raise NotImplementedError
+
+    def is_posted_to_instagram(self, url):
+        return self.get_posting_status(url)['instagram']
+
+    # Backlog
+
+    def get_pending_articles(self, platform, limit=100, retry_after_minutes=0, max_attempts=None,
+                             max_age_hours=None):
+        raise NotImplementedError
+
+    def get_backlog_urls(self, platforms, limit=10, **filters):
+        raise NotImplementedError
+
+    def record_failed_attempt(self, url, platform):
+        raise NotImplementedError
+
+    # Claims: a post is claimable when pending, failed, or in progress under an expired lease
+
+    def _lease_times(self, lease_seconds):
+        now = datetime.now()
+        return now.isoformat(timespec='microseconds'), \
+            (now + timedelta(seconds=lease_seconds)).isoformat(timespec='microseconds')
+
+    def claim_post(self, url, platform, owner=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Atomically claim url on platform; False if it is posted or leased to someone else"""
+        raise NotImplementedError
+
+    def claim_next(self, platform, owner=None, limit=1, lease_seconds=DEFAULT_LEASE_SECONDS):
+        """Claim up to `limit` available posts on platform, oldest first. Returns the claimed URLs."""
+        raise NotImplementedError
+
+    def renew_lease(self, url, platform, owner=None, lease_seconds=DEFAULT_LEASE_SECONDS):
+        raise NotImplementedError
+
+    def reclaim_expired_leases(self, platform=None):
+        raise NotImplementedError
+
+    def mark_posting_result(self, url, platform, success=True, owner=None):
+        raise NotImplementedError
+
+    def get_attempts(self, url, platform):
+        raise NotImplementedError
+
+    def try_mark_for_instagram_posting(self, url):
+        return self.claim_post(url, 'instagram')
+
+    def mark_as_posted_instagram(self, url, success=True):
+        self.mark_posting_result(url, 'instagram', success)
+
+    def get_instagram_attempts(self, url):
+        return self.get_attempts(url, 'instagram')
+
+    # Retention: old articles move to an archive (see retention.py) and only their URL digest stays
+
+    def export_archivable_articles(self, cutoff, platforms=('telegram', 'instagram', 'x'), limit=500,
+                                   include_unfinished=False):
+        """
+        Full records (article, body, translations, posts, messages) of up to `limit` articles
+        crawled before `cutoff` whose posts on every platform are posted or skipped; with
+        include_unfinished, every article crawled before the cutoff. Oldest first.
+        """
+        raise NotImplementedError
+
+    def remove_archived_articles(self, records):
+        """Delete exported articles from the live tables, remembering their URLs as archived"""
+        raise NotImplementedError
+
+    def get_archived_digests_after(self, article_id, limit):
+        """[(id, url_digest)] of archived articles with id > article_id, for keeping a SeenUrlFilter in sync"""
+        raise NotImplementedError
+
+    def _archived_urls(self, urls):
+        """The subset of urls that were archived"""
+        raise NotImplementedError
+
+    @staticmethod
+    def _archive_records(articles, translations, posts, messages):
+        """Assemble export records from the rows of each table, keyed by article id"""
+        records = []
+        for article_id, url, title, post_datetime, image_url, crawl_datetime, duplicate_of, content in articles:
+            records.append({
+                'id': article_id,
+                'url': url,
+                'title': title,
+                'post_datetime': post_datetime,
+                'image_url': image_url,
+                'crawl_datetime': crawl_datetime,
+                'duplicate_of': duplicate_of,
+                'content': decompress_text(content),
+                'translations': {
+                    language: {'title': t_title, 'content': decompress_text(t_content)}
+                    for language, t_title, t_content in translations.get(article_id, [])
+                },
+                'posts': {
+                    platform: {'status': status, 'attempts': attempts, 'last_attempt': last_attempt,
+                               'posted_at': posted_at}
+                    for platform, status, attempts, last_attempt, posted_at in posts.get(article_id, [])
+                },
+                'messages': [
+                    {'platform': platform, 'message_id': message_id, 'sent_at': sent_at}
+                    for platform, message_id, sent_at in messages.get(article_id, [])
+                ],
+            })
+        return records
+
+    def vacuum(self, max_pages=None):
+        """Give space freed by deletions back; returns the pages released, or None if the backend can't tell"""
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+
+# URL scheme -> "module.ClassName", imported on first use so SQLite-only setups never need psycopg
+STORAGE_BACKENDS = {
+    'sqlite': 'database.ArticleDatabase',
+    'postgresql': 'postgres_database.PostgresArticleDatabase',
+    'postgres': 'postgres_database.PostgresArticleDatabase',
+}
+
+
+def open_database(dsn="articles.db", **options) -> ArticleStorage:
+    """
+    Open the backend a DSN names: postgresql://... for PostgreSQL, sqlite:///path or a
+    plain file path for SQLite. Options go to the backend's constructor.
+    """
+    scheme, sep, rest = dsn.partition('://')
+    if not sep:
+        scheme, rest = 'sqlite', dsn
+    if scheme not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {scheme}")
+    module_name, class_name = STORAGE_BACKENDS[scheme].rsplit('.', 1)
+    backend = getattr(importlib.import_module(module_name), class_name)
+    if scheme == 'sqlite':
+        # sqlite:///relative.db and sqlite:////absolute.db, as in SQLAlchemy URLs
+        return backend(rest[1:] if sep else rest, **options)
+    return backend(dsn, **options)
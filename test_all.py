@@ -5,6 +5,17 @@ import unittest
 import test_translator
 import test_scrap
 import test_database
+import test_async_database
+import test_seen_filter
+import test_storage
+import test_retention
+import test_scraper
+import test_driver_pool
+import test_snapshot_store
+import test_near_duplicates
+import test_sources
+import test_rate_control
+import test_benchmark_scraper
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,34 @@
+# test_benchmark_scraper.py
+import json
+import os
+import unittest
+from benchmark_scraper import benchmark_fixtures, percentile
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "techcrunch")
+
+
+class TestBenchmarkScraper(unittest.TestCase):
+    def test_percentile_uses_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([7], 90), 7)
+        self.assertIsNone(percentile([], 50))
+
+    def test_static_paths_against_fixture_site(self):
+        report = benchmark_fixtures(FIXTURES_DIR, repeats=1, paths=['parse', 'static'])
+
+        self.assertEqual(report['article_pages'], 6)
+        for name in ('parse_article_html', 'extract_article_data_static'):
+            result = report['results'][name]
+            self.assertEqual(result['pages'], 6)
+            self.assertEqual(result['failures'], 0)
+            self.assertGreater(result['pages_per_second'], 0)
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p99'])
+            self.assertGreater(result['peak_rss_mb'], 0)
+        # The report must round-trip as JSON so runs can be diffed
+        self.assertEqual(json.loads(json.dumps(report)), report)
+
+
+if __name__ == '__main__':
+    unittest.main()
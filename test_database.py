@@ -1,6 +1,10 @@
 # test_database.py
 import unittest
 import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
 from database import ArticleDatabase
 
 class TestArticleDatabase(unittest.TestCase):
@@ -28,6 +32,378 @@ class TestArticleDatabase(unittest.TestCase):
         exists = self.db.article_exists(self.sample_article['url'])
         self.assertTrue(exists, "Article should exist after insertion")
     
+    def test_get_existing_urls(self):
+        self.db.insert_article(self.sample_article)
+        urls = [self.sample_article['url'], "https://example.com/new-article"]
+
+        self.assertEqual(self.db.get_existing_urls(urls), {self.sample_article['url']})
+        self.assertEqual(self.db.get_existing_urls([]), set())
+
+    def test_crawl_state_roundtrip(self):
+        self.assertIsNone(self.db.get_crawl_state("listing_fingerprint"))
+        self.db.set_crawl_state("listing_fingerprint", "abc")
+        self.db.set_crawl_state("listing_fingerprint", "def")
+        self.assertEqual(self.db.get_crawl_state("listing_fingerprint"), "def")
+
+    def test_insert_articles_batch(self):
+        articles = [dict(self.sample_article, url=f"https://example.com/batch-{i}") for i in range(3)]
+        self.assertEqual(self.db.insert_articles(articles), 3)
+        # Already stored URLs are ignored
+        self.assertEqual(self.db.insert_articles(articles + [self.sample_article]), 1)
+        self.assertEqual(len(self.db.get_existing_urls(a['url'] for a in articles)), 3)
+
+    def test_transaction_commits_once_and_rolls_back(self):
+        self.db.insert_article(self.sample_article)
+        url = self.sample_article['url']
+
+        with self.db.transaction():
+            self.db.mark_as_posted(url, 'telegram')
+            self.db.store_message_ids(url, [1, 2])
+            self.assertTrue(self.db.conn.in_transaction, "Nothing should be committed inside the block")
+        self.assertFalse(self.db.conn.in_transaction)
+        self.assertTrue(self.db.get_posting_status(url)['telegram'])
+
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.mark_as_posted(url, 'x')
+                with self.db.transaction():
+                    self.db.mark_duplicate(url, "https://example.com/original")
+                raise RuntimeError("posting failed")
+        self.assertFalse(self.db.get_posting_status(url)['x'])
+        self.assertTrue(self.db.get_posting_status(url)['telegram'])
+
+    def test_get_batch_status(self):
+        urls = [f"https://example.com/article-{i}" for i in range(4)]
+        for url in urls[:3]:
+            self.db.insert_article(dict(self.sample_article, url=url))
+        for platform in ('telegram', 'instagram', 'x'):
+            self.db.mark_as_posted(urls[0], platform)
+        self.db.mark_as_posted(urls[1], 'telegram')
+        self.db.mark_duplicate(urls[2], urls[1])
+
+        batch = self.db.get_batch_status(urls + [urls[3]])
+
+        self.assertEqual(batch['new'], [urls[3]])
+        self.assertEqual(batch['posted'], [urls[0]])
+        self.assertEqual(batch['duplicates'], [urls[2]])
+        article_data, status = batch['pending'][urls[1]]
+        self.assertEqual(article_data['title'], self.sample_article['title'])
+        self.assertEqual(status, {'telegram': True, 'instagram': False, 'x': False, 'youtube': False})
+        self.assertEqual(self.db.get_batch_status([]), {'new': [], 'posted': [], 'duplicates': [], 'pending': {}})
+
+    def test_get_batch_status_large_batch(self):
+        # More URLs than SQLite allows bound parameters in one statement
+        urls = [f"https://example.com/bulk-{i}" for i in range(40000)]
+        self.db.insert_articles(dict(self.sample_article, url=url) for url in urls[::2])
+        batch = self.db.get_batch_status(urls)
+        self.assertEqual(len(batch['new']), 20000)
+        self.assertEqual(len(batch['pending']), 20000)
+
+    def test_platform_posts(self):
+        self.db.insert_article(self.sample_article)
+        url = self.sample_article['url']
+
+        self.db.mark_as_posted(url, 'youtube')
+        self.db.mark_as_posted(url, 'mastodon')
+        status = self.db.get_posting_status(url)
+        self.assertTrue(status['youtube'])
+        self.assertTrue(status['mastodon'])
+        self.assertFalse(status['telegram'])
+
+        self.assertEqual(self.db.get_pending_articles('telegram'), [url])
+        self.assertEqual(self.db.get_pending_articles('youtube'), [])
+
+    def test_instagram_claim_and_result(self):
+        self.db.insert_article(self.sample_article)
+        url = self.sample_article['url']
+
+        self.assertTrue(self.db.try_mark_for_instagram_posting(url))
+        self.assertFalse(self.db.try_mark_for_instagram_posting(url), "In-progress posts can't be claimed twice")
+        self.db.mark_as_posted_instagram(url, success=False)
+        self.assertTrue(self.db.try_mark_for_instagram_posting(url), "Failed posts are retried")
+        self.assertEqual(self.db.get_instagram_attempts(url), 2)
+        self.db.mark_as_posted_instagram(url, success=True)
+        self.assertTrue(self.db.is_posted_to_instagram(url))
+        self.assertFalse(self.db.try_mark_for_instagram_posting(url))
+        self.assertFalse(self.db.try_mark_for_instagram_posting("https://example.com/missing"))
+
+    def test_claims_are_exclusive_until_lease_expires(self):
+        self.db.insert_article(self.sample_article)
+        url = self.sample_article['url']
+
+        self.assertTrue(self.db.claim_post(url, 'telegram', owner="worker-a", lease_seconds=60))
+        self.assertFalse(self.db.claim_post(url, 'telegram', owner="worker-b"))
+        self.assertTrue(self.db.renew_lease(url, 'telegram', owner="worker-a", lease_seconds=-1))
+        self.assertFalse(self.db.renew_lease(url, 'telegram', owner="worker-b"))
+
+        # worker-a crashed and its lease ran out: worker-b takes over, worker-a can't finish it
+        self.assertTrue(self.db.claim_post(url, 'telegram', owner="worker-b"))
+        self.assertFalse(self.db.renew_lease(url, 'telegram', owner="worker-a"))
+        self.assertFalse(self.db.mark_posting_result(url, 'telegram', success=True, owner="worker-a"))
+        self.assertTrue(self.db.mark_posting_result(url, 'telegram', success=True, owner="worker-b"))
+        self.assertTrue(self.db.get_posting_status(url)['telegram'])
+        self.assertEqual(self.db.get_attempts(url, 'telegram'), 2)
+
+    def test_claim_next_and_reclaim_expired(self):
+        urls = [f"https://example.com/queue-{i}" for i in range(5)]
+        self.db.insert_articles(dict(self.sample_article, url=url) for url in urls)
+        self.db.mark_as_posted(urls[0], 'x')
+
+        first = self.db.claim_next('x', owner="worker-a", limit=2, lease_seconds=-1)
+        second = self.db.claim_next('x', owner="worker-b", limit=2)
+        self.assertEqual(first, urls[1:3])
+        # worker-a's leases are already expired, so worker-b gets them back first
+        self.assertEqual(second, urls[1:3])
+        self.assertEqual(self.db.claim_next('x', owner="worker-c", limit=5), urls[3:])
+
+        self.assertEqual(self.db.reclaim_expired_leases('x'), 0)
+        self.db.conn.execute("UPDATE platform_posts SET lease_expires_at = '2000-01-01' WHERE platform = 'x'")
+        self.assertEqual(self.db.reclaim_expired_leases(), 4)
+        self.assertEqual(self.db.get_pending_articles('x', retry_after_minutes=60), [])
+        self.assertEqual(len(self.db.claim_next('x', limit=10)), 4)
+
+    def test_concurrent_claims_have_one_winner(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "articles.db")
+            setup = ArticleDatabase(path)
+            setup.insert_article(self.sample_article)
+            setup.close()
+
+            results = []
+            barrier = threading.Barrier(8)
+
+            def worker():
+                db = ArticleDatabase(path)
+                barrier.wait()
+                results.append(db.claim_post(self.sample_article['url'], 'instagram'))
+                db.close()
+
+            threads = [threading.Thread(target=worker) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(results.count(True), 1)
+
+    def test_backlog_of_unfinished_articles(self):
+        urls = [f"https://example.com/backlog-{i}" for i in range(6)]
+        crawl_times = ["2000-01-01 00:00:00"] + [datetime.now().strftime("%Y-%m-%d %H:%M:%S")] * 5
+        self.db.insert_articles(dict(self.sample_article, url=url, crawl_datetime=crawl)
+                                for url, crawl in zip(urls, crawl_times))
+        self.db.mark_as_posted(urls[1], 'telegram')
+        self.db.record_failed_attempt(urls[2], 'telegram')
+        self.db.mark_duplicate(urls[3], urls[1])
+        for _ in range(3):
+            self.db.record_failed_attempt(urls[4], 'telegram')
+
+        self.assertEqual(self.db.get_pending_articles('telegram'), [urls[0], urls[2], urls[4], urls[5]])
+        self.assertEqual(self.db.get_pending_articles('telegram', retry_after_minutes=30), [urls[0], urls[5]])
+        self.assertEqual(self.db.get_pending_articles('telegram', max_attempts=3), [urls[0], urls[2], urls[5]])
+        self.assertEqual(self.db.get_pending_articles('telegram', limit=2, max_age_hours=24), [urls[2], urls[4]])
+        self.assertEqual(self.db.get_attempts(urls[4], 'telegram'), 3)
+
+        # Posted on telegram but still pending on x: shows up once, in age order
+        self.assertEqual(self.db.get_backlog_urls(['telegram', 'x'], limit=3, retry_after_minutes=30),
+                         [urls[0], urls[1], urls[2]])
+
+    def test_backlog_query_uses_partial_index(self):
+        plan = self.db.conn.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT a.url FROM platform_posts p JOIN articles a ON a.id = p.article_id
+            WHERE p.platform = 'x' AND p.status IN ('pending', 'failed') AND p.article_id >= 0
+              AND (p.last_attempt IS NULL OR p.last_attempt < '2024') AND p.attempts < 5
+            ORDER BY p.article_id LIMIT 10
+        """).fetchall()
+        details = " ".join(row[3] for row in plan)
+        self.assertIn("idx_platform_posts_backlog", details)
+        self.assertNotIn("TEMP B-TREE", details)
+
+    def test_pending_query_uses_covering_index(self):
+        plan = self.db.conn.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT article_id FROM platform_posts WHERE platform = 'telegram' AND status = 'pending'
+        """).fetchall()
+        self.assertIn("COVERING INDEX idx_platform_posts_status", " ".join(row[3] for row in plan))
+
+    def test_migrates_legacy_platform_columns(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "articles.db")
+            legacy = sqlite3.connect(path)
+            legacy.execute("""
+                CREATE TABLE articles (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, url TEXT UNIQUE, content TEXT,
+                    post_datetime TEXT, image_url TEXT, crawl_datetime TEXT, message_ids TEXT,
+                    posted_to_telegram INTEGER DEFAULT 0, instagram_posted INTEGER DEFAULT 0,
+                    instagram_in_progress INTEGER DEFAULT 0, instagram_last_attempt TEXT,
+                    instagram_attempts INTEGER DEFAULT 0, x_posted BOOLEAN DEFAULT FALSE
+                )
+            """)
+            legacy.execute("""
+                INSERT INTO articles (title, url, content, message_ids, posted_to_telegram,
+                                      instagram_attempts, x_posted)
+                VALUES ('Old', 'https://example.com/old', 'Body', '11,12', 1, 3, TRUE)
+            """)
+            legacy.commit()
+            legacy.close()
+
+            db = ArticleDatabase(path)
+            url = 'https://example.com/old'
+            self.assertEqual(db.get_posting_status(url),
+                             {'telegram': True, 'instagram': False, 'x': True, 'youtube': False})
+            self.assertEqual(db.get_external_ids('telegram'), [(url, '11,12')])
+            self.assertEqual(db.get_instagram_attempts(url), 3)
+            self.assertTrue(db.try_mark_for_instagram_posting(url))
+            # Bodies moved to the compressed side table
+            self.assertEqual(db.retrieve_article(url)['content'], 'Body')
+            self.assertEqual([r['url'] for r in db.search_articles("body")], [url])
+            self.assertFalse(db.column_exists("articles", "content"))
+            db.close()
+
+            # Reopening must not migrate again
+            db = ArticleDatabase(path)
+            self.assertEqual(db.get_instagram_attempts(url), 4)
+            db.close()
+
+    def test_content_is_stored_compressed_and_loaded_lazily(self):
+        article = dict(self.sample_article, content="Long body text. " * 500)
+        self.db.insert_article(article)
+        url = article['url']
+
+        stored = self.db.conn.execute("SELECT content FROM article_content").fetchone()[0]
+        self.assertLess(len(stored), len(article['content']) / 10)
+        self.assertEqual(self.db.retrieve_article(url)['content'], article['content'])
+        self.assertNotIn('content', self.db.retrieve_article(url, include_content=False))
+        self.assertEqual(self.db.get_article_content(url), article['content'])
+        self.assertEqual(self.db.get_unsigned_articles(), [(url, article['title'], article['content'])])
+
+        pending = self.db.get_batch_status([url])['pending'][url][0]
+        self.assertEqual(pending['content'], article['content'])
+        self.assertNotIn('content', self.db.get_batch_status([url], include_content=False)['pending'][url][0])
+
+    def test_translations_roundtrip(self):
+        self.db.insert_article(self.sample_article)
+        url = self.sample_article['url']
+
+        self.assertIsNone(self.db.get_translation(url, 'fa'))
+        self.db.store_translation(url, 'fa', "عنوان", "متن " * 100)
+        self.db.store_translation(url, 'fa', "عنوان تازه", "متن تازه")
+        self.assertEqual(self.db.get_translation(url, 'fa'), {'title': "عنوان تازه", 'content': "متن تازه"})
+        self.assertIsNone(self.db.get_translation(url, 'de'))
+
+    def test_search_articles(self):
+        self.db.insert_articles([
+            dict(self.sample_article, url="https://example.com/a", title="Nvidia beats estimates",
+                 content="The chipmaker reported record data center revenue."),
+            dict(self.sample_article, url="https://example.com/b", title="Startup roundup",
+                 content="Among others, a startup building tools for Nvidia GPUs raised money."),
+            dict(self.sample_article, url="https://example.com/c", title="Weather app update",
+                 content="Nothing about chips here."),
+        ])
+        # Re-inserting an existing URL must not index it twice
+        self.db.insert_article(dict(self.sample_article, url="https://example.com/a", title="Ignored"))
+
+        results = self.db.search_articles("nvidia")
+        self.assertEqual([r['url'] for r in results], ["https://example.com/a", "https://example.com/b"])
+        self.assertEqual(results[0]['title'], "Nvidia beats estimates")
+        self.assertEqual([r['url'] for r in self.db.search_articles("NVIDIA:  revenue!")], ["https://example.com/a"])
+        self.assertEqual(len(self.db.search_articles('"data center" OR weather', raw=True)), 2)
+        self.assertEqual(self.db.search_articles("   "), [])
+
+        self.db.store_translation("https://example.com/c", 'fa', "به‌روزرسانی برنامه هواشناسی", "متن")
+        self.db.store_translation("https://example.com/c", 'fa', "برنامه آب و هوا", "متن تازه")
+        self.assertEqual([r['url'] for r in self.db.search_articles("هوا")], ["https://example.com/c"])
+        self.assertEqual(self.db.search_articles("هواشناسی"), [], "Replaced translations leave the index")
+
+        self.db.rebuild_search_index()
+        self.assertEqual([r['url'] for r in self.db.search_articles("nvidia")],
+                         ["https://example.com/a", "https://example.com/b"])
+        self.assertEqual(len(self.db.search_articles("هوا")), 1)
+
+    def test_up_to_date_schema_is_one_version_check(self):
+        self.assertEqual(self.db.schema_version(), len(ArticleDatabase.MIGRATIONS))
+        statements = []
+        self.db.conn.set_trace_callback(statements.append)
+        self.db.ensure_schema()
+        self.db.conn.set_trace_callback(None)
+        self.assertEqual(statements, ["PRAGMA user_version"])
+
+    def test_concurrent_startup_migrates_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "articles.db")
+            errors = []
+
+            def open_database():
+                try:
+                    ArticleDatabase(path).close()
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=open_database) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            db = ArticleDatabase(path)
+            self.assertEqual(db.schema_version(), len(ArticleDatabase.MIGRATIONS))
+            db.close()
+
+    def test_failed_migration_rolls_back(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "articles.db")
+
+            def broken_migration(db):
+                db.conn.execute("CREATE TABLE half_applied (id INTEGER)")
+                raise sqlite3.OperationalError("migration failed")
+
+            original = ArticleDatabase.MIGRATIONS
+            ArticleDatabase.MIGRATIONS = original + (broken_migration,)
+            try:
+                with self.assertRaises(sqlite3.OperationalError):
+                    ArticleDatabase(path)
+            finally:
+                ArticleDatabase.MIGRATIONS = original
+
+            db = ArticleDatabase(path)
+            self.assertEqual(db.schema_version(), len(original))
+            tables = {row[0] for row in db.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            self.assertNotIn("half_applied", tables)
+            db.close()
+
+    def test_file_database_uses_wal(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = ArticleDatabase(os.path.join(tmp, "articles.db"))
+            self.assertEqual(db.conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+            self.assertEqual(db.conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+            db.close()
+
+    def test_message_ids_are_selected_and_removed_by_index(self):
+        other = dict(self.sample_article, url="https://example.com/other")
+        self.db.insert_articles([self.sample_article, other])
+        url = self.sample_article['url']
+        self.db.store_message_ids(url, [10, 11], sent_at="2024-10-01T09:00:00")
+        self.db.store_message_ids(other['url'], [20], sent_at="2024-10-05T09:00:00")
+
+        self.assertEqual(self.db.get_message_ids('telegram', limit=2),
+                         [(other['url'], 20, "2024-10-05T09:00:00"), (url, 11, "2024-10-01T09:00:00")])
+        self.assertEqual([m[1] for m in self.db.get_message_ids(url=url)], [11, 10])
+        self.assertEqual([m[1] for m in self.db.get_message_ids(sent_after="2024-10-02", sent_before="2024-10-06")],
+                         [20])
+        self.assertEqual([m[1] for m in self.db.get_message_ids(message_ids=[10])], [10])
+        self.assertEqual(self.db.get_external_ids('telegram'), [(url, '10,11'), (other['url'], '20')])
+
+        plan = self.db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT message_id FROM post_messages WHERE platform = 'telegram' AND sent_at >= ?",
+            ("2024-10-02",)
+        ).fetchall()
+        self.assertIn("idx_post_messages_sent", " ".join(row[3] for row in plan))
+
+        self.assertEqual(self.db.remove_message_ids([10, 20]), 2)
+        self.assertEqual([m[1] for m in self.db.get_message_ids()], [11])
+        self.db.clear_external_ids(url)
+        self.assertEqual(self.db.get_message_ids(), [])
+
     def tearDown(self):
         # Close the database connection
         self.db.conn.close()
@@ -0,0 +1,79 @@
+# test_driver_pool.py
+import asyncio
+import threading
+import time
+import unittest
+from driver_pool import WebDriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+class TestWebDriverPool(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+        self.pool = WebDriverPool(self.make_driver, size=2, max_pages_per_driver=3, max_memory_mb=None)
+
+    def make_driver(self):
+        driver = FakeDriver()
+        self.created.append(driver)
+        return driver
+
+    def test_drivers_are_reused(self):
+        for _ in range(2):
+            with self.pool.driver():
+                pass
+        self.assertEqual(len(self.created), 1)
+
+    def test_driver_recycled_after_max_pages(self):
+        for _ in range(4):
+            with self.pool.driver():
+                pass
+        self.assertEqual(len(self.created), 2)
+        self.assertTrue(self.created[0].quit_called)
+        self.assertEqual(self.pool.stats['recycled'], 1)
+
+    def test_driver_discarded_after_error(self):
+        with self.assertRaises(RuntimeError):
+            with self.pool.driver():
+                raise RuntimeError("browser crashed")
+        self.assertTrue(self.created[0].quit_called)
+
+        with self.pool.driver() as driver:
+            self.assertIsNot(driver, self.created[0])
+
+    def test_map_async_is_bounded_by_pool_size(self):
+        in_use = set()
+        peak = []
+        lock = threading.Lock()
+
+        def work(driver, item):
+            with lock:
+                in_use.add(id(driver))
+                peak.append(len(in_use))
+            time.sleep(0.02)
+            with lock:
+                in_use.discard(id(driver))
+            return item * 2
+
+        results = asyncio.run(self.pool.map_async(work, range(6), max_concurrency=4))
+
+        self.assertEqual(results, [0, 2, 4, 6, 8, 10])
+        self.assertLessEqual(max(peak), 2)
+        self.assertEqual(len(self.created), 2)
+
+    def test_close_quits_idle_drivers(self):
+        with self.pool.driver():
+            pass
+        self.pool.close()
+        self.assertTrue(self.created[0].quit_called)
+        with self.assertRaises(RuntimeError):
+            self.pool.acquire()
+
+if __name__ == '__main__':
+    unittest.main()
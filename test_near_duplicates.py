@@ -0,0 +1,65 @@
+# test_near_duplicates.py
+import unittest
+from database import ArticleDatabase
+from near_duplicates import MinHasher, NearDuplicateDetector
+
+BASE_CONTENT = " ".join(
+    f"Sentence {i} about the startup raising a new funding round led by investors." for i in range(60)
+)
+
+
+def make_article(url, content, title="Startup raises funding"):
+    return {
+        "url": url,
+        "title": title,
+        "content": content,
+        "post_datetime": "2024-10-19T12:00:00",
+        "image_url": None,
+        "crawl_datetime": "2024-10-19 12:00:00"
+    }
+
+
+class TestNearDuplicateDetector(unittest.TestCase):
+    def setUp(self):
+        self.db = ArticleDatabase(':memory:')
+        self.detector = NearDuplicateDetector(self.db, threshold=0.8)
+
+    def insert(self, article):
+        self.db.insert_article(article)
+        return self.detector.check_and_add(article)
+
+    def test_signature_similarity_tracks_jaccard(self):
+        hasher = MinHasher()
+        original = hasher.signature(BASE_CONTENT)
+        self.assertEqual((original == hasher.signature(BASE_CONTENT)).mean(), 1.0)
+        self.assertLess((original == hasher.signature("completely different text " * 50)).mean(), 0.1)
+
+    def test_flags_lightly_edited_copy(self):
+        self.assertEqual(self.insert(make_article("https://example.com/original", BASE_CONTENT)), [])
+
+        updated = BASE_CONTENT.replace("Sentence 59", "Updated sentence 59")
+        duplicates = self.insert(make_article("https://example.com/updated", updated))
+
+        self.assertEqual(len(duplicates), 1)
+        self.assertEqual(duplicates[0][0], "https://example.com/original")
+        self.assertGreaterEqual(duplicates[0][1], 0.8)
+
+    def test_different_article_is_not_flagged(self):
+        self.insert(make_article("https://example.com/original", BASE_CONTENT))
+        other = " ".join(f"Paragraph {i} covering a security breach at a cloud provider." for i in range(60))
+
+        self.assertEqual(self.insert(make_article("https://example.com/other", other, title="Breach")), [])
+
+    def test_backfill_indexes_existing_articles(self):
+        self.db.insert_article(make_article("https://example.com/original", BASE_CONTENT))
+        self.assertEqual(self.detector.backfill(), 1)
+        self.assertEqual(self.detector.backfill(), 0)
+
+        duplicates = self.detector.find_duplicates(make_article("https://example.com/copy", BASE_CONTENT))
+        self.assertEqual([url for url, _ in duplicates], ["https://example.com/original"])
+
+    def tearDown(self):
+        self.db.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# test_rate_control.py
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from rate_control import AdaptiveRateController
+from scraper import TechCrunchScraper
+
+
+def make_response(status, headers=None, text=""):
+    response = MagicMock()
+    response.status_code = status
+    response.headers = headers or {}
+    response.text = text
+    return response
+
+
+class TestAdaptiveRateController(unittest.TestCase):
+    def setUp(self):
+        self.controller = AdaptiveRateController(initial_concurrency=2, max_concurrency=4,
+                                                 initial_delay=0.0, delay_step=0.01)
+
+    def test_additive_increase_on_success(self):
+        for _ in range(20):
+            self.controller.acquire("a.com")
+            self.controller.release("a.com", latency=0.01, status=200)
+
+        metrics = self.controller.get_metrics()["a.com"]
+        self.assertEqual(metrics["concurrency"], 4)
+        self.assertEqual(metrics["delay_seconds"], 0.0)
+        self.assertEqual(metrics["requests"], 20)
+
+    def test_multiplicative_decrease_on_throttle(self):
+        self.controller.acquire("a.com")
+        self.controller.release("a.com", latency=0.01, status=429, retry_after=0.2)
+
+        metrics = self.controller.get_metrics()["a.com"]
+        self.assertEqual(metrics["concurrency"], 1)
+        self.assertGreater(metrics["delay_seconds"], 0)
+        self.assertEqual(metrics["throttled"], 1)
+
+        # Retry-After is honored before the next request to the host
+        start = time.monotonic()
+        self.controller.acquire("a.com")
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+        self.controller.release("a.com", latency=0.01, status=200)
+
+    def test_connection_errors_back_off(self):
+        with self.assertRaises(ConnectionResetError):
+            with self.controller.request("a.com"):
+                raise ConnectionResetError()
+        self.assertEqual(self.controller.get_metrics()["a.com"]["errors"], 1)
+
+    def test_hosts_are_independent(self):
+        self.controller.acquire("a.com")
+        self.controller.release("a.com", latency=0.01, status=503)
+
+        self.assertEqual(self.controller.get_metrics()["a.com"]["concurrency"], 1)
+        self.controller.acquire("b.com")
+        self.controller.release("b.com", latency=0.01, status=200)
+        self.assertGreater(self.controller.get_metrics()["b.com"]["concurrency"], 2)
+
+    def test_concurrency_limit_is_enforced(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def worker():
+            with self.controller.request("a.com") as outcome:
+                with lock:
+                    active.append(1)
+                    peak.append(len(active))
+                time.sleep(0.02)
+                with lock:
+                    active.pop()
+                outcome.status = 200
+
+        controller = AdaptiveRateController(initial_concurrency=2, max_concurrency=2, initial_delay=0.0)
+        self.controller = controller
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(max(peak), 2)
+
+
+class TestScraperRateControl(unittest.TestCase):
+    def test_http_get_retries_throttled_response(self):
+        controller = AdaptiveRateController(initial_delay=0.0)
+        scraper = TechCrunchScraper(rate_controller=controller)
+        responses = [make_response(429, {"Retry-After": "0"}), make_response(200, text="<html></html>")]
+
+        with patch.object(scraper.session, 'get', side_effect=responses) as get:
+            self.assertEqual(scraper.fetch_html("https://techcrunch.com/latest"), "<html></html>")
+
+        self.assertEqual(get.call_count, 2)
+        metrics = scraper.get_stats()["hosts"]["techcrunch.com"]
+        self.assertEqual(metrics["throttled"], 1)
+        scraper.quit()
+
+if __name__ == '__main__':
+    unittest.main()
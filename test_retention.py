@@ -0,0 +1,86 @@
+# test_retention.py
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+from database import ArticleDatabase
+from retention import ArticleArchive, run_retention
+
+
+def article(i, crawl_datetime="2023-01-01 10:00:00"):
+    return {
+        "url": f"https://example.com/article-{i}",
+        "title": f"Article {i}",
+        "content": f"Body of article {i}. " * 200,
+        "post_datetime": "2023-01-01T09:00:00",
+        "image_url": "https://example.com/image.jpg",
+        "crawl_datetime": crawl_datetime,
+    }
+
+
+class TestRetention(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = ArticleDatabase(os.path.join(self.tmp.name, "articles.db"))
+        self.archive = ArticleArchive(os.path.join(self.tmp.name, "articles-archive.db"))
+
+    def tearDown(self):
+        self.db.close()
+        self.archive.close()
+        self.tmp.cleanup()
+
+    def post_everywhere(self, url):
+        for platform in ('telegram', 'instagram', 'x'):
+            self.db.mark_as_posted(url, platform)
+
+    @patch('builtins.print')
+    def test_archives_posted_articles_and_frees_pages(self, _):
+        self.db.insert_articles([article(i) for i in range(300)] + [article(300, "2099-01-01 10:00:00")])
+        for i in range(250):
+            self.post_everywhere(article(i)['url'])
+        pages_before = self.db.conn.execute("PRAGMA page_count").fetchone()[0]
+
+        result = run_retention(self.db, self.archive, older_than_days=30, batch_size=100)
+
+        self.assertEqual(result['archived'], 250)
+        self.assertGreater(result['pages_freed'], 0)
+        self.assertLess(self.db.conn.execute("PRAGMA page_count").fetchone()[0], pages_before)
+        self.assertEqual(self.db.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        self.assertEqual(self.db.conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+        self.assertEqual(len(self.archive), 250)
+        self.assertEqual(self.db.conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0], 51)
+
+        record = self.archive.get(article(7)['url'])
+        self.assertEqual(record['content'], article(7)['content'])
+        self.assertEqual(record['posts']['telegram']['status'], 'posted')
+        self.assertIsNone(self.archive.get(article(270)['url']))
+
+        # A second run finds nothing left and leaves the file alone
+        self.assertEqual(run_retention(self.db, self.archive, older_than_days=30)['archived'], 0)
+
+    @patch('builtins.print')
+    def test_articles_from_the_cutoff_day_wait_for_the_cutoff_time(self, _):
+        cutoff_day = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        self.db.insert_articles([article(1, f"{cutoff_day} 00:00:00"), article(2, f"{cutoff_day} 23:59:59")])
+        for i in (1, 2):
+            self.post_everywhere(article(i)['url'])
+
+        self.assertEqual(run_retention(self.db, self.archive, older_than_days=30)['archived'], 1)
+        self.assertIsNotNone(self.archive.get(article(1)['url']))
+        self.assertIsNone(self.archive.get(article(2)['url']))
+
+    @patch('builtins.print')
+    def test_interrupted_run_is_resumed(self, _):
+        self.db.insert_articles([article(1)])
+        self.post_everywhere(article(1)['url'])
+        # The archive was written but the live rows were never deleted
+        self.archive.add_many(self.db.export_archivable_articles("2024-01-01"))
+
+        self.assertEqual(run_retention(self.db, self.archive, older_than_days=30)['archived'], 1)
+        self.assertEqual(len(self.archive), 1)
+        self.assertTrue(self.db.article_exists(article(1)['url']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,383 @@
+# test_scraper.py
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+from urllib.parse import urlparse, parse_qs
+import scraper as scraper_module
+from scraper import TechCrunchScraper, resolve_chromedriver_path
+from database import ArticleDatabase
+
+ARTICLE_HTML = """
+<html><body>
+  <h1 class="wp-block-post-title">Test   Startup Raises $10M</h1>
+  <div class="wp-block-post-date"><time datetime="2024-10-19T10:00:00-07:00">October 19, 2024</time></div>
+  <figure class="wp-block-post-featured-image"><img src="/wp-content/uploads/image.jpg"></figure>
+  <div class="post-authors-list__author">Jane Doe</div>
+  <div class="entry-content">
+    <p>First paragraph of the <a href="#">article</a>.</p>
+    <p>Second paragraph.</p>
+  </div>
+  <div class="tc23-post-relevant-terms__terms"><a href="#">AI</a><a href="#">Startups</a></div>
+</body></html>
+"""
+
+
+def make_api_post(index):
+    return {
+        "link": f"https://techcrunch.com/2024/10/19/post-{index}/",
+        "date_gmt": "2024-10-19T17:00:00",
+        "title": {"rendered": f"Post {index} &#8211; AI &amp; Startups"},
+        "content": {"rendered": f"<p>Body of post {index}.</p><figure><img src='x.jpg'></figure><p>More text.</p>"},
+        "_embedded": {
+            "author": [{"name": "Jane Doe"}],
+            "wp:featuredmedia": [{"source_url": f"https://techcrunch.com/wp-content/uploads/{index}.jpg"}],
+            "wp:term": [
+                [{"taxonomy": "category", "name": "AI"}],
+                [{"taxonomy": "post_tag", "name": "Funding &amp; Deals"}],
+            ],
+        },
+    }
+
+
+class FixtureApiHandler(BaseHTTPRequestHandler):
+    """Serves /wp-json/wp/v2/posts from an in-memory list of posts"""
+    posts = [make_api_post(i) for i in range(120)]
+    requests_seen = []
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path != "/wp-json/wp/v2/posts":
+            self.send_error(404)
+            return
+        query = parse_qs(parsed.query)
+        self.requests_seen.append(query)
+        per_page = int(query["per_page"][0])
+        page = int(query["page"][0])
+        total_pages = -(-len(self.posts) // per_page)
+        body = json.dumps(self.posts[(page - 1) * per_page:page * per_page]).encode()
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("X-WP-TotalPages", str(total_pages))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestTechCrunchScraper(unittest.TestCase):
+    def setUp(self):
+        # No Chrome is started until a page actually needs the browser
+        self.scraper = TechCrunchScraper()
+        self.url = "https://techcrunch.com/2024/10/19/test-article/"
+
+    def test_parse_article_html(self):
+        article = self.scraper.parse_article_html(ARTICLE_HTML, self.url)
+
+        self.assertEqual(article["title"], "Test Startup Raises $10M")
+        self.assertEqual(article["content"], "First paragraph of the article. Second paragraph.")
+        self.assertEqual(article["post_datetime"], "2024-10-19T10:00:00-07:00")
+        self.assertEqual(article["image_url"], "https://techcrunch.com/wp-content/uploads/image.jpg")
+        self.assertEqual(article["author"], "Jane Doe")
+        self.assertEqual(article["tags"], ["AI", "Startups"])
+        self.assertEqual(article["url"], self.url)
+
+    def test_parse_article_html_without_title(self):
+        self.assertIsNone(self.scraper.parse_article_html("<html></html>", self.url))
+
+    def test_static_path_skips_browser(self):
+        html = ARTICLE_HTML.replace("Second paragraph.", "Second paragraph. " * 20)
+        with patch.object(self.scraper, 'fetch_html', return_value=html), \
+                patch.object(self.scraper, 'extract_article_data_script') as browser:
+            article = self.scraper.extract_article(self.url)
+
+        browser.assert_not_called()
+        self.assertEqual(article["title"], "Test Startup Raises $10M")
+        self.assertEqual(self.scraper.extraction_stats['static'], 1)
+
+    def test_falls_back_to_browser_when_static_parse_is_incomplete(self):
+        browser_article = {"title": "From Chrome", "content": "Rendered content"}
+        with patch.object(self.scraper, 'fetch_html', return_value=ARTICLE_HTML), \
+                patch.object(self.scraper, 'setup_driver', return_value=MagicMock(spec=['get', 'quit'])) as setup_driver, \
+                patch.object(self.scraper, 'extract_article_data_script', return_value=browser_article) as browser:
+            article = self.scraper.extract_article(self.url)
+
+        browser.assert_called_once_with(self.url, driver=setup_driver.return_value)
+        self.assertEqual(article, browser_article)
+        stats = self.scraper.get_extraction_stats()
+        self.assertEqual(stats['browser'], 1)
+        self.assertEqual(stats['browser_fraction'], 1.0)
+
+    def test_extract_articles_async_shares_driver_pool(self):
+        drivers = []
+
+        def make_driver():
+            drivers.append(MagicMock(spec=['get', 'quit']))
+            return drivers[-1]
+
+        def browser_extract(url, driver=None):
+            return {"title": url, "content": "Rendered content"}
+
+        urls = [f"{self.url}?page={i}" for i in range(6)]
+        with patch.object(self.scraper, 'fetch_html', return_value=ARTICLE_HTML), \
+                patch.object(self.scraper, 'setup_driver', side_effect=make_driver), \
+                patch.object(self.scraper, 'extract_article_data_script', side_effect=browser_extract):
+            articles = asyncio.run(self.scraper.extract_articles_async(urls))
+
+        self.assertEqual([article["title"] for article in articles], urls)
+        self.assertLessEqual(len(drivers), self.scraper.pool_size)
+        self.assertEqual(self.scraper.extraction_stats['browser'], 6)
+
+    def test_extract_article_data_script_uses_single_round_trip(self):
+        driver = MagicMock()
+        driver.execute_script.return_value = {
+            "title": "Test Startup Raises $10M",
+            "post_datetime": "2024-10-19T10:00:00-07:00",
+            "image_url": "https://techcrunch.com/wp-content/uploads/image.jpg",
+            "author": "Jane Doe",
+            "paragraphs": ["First paragraph.", "Second paragraph."],
+            "tags": ["AI", "Startups"],
+        }
+        self.scraper._consent_handled.add(driver)
+
+        article = self.scraper.extract_article_data_script(self.url, driver=driver)
+
+        driver.execute_script.assert_called_once_with(TechCrunchScraper.EXTRACT_ARTICLE_SCRIPT)
+        driver.find_element.assert_not_called()
+        driver.find_elements.assert_not_called()
+        self.assertEqual(article["content"], "First paragraph. Second paragraph.")
+        self.assertEqual(article["tags"], ["AI", "Startups"])
+        self.assertEqual(article["url"], self.url)
+
+    def test_cookie_popup_handled_once_per_browser(self):
+        driver = MagicMock()
+        button = MagicMock()
+        driver.find_elements.side_effect = lambda by, selector: [button] if selector == "didomi-notice-agree-button" else []
+        driver.get_cookies.return_value = [{"name": "euconsent", "value": "1"}]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self.scraper.cookie_file = os.path.join(tmp, "cookies.json")
+            self.scraper.accept_cookie_popup(driver)
+            self.scraper.accept_cookie_popup(driver)
+
+            button.click.assert_called_once()
+            with open(self.scraper.cookie_file) as f:
+                self.assertEqual(json.load(f), [{"name": "euconsent", "value": "1"}])
+
+            # A fresh browser gets the unexpired consent before its first page and never probes
+            valid = {"name": "euconsent", "value": "1", "domain": ".techcrunch.com", "expiry": 4102444800}
+            expired = {"name": "didomi_token", "value": "2", "domain": ".techcrunch.com", "expiry": 946684800}
+            with open(self.scraper.cookie_file, "w") as f:
+                json.dump([valid, expired], f)
+            new_driver = MagicMock()
+            with patch.object(scraper_module.webdriver, 'Chrome', return_value=new_driver), \
+                    patch.object(scraper_module, 'resolve_chromedriver_path', return_value="chromedriver"):
+                self.assertIs(self.scraper.setup_driver(), new_driver)
+            new_driver.execute_cdp_cmd.assert_any_call('Network.setCookies', {'cookies': [
+                {"name": "euconsent", "value": "1", "domain": ".techcrunch.com", "expires": 4102444800}
+            ]})
+            new_driver.get.assert_not_called()
+            self.scraper.accept_cookie_popup(new_driver)
+            new_driver.find_elements.assert_not_called()
+
+            # Once all of it has expired, the next browser is shown the banner again
+            with open(self.scraper.cookie_file, "w") as f:
+                json.dump([expired], f)
+            self.assertFalse(self.scraper.restore_consent_cookies(MagicMock()))
+
+    def test_discover_new_articles_stops_at_known_article(self):
+        db = ArticleDatabase(':memory:')
+        listing = {
+            1: [f"https://techcrunch.com/new-{i}/" for i in range(3)] + ["https://techcrunch.com/old-0/"],
+            2: ["https://techcrunch.com/old-1/"],
+        }
+        db.insert_article({"title": "Old", "url": "https://techcrunch.com/old-0/", "content": "",
+                           "image_url": None, "crawl_datetime": "2024-10-19 10:00:00"})
+
+        with patch.object(self.scraper, 'fetch_listing_urls', side_effect=lambda page: listing[page]) as fetch:
+            new_urls = self.scraper.discover_new_articles(db)
+            self.assertEqual(new_urls, listing[1][:3])
+            self.assertEqual(fetch.call_count, 1)
+
+            # Same top of listing on the next run short-circuits without any DB checks
+            self.scraper.save_listing_fingerprint(db)
+            self.assertEqual(self.scraper.discover_new_articles(db), [])
+        db.close()
+
+    def test_discover_new_articles_walks_pages_until_known(self):
+        db = ArticleDatabase(':memory:')
+        listing = {
+            1: ["https://techcrunch.com/new-0/", "https://techcrunch.com/new-1/"],
+            2: ["https://techcrunch.com/new-1/", "https://techcrunch.com/new-2/", "https://techcrunch.com/old-0/"],
+            3: ["https://techcrunch.com/old-1/"],
+        }
+        db.insert_article({"title": "Old", "url": "https://techcrunch.com/old-0/", "content": "",
+                           "image_url": None, "crawl_datetime": "2024-10-19 10:00:00"})
+
+        with patch.object(self.scraper, 'fetch_listing_urls', side_effect=lambda page: listing[page]) as fetch:
+            new_urls = self.scraper.discover_new_articles(db)
+
+        self.assertEqual(new_urls, ["https://techcrunch.com/new-0/", "https://techcrunch.com/new-1/",
+                                    "https://techcrunch.com/new-2/"])
+        self.assertEqual(fetch.call_count, 2)
+        db.close()
+
+    def test_fetch_listing_urls_parses_static_html(self):
+        html = '<a class="loop-card__title-link" href="/2024/10/19/a/">A</a>' \
+               '<a class="loop-card__title-link" href="https://techcrunch.com/2024/10/19/b/">B</a>'
+        with patch.object(self.scraper, 'fetch_html', return_value=html) as fetch_html:
+            urls = self.scraper.fetch_listing_urls(2)
+
+        fetch_html.assert_called_once_with("https://techcrunch.com/latest/page/2/")
+        self.assertEqual(urls, ["https://techcrunch.com/2024/10/19/a/", "https://techcrunch.com/2024/10/19/b/"])
+
+    def test_selenium_mode_uses_static_listing_and_pooled_browsers(self):
+        html = "".join(f'<a class="loop-card__title-link" href="/2024/10/19/{i}/">{i}</a>' for i in range(5))
+        driver = MagicMock(spec=['get', 'quit', 'execute_script'])
+        driver.execute_script.return_value = {"title": "T", "post_datetime": None, "image_url": None,
+                                              "author": None, "paragraphs": ["Body."], "tags": []}
+        self.scraper._consent_handled.add(driver)
+        with patch.object(self.scraper, 'fetch_html', return_value=html), \
+                patch.object(self.scraper, 'setup_driver', return_value=driver) as setup_driver:
+            urls = self.scraper.scrape_latest(limit=3)
+            setup_driver.assert_not_called()
+
+            # Called without a driver, browser extraction borrows one from the pool
+            self.scraper.extract_article_data_script(urls[0])
+            self.scraper.extract_article_data_script(urls[1])
+            self.scraper.extract_article_data(urls[2])
+
+        self.assertEqual(urls, [f"https://techcrunch.com/2024/10/19/{i}/" for i in range(3)])
+        setup_driver.assert_called_once()
+        driver.get.assert_called_with(urls[2])
+
+    def tearDown(self):
+        self.scraper.quit()
+
+
+class TestWarmBrowserStartup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_file = os.path.join(self.tmp.name, "chromedriver_path.txt")
+        self.driver_path = os.path.join(self.tmp.name, "chromedriver")
+        open(self.driver_path, "w").close()
+        scraper_module._chromedriver_path = None
+
+    def test_chromedriver_path_resolved_once(self):
+        with patch.object(scraper_module, 'ChromeDriverManager') as manager:
+            manager.return_value.install.return_value = self.driver_path
+            self.assertEqual(resolve_chromedriver_path(self.cache_file), self.driver_path)
+
+            # A new process only reads the cache file
+            scraper_module._chromedriver_path = None
+            self.assertEqual(resolve_chromedriver_path(self.cache_file), self.driver_path)
+
+        manager.return_value.install.assert_called_once()
+
+    def test_each_driver_gets_its_own_profile(self):
+        scraper = TechCrunchScraper(profile_dir=os.path.join(self.tmp.name, "profile"),
+                                    driver_cache_file=self.cache_file, block_resources=False)
+        with open(self.cache_file, "w") as f:
+            f.write(self.driver_path)
+
+        with patch.object(scraper_module.webdriver, 'Chrome', side_effect=lambda **kwargs: MagicMock()) as chrome:
+            first = scraper.setup_driver()
+            second = scraper.setup_driver()
+            scraper.quit_driver(first)
+            third = scraper.setup_driver()
+
+        profiles = [
+            [arg for arg in call.kwargs['options'].arguments if arg.startswith('--user-data-dir=')][0]
+            for call in chrome.call_args_list
+        ]
+        self.assertNotEqual(profiles[0], profiles[1])
+        self.assertEqual(profiles[0], profiles[2])
+        self.assertEqual(len(scraper.driver_startup_seconds), 3)
+
+        for driver in (second, third):
+            scraper.quit_driver(driver)
+        scraper.quit()
+
+    def tearDown(self):
+        scraper_module._chromedriver_path = None
+        self.tmp.cleanup()
+
+
+class TestWordPressApiIngestion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), FixtureApiHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        FixtureApiHandler.requests_seen.clear()
+        self.scraper = TechCrunchScraper(base_url=self.base_url, ingestion_mode='api')
+
+    def test_scrape_articles_api_returns_v2_dicts(self):
+        articles = self.scraper.scrape_articles_api(limit=10)
+
+        self.assertEqual(len(articles), 10)
+        self.assertEqual(len(FixtureApiHandler.requests_seen), 1)
+        article = articles[0]
+        self.assertEqual(article["title"], "Post 0 \u2013 AI & Startups")
+        self.assertEqual(article["url"], "https://techcrunch.com/2024/10/19/post-0/")
+        self.assertEqual(article["content"], "Body of post 0. More text.")
+        self.assertEqual(article["post_datetime"], "2024-10-19T17:00:00+00:00")
+        self.assertEqual(article["image_url"], "https://techcrunch.com/wp-content/uploads/0.jpg")
+        self.assertEqual(article["author"], "Jane Doe")
+        self.assertEqual(article["tags"], ["Funding & Deals"])
+        self.assertEqual(set(article), {"title", "url", "content", "post_datetime", "image_url",
+                                        "author", "tags", "crawl_datetime"})
+
+    def test_scrape_articles_api_paginates(self):
+        articles = self.scraper.scrape_articles_api(limit=110)
+
+        # per_page is capped at 100, so the second page supplies the remainder
+        self.assertEqual(len(articles), 110)
+        self.assertEqual([query["page"] for query in FixtureApiHandler.requests_seen], [["1"], ["2"]])
+        self.assertEqual(len({article["url"] for article in articles}), 110)
+
+    def test_scrape_articles_api_stops_at_last_page(self):
+        articles = self.scraper.scrape_articles_api(limit=500)
+
+        self.assertEqual(len(articles), len(FixtureApiHandler.posts))
+        self.assertEqual(len(FixtureApiHandler.requests_seen), 2)
+
+    def test_scrape_latest_prefetches_articles(self):
+        urls = self.scraper.scrape_latest(limit=3)
+
+        with patch.object(self.scraper, 'fetch_html') as fetch_html:
+            articles = [self.scraper.extract_article(url) for url in urls]
+
+        fetch_html.assert_not_called()
+        self.assertEqual([article["url"] for article in articles], urls)
+        self.assertEqual(self.scraper.extraction_stats['api'], 3)
+
+    def test_prefetched_articles_do_not_accumulate(self):
+        self.scraper.scrape_latest(limit=3)
+        # None of these are extracted, as if they were already stored
+        urls = self.scraper.scrape_latest(limit=2)
+        self.assertEqual(list(self.scraper.prefetched_articles), urls)
+
+    def test_unknown_ingestion_mode(self):
+        with self.assertRaises(ValueError):
+            TechCrunchScraper(ingestion_mode='rss')
+
+    def tearDown(self):
+        self.scraper.quit()
+
+if __name__ == '__main__':
+    unittest.main()
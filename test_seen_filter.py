@@ -0,0 +1,104 @@
+# test_seen_filter.py
+import os
+import tempfile
+import unittest
+from database import ArticleDatabase
+from seen_filter import SeenUrlFilter
+
+
+def article(i):
+    return {
+        "url": f"https://example.com/article-{i}",
+        "title": f"Article {i}",
+        "content": f"Body of article {i}.",
+        "post_datetime": "2023-10-20T12:34:56",
+        "image_url": "https://example.com/image.jpg",
+        "crawl_datetime": "2023-10-20T13:00:00",
+    }
+
+
+class TestSeenUrlFilter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filter_path = os.path.join(self.tmp.name, "articles.seen")
+        self.db_path = os.path.join(self.tmp.name, "articles.db")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        seen = SeenUrlFilter(self.filter_path, capacity=20000, error_rate=0.01)
+        added = [f"https://example.com/a/{i}" for i in range(20000)]
+        seen.add_many(added)
+        self.assertTrue(seen.contains_many(added).all())
+        self.assertIn(added[123], seen)
+
+        false_positives = seen.contains_many(f"https://example.com/b/{i}" for i in range(20000)).sum()
+        self.assertLess(false_positives / 20000, 0.02)
+        seen.close()
+
+    def test_persists_across_reopen(self):
+        seen = SeenUrlFilter(self.filter_path, capacity=1000)
+        seen.add_many(["https://example.com/kept"], synced_id=7)
+        seen.close()
+
+        reopened = SeenUrlFilter(self.filter_path)
+        self.assertFalse(reopened.created)
+        self.assertIn("https://example.com/kept", reopened)
+        self.assertNotIn("https://example.com/never-added", reopened)
+        self.assertEqual(reopened.stats()['items'], 1)
+        self.assertEqual(reopened.synced_id, 7)
+        reopened.close()
+
+    def test_database_keeps_filter_in_sync(self):
+        db = ArticleDatabase(self.db_path, seen_filter=SeenUrlFilter(self.filter_path, capacity=1000))
+        db.insert_articles([article(i) for i in range(5)])
+        db.insert_article(article(5))
+        self.assertTrue(db.seen_filter.contains_many(article(i)['url'] for i in range(6)).all())
+        self.assertEqual(db.seen_filter.synced_id, 6)
+
+        urls = [article(i)['url'] for i in range(10)]
+        self.assertEqual(db.get_existing_urls(urls), set(urls[:6]))
+        self.assertEqual(db.get_batch_status(urls)['new'], urls[6:])
+        self.assertTrue(db.article_exists(urls[0]))
+        self.assertFalse(db.article_exists(urls[9]))
+        db.close()
+
+    def test_new_filter_is_built_from_existing_database(self):
+        db = ArticleDatabase(self.db_path)
+        db.insert_articles([article(i) for i in range(3)])
+        db.close()
+
+        db = ArticleDatabase(self.db_path, seen_filter=SeenUrlFilter(self.filter_path, capacity=1000))
+        self.assertIn(article(2)['url'], db.seen_filter)
+        self.assertEqual(db.get_existing_urls([article(2)['url'], article(3)['url']]), {article(2)['url']})
+        db.close()
+
+    def test_catches_up_with_writes_from_another_connection(self):
+        db = ArticleDatabase(self.db_path, seen_filter=SeenUrlFilter(self.filter_path, capacity=1000))
+        other = ArticleDatabase(self.db_path)
+        other.insert_article(article(1))
+        other.close()
+
+        # The filter never saw this insert, but must still not report the URL as new
+        self.assertEqual(db.get_existing_urls([article(1)['url']]), {article(1)['url']})
+        self.assertEqual(db.get_batch_status([article(1)['url']])['new'], [])
+        db.close()
+
+    def test_positive_hits_are_confirmed_against_database(self):
+        seen = SeenUrlFilter(self.filter_path, capacity=1000)
+        db = ArticleDatabase(self.db_path, seen_filter=seen)
+        # A URL in the filter but not in the database (e.g. a rolled back insert) is still new
+        seen.add("https://example.com/rolled-back")
+        self.assertEqual(db.get_existing_urls(["https://example.com/rolled-back"]), set())
+        db.close()
+
+    def test_rejects_foreign_file(self):
+        with open(self.filter_path, "wb") as f:
+            f.write(b"not a filter" * 10)
+        with self.assertRaises(ValueError):
+            SeenUrlFilter(self.filter_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
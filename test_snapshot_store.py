@@ -0,0 +1,84 @@
+# test_snapshot_store.py
+import tempfile
+import unittest
+from unittest.mock import patch
+from scraper import TechCrunchScraper, SnapshotMissingError
+from snapshot_store import SnapshotStore, reextract_snapshots
+
+ARTICLE_HTML = """
+<html><body>
+  <h1 class="wp-block-post-title">Stored Article</h1>
+  <div class="wp-block-post-date"><time datetime="2024-10-19T10:00:00-07:00">October 19, 2024</time></div>
+  <div class="entry-content"><p>{body}</p></div>
+</body></html>
+""".replace("{body}", "Stored paragraph. " * 20)
+
+
+class TestSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = SnapshotStore(self.tmp.name)
+        self.url = "https://techcrunch.com/2024/10/19/stored-article/"
+
+    def test_identical_pages_share_one_object(self):
+        first = self.store.put(self.url, ARTICLE_HTML, fetched_at="2024-10-19T10:00:00")
+        second = self.store.put(self.url, ARTICLE_HTML, fetched_at="2024-10-19T11:00:00")
+
+        self.assertEqual(first, second)
+        stats = self.store.stats()
+        self.assertEqual(stats['snapshots'], 2)
+        self.assertEqual(stats['objects'], 1)
+        self.assertLess(stats['stored_bytes'], stats['raw_bytes'])
+
+    def test_get_returns_latest_or_as_of(self):
+        self.store.put(self.url, "<html>old</html>", fetched_at="2024-10-19T10:00:00")
+        self.store.put(self.url, "<html>new</html>", fetched_at="2024-10-20T10:00:00")
+
+        self.assertEqual(self.store.get(self.url), "<html>new</html>")
+        self.assertEqual(self.store.get(self.url, before="2024-10-19T23:59:59"), "<html>old</html>")
+        self.assertIsNone(self.store.get("https://techcrunch.com/missing/"))
+
+    def test_scraper_records_fetched_pages(self):
+        scraper = TechCrunchScraper(snapshot_store=self.store)
+        with patch.object(scraper.session, 'get') as network:
+            network.return_value.text = ARTICLE_HTML
+            article = scraper.extract_article(self.url)
+        scraper.quit()
+
+        self.assertEqual(article['title'], "Stored Article")
+        self.assertEqual(self.store.get(self.url), ARTICLE_HTML)
+
+    def test_replay_serves_pages_without_network(self):
+        self.store.put(self.url, ARTICLE_HTML, fetched_at="2024-10-19T10:00:00")
+        scraper = TechCrunchScraper(snapshot_store=self.store, replay=True)
+
+        with patch.object(scraper.session, 'get') as network:
+            article = scraper.extract_article(self.url)
+            missing = scraper.extract_article("https://techcrunch.com/missing/")
+            with self.assertRaises(SnapshotMissingError):
+                scraper.fetch_html("https://techcrunch.com/missing/")
+
+        network.assert_not_called()
+        self.assertEqual(article['title'], "Stored Article")
+        self.assertIsNone(missing)
+        self.assertIsNone(scraper._pool)
+        scraper.quit()
+
+    def test_reextract_snapshots(self):
+        self.store.put(self.url, ARTICLE_HTML, fetched_at="2024-10-19T10:00:00")
+        self.store.put("https://techcrunch.com/broken/", "<html></html>", fetched_at="2024-10-19T10:00:00")
+        scraper = TechCrunchScraper()
+
+        articles, failed = reextract_snapshots(self.store, scraper)
+        scraper.quit()
+
+        self.assertEqual([article['url'] for article in articles], [self.url])
+        self.assertEqual(articles[0]['crawl_datetime'], "2024-10-19 10:00:00")
+        self.assertEqual(failed, ["https://techcrunch.com/broken/"])
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+if __name__ == '__main__':
+    unittest.main()
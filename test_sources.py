@@ -0,0 +1,87 @@
+# test_sources.py
+import asyncio
+import time
+import unittest
+from database import ArticleDatabase
+from sources import ArticleSource, CrawlScheduler, create_sources, register_source, SOURCE_REGISTRY
+from scraper import TechCrunchScraper
+
+
+class FakeSource(ArticleSource):
+    name = 'fake'
+    max_concurrency = 2
+    politeness_delay = 0.05
+
+    def __init__(self, host='example.com', count=4):
+        self.host = host
+        self.count = count
+        self.active = 0
+        self.peak = 0
+        self.started = []
+
+    def hosts(self):
+        return [self.host]
+
+    def discover_urls(self, limit=10, db=None):
+        return [f"https://{self.host}/article-{i}" for i in range(min(limit, self.count))]
+
+    def extract_article(self, url):
+        self.started.append(time.monotonic())
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        self.active -= 1
+        return {"title": url, "url": url, "content": "", "image_url": None, "crawl_datetime": ""}
+
+
+class FailingSource(FakeSource):
+    def discover_urls(self, limit=10, db=None):
+        raise RuntimeError("listing changed")
+
+
+class TestSourceRegistry(unittest.TestCase):
+    def test_create_sources_from_config(self):
+        register_source('fake', 'test_sources.FakeSource')
+        try:
+            sources = create_sources(['techcrunch', ' fake '], options={'fake': {'host': 'news.example.org'}})
+        finally:
+            SOURCE_REGISTRY.pop('fake')
+
+        self.assertIsInstance(sources[0], TechCrunchScraper)
+        self.assertEqual(sources[0].hosts(), ['techcrunch.com'])
+        self.assertEqual(sources[1].hosts(), ['news.example.org'])
+        for source in sources:
+            source.quit()
+
+    def test_unknown_source(self):
+        with self.assertRaises(ValueError):
+            create_sources(['nope'])
+
+
+class TestCrawlScheduler(unittest.TestCase):
+    def test_discover_all_combines_sources_and_survives_failures(self):
+        scheduler = CrawlScheduler([FakeSource('a.com', 2), FailingSource('b.com'), FakeSource('c.com', 1)])
+        urls = asyncio.run(scheduler.discover_all(limit_per_source=10, db=ArticleDatabase(':memory:')))
+
+        self.assertEqual(urls, ["https://a.com/article-0", "https://a.com/article-1", "https://c.com/article-0"])
+
+    def test_extract_all_respects_per_host_limits(self):
+        first, second = FakeSource('a.com', 6), FakeSource('b.com', 6)
+        scheduler = CrawlScheduler([first, second])
+        urls = first.discover_urls() + second.discover_urls() + ["https://unknown.com/x"]
+
+        start = time.monotonic()
+        articles = asyncio.run(scheduler.extract_all(urls))
+        elapsed = time.monotonic() - start
+
+        self.assertEqual([article["url"] for article in articles[:-1]], urls[:-1])
+        self.assertIsNone(articles[-1])
+        for source in (first, second):
+            self.assertLessEqual(source.peak, source.max_concurrency)
+            gaps = [b - a for a, b in zip(source.started, source.started[1:])]
+            self.assertTrue(all(gap >= source.politeness_delay * 0.9 for gap in gaps))
+        # Hosts are crawled in parallel, so the run takes about as long as one host's queue
+        self.assertLess(elapsed, 6 * 0.05 * 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,402 @@
+# test_storage.py
+"""
+Backend-agnostic tests: every ArticleStorage backend must pass the same StorageContract.
+SQLite always runs; PostgreSQL runs when ARTICLE_DB_TEST_DSN points at a server, e.g.
+
+    ARTICLE_DB_TEST_DSN=postgresql://postgres@localhost/postgres python -m pytest test_storage.py
+
+Each PostgreSQL test works in a schema of its own, dropped afterwards.
+"""
+import os
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from database import ArticleDatabase
+from seen_filter import SeenUrlFilter
+from storage import open_database
+
+try:
+    import psycopg
+    from postgres_database import PostgresArticleDatabase
+except ImportError:
+    psycopg = None
+
+POSTGRES_DSN = os.environ.get('ARTICLE_DB_TEST_DSN')
+
+
+def article(i, **overrides):
+    data = {
+        "url": f"https://example.com/article-{i}",
+        "title": f"Article number {i}",
+        "content": f"Body text of article {i}.",
+        "post_datetime": f"2024-10-{i % 28 + 1:02d}T12:00:00",
+        "image_url": f"https://example.com/{i}.jpg",
+        "crawl_datetime": "2024-10-19 10:00:00",
+    }
+    data.update(overrides)
+    return data
+
+
+class StorageContract:
+    """Mixed into one TestCase per backend; make_db() returns a new connection to the same store"""
+    # Method insert_articles calls last before it writes
+    LAST_READ_BEFORE_INSERT = '_archived_urls'
+
+    def make_db(self, **options):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.db = self.make_db()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_insert_and_lookup(self):
+        self.assertEqual(self.db.insert_articles([article(1), article(2), article(1, title="Repeat")]), 2)
+        self.assertEqual(self.db.insert_articles([article(2), article(3)]), 1)
+        self.db.insert_article(article(4))
+
+        urls = [article(i)['url'] for i in range(6)]
+        self.assertEqual(self.db.get_existing_urls(urls), set(urls[1:5]))
+        self.assertTrue(self.db.article_exists(urls[1]))
+        self.assertFalse(self.db.article_exists(urls[5]))
+        stored = self.db.retrieve_article(urls[1])
+        self.assertEqual(stored['title'], "Article number 1")  # first copy of a repeated URL wins
+        self.assertEqual(stored['content'], "Body text of article 1.")
+        self.assertNotIn('content', self.db.retrieve_article(urls[1], include_content=False))
+        self.assertEqual(self.db.get_article_content(urls[2]), "Body text of article 2.")
+        self.assertIsNone(self.db.retrieve_article(urls[5]))
+
+    def test_batch_status(self):
+        self.db.insert_articles([article(i) for i in range(1, 4)])
+        new, posted, duplicate, pending = (article(i)['url'] for i in range(4))
+        for platform in ('telegram', 'instagram', 'x'):
+            self.db.mark_as_posted(posted, platform)
+        self.db.mark_duplicate(duplicate, posted)
+        self.db.mark_as_posted(pending, 'telegram')
+
+        result = self.db.get_batch_status([new, posted, duplicate, pending, new])
+        self.assertEqual(result['new'], [new])
+        self.assertEqual(result['posted'], [posted])
+        self.assertEqual(result['duplicates'], [duplicate])
+        article_data, status = result['pending'][pending]
+        self.assertEqual(article_data['content'], "Body text of article 3.")
+        self.assertEqual(status, {'telegram': True, 'instagram': False, 'x': False, 'youtube': False})
+        self.assertEqual(self.db.get_posting_status(pending), status)
+
+    def test_transaction_rolls_back(self):
+        self.db.insert_article(article(1))
+        url = article(1)['url']
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.mark_as_posted(url, 'telegram')
+                with self.db.transaction():
+                    self.db.store_message_ids(url, [1, 2])
+                raise RuntimeError("boom")
+        self.assertFalse(self.db.get_posting_status(url)['telegram'])
+        self.assertEqual(self.db.get_message_ids(), [])
+
+        with self.db.transaction():
+            self.db.mark_as_posted(url, 'telegram')
+            self.db.store_message_ids(url, [1, 2])
+        self.assertTrue(self.db.get_posting_status(url)['telegram'])
+
+    def test_crawl_state(self):
+        self.assertIsNone(self.db.get_crawl_state("listing"))
+        self.db.set_crawl_state("listing", "abc")
+        self.db.set_crawl_state("listing", "def")
+        self.assertEqual(self.db.get_crawl_state("listing"), "def")
+
+    def test_translations_and_search(self):
+        self.db.insert_articles([
+            article(1, title="NVIDIA revenue jumps", content="Quarterly results beat expectations."),
+            article(2, title="Chip stocks", content="NVIDIA revenue was mentioned in passing."),
+            article(3, title="Unrelated", content="Nothing to see here."),
+        ])
+        urls = [article(i)['url'] for i in range(1, 4)]
+        # Title matches rank above body matches; punctuation in plain queries is ignored
+        self.assertEqual([r['url'] for r in self.db.search_articles("NVIDIA:  revenue!")], urls[:2])
+        self.assertEqual(self.db.search_articles("!!!"), [])
+
+        self.db.store_translation(urls[2], 'fa', "Translated headline", "Translated zebra body")
+        self.assertEqual(self.db.get_translation(urls[2], 'fa'),
+                         {'title': "Translated headline", 'content': "Translated zebra body"})
+        self.assertIsNone(self.db.get_translation(urls[2], 'de'))
+        self.assertEqual([r['url'] for r in self.db.search_articles("zebra")], [urls[2]])
+
+        self.db.store_translation(urls[2], 'fa', "Newer headline", "Replaced body")
+        self.assertEqual(self.db.search_articles("zebra"), [])
+        self.db.rebuild_search_index()
+        self.assertEqual([r['url'] for r in self.db.search_articles("newer")], [urls[2]])
+        self.assertEqual([r['url'] for r in self.db.search_articles("nothing")], [urls[2]])
+
+    def test_signatures_and_duplicates(self):
+        self.db.insert_articles([article(1), article(2)])
+        first, second = article(1)['url'], article(2)['url']
+        self.assertEqual(len(self.db.get_unsigned_articles()), 2)
+        self.assertTrue(self.db.store_article_signature(first, b"\x01\x02", [-5, 2 ** 62]))
+        self.assertFalse(self.db.store_article_signature("https://example.com/missing", b"", [1]))
+        self.assertEqual(self.db.find_signature_candidates([2 ** 62, 99]), [(first, b"\x01\x02")])
+        self.assertEqual(self.db.find_signature_candidates([-5], exclude_url=first), [])
+        self.assertEqual([row[0] for row in self.db.get_unsigned_articles()], [second])
+
+        self.db.mark_duplicate(second, first)
+        self.assertEqual(self.db.get_pending_articles('telegram'), [first])
+
+    def test_message_ids(self):
+        self.db.insert_articles([article(1), article(2)])
+        first, second = article(1)['url'], article(2)['url']
+        self.db.store_message_ids(first, [10, 11], sent_at="2024-10-01T09:00:00")
+        self.db.store_message_ids(second, [20], sent_at="2024-10-05T09:00:00")
+
+        self.assertEqual(self.db.get_message_ids(limit=2),
+                         [(second, 20, "2024-10-05T09:00:00"), (first, 11, "2024-10-01T09:00:00")])
+        self.assertEqual([m[1] for m in self.db.get_message_ids(url=first)], [11, 10])
+        self.assertEqual([m[1] for m in self.db.get_message_ids(sent_after="2024-10-02")], [20])
+        self.assertEqual([m[1] for m in self.db.get_message_ids(sent_before="2024-10-02")], [11, 10])
+        self.assertEqual([m[1] for m in self.db.get_message_ids(message_ids=[10])], [10])
+        self.assertEqual(self.db.get_external_ids('telegram'), [(first, '10,11'), (second, '20')])
+
+        self.assertEqual(self.db.remove_message_ids([10, 20]), 2)
+        self.db.clear_external_ids(first)
+        self.assertEqual(self.db.get_message_ids(), [])
+
+    def test_claims_and_leases(self):
+        self.db.insert_article(article(1))
+        url = article(1)['url']
+        self.assertTrue(self.db.claim_post(url, 'instagram', owner="a"))
+        self.assertFalse(self.db.claim_post(url, 'instagram', owner="b"))
+        self.assertTrue(self.db.renew_lease(url, 'instagram', owner="a"))
+        self.assertFalse(self.db.renew_lease(url, 'instagram', owner="b"))
+        # Only the lease holder may record the result
+        self.assertFalse(self.db.mark_posting_result(url, 'instagram', success=True, owner="b"))
+        self.assertTrue(self.db.mark_posting_result(url, 'instagram', success=False, owner="a"))
+        self.assertEqual(self.db.get_attempts(url, 'instagram'), 1)
+
+        # An expired lease can be taken over, and reclaiming returns it to the retry pool
+        self.assertTrue(self.db.claim_post(url, 'instagram', owner="b", lease_seconds=-1))
+        self.assertEqual(self.db.reclaim_expired_leases('x'), 0)
+        self.assertEqual(self.db.reclaim_expired_leases('instagram'), 1)
+        self.assertTrue(self.db.try_mark_for_instagram_posting(url))
+        self.db.mark_as_posted_instagram(url)
+        self.assertTrue(self.db.is_posted_to_instagram(url))
+        self.assertFalse(self.db.claim_post(url, 'instagram', owner="c"))
+        self.assertEqual(self.db.get_instagram_attempts(url), 3)
+
+    def test_concurrent_claims_have_one_winner(self):
+        self.db.insert_articles([article(i) for i in range(12)])
+        url = article(0)['url']
+        workers = [self.make_db() for _ in range(6)]
+        won = []
+        claimed = []
+        barrier = threading.Barrier(len(workers))
+
+        def work(db, owner):
+            barrier.wait()
+            won.append(db.claim_post(url, 'x', owner=owner))
+            claimed.extend(db.claim_next('x', owner=owner, limit=3))
+
+        threads = [threading.Thread(target=work, args=(db, f"worker-{i}")) for i, db in enumerate(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for db in workers:
+            db.close()
+
+        self.assertEqual(won.count(True), 1)
+        # The other 11 posts were each claimed exactly once
+        self.assertEqual(sorted(claimed), sorted(article(i)['url'] for i in range(1, 12)))
+        self.assertEqual(self.db.claim_next('x'), [])
+
+    def test_backlog(self):
+        self.db.insert_articles([article(i) for i in range(1, 5)])
+        urls = [article(i)['url'] for i in range(1, 5)]
+        self.db.mark_as_posted(urls[0], 'telegram')
+        self.db.record_failed_attempt(urls[1], 'telegram')
+
+        self.assertEqual(self.db.get_pending_articles('telegram'), urls[1:])
+        self.assertEqual(self.db.get_pending_articles('telegram', retry_after_minutes=60), urls[2:])
+        self.assertEqual(self.db.get_pending_articles('telegram', max_attempts=1), urls[2:])
+        self.assertEqual(self.db.get_pending_articles('telegram', limit=1), urls[1:2])
+        self.assertEqual(self.db.get_pending_articles('telegram', max_age_hours=1), [])
+        self.assertEqual(self.db.get_attempts(urls[1], 'telegram'), 1)
+
+        self.db.mark_as_posted(urls[2], 'x')
+        self.assertEqual(self.db.get_backlog_urls(['telegram', 'x'], limit=3), urls[:3])
+
+    def test_skipped_posts_leave_the_backlog(self):
+        self.db.insert_articles([article(1, image_url=None)] + [article(i) for i in range(2, 5)])
+        urls = [article(i)['url'] for i in range(1, 5)]
+        for url in urls:
+            self.db.mark_as_posted(url, 'telegram')
+        # Article 1 has no image, so its X post can never happen
+        self.db.mark_skipped(urls[0], 'x')
+        self.db.mark_skipped(urls[1], 'telegram')
+
+        self.assertEqual(self.db.get_backlog_urls(['telegram', 'x'], limit=2), urls[1:3])
+        self.assertEqual(self.db.get_posting_status(urls[1])['telegram'], True)
+        self.assertEqual(self.db.get_batch_status(urls[:1], platforms=('telegram', 'x'))['posted'], urls[:1])
+        pending = self.db.get_batch_status(urls[:1], platforms=('telegram', 'instagram', 'x'))['pending']
+        self.assertEqual(pending[urls[0]][1]['x'], True)
+
+    def test_seen_filter(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.db.insert_article(article(1))
+            db = self.make_db(seen_filter=SeenUrlFilter(os.path.join(tmp, "articles.seen"), capacity=1000))
+            try:
+                self.assertIn(article(1)['url'], db.seen_filter)
+                db.insert_article(article(2))
+                # Written through another connection the filter never saw
+                self.db.insert_article(article(3))
+                urls = [article(i)['url'] for i in range(1, 5)]
+                self.assertEqual(db.get_existing_urls(urls), set(urls[:3]))
+                self.assertEqual(db.get_batch_status(urls)['new'], urls[3:])
+            finally:
+                db.close()
+
+    def test_seen_filter_with_interleaved_inserts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.db.insert_articles([article(1), article(2)])
+            db = self.make_db(seen_filter=SeenUrlFilter(os.path.join(tmp, "articles.seen"), capacity=1000))
+            try:
+                # Another writer's article lands after db's last read but before its own insert,
+                # so db's insert takes a higher id than one it never saw
+                last_read = getattr(db, self.LAST_READ_BEFORE_INSERT)
+
+                def interleave(urls):
+                    result = last_read(urls)
+                    setattr(db, self.LAST_READ_BEFORE_INSERT, last_read)
+                    self.db.insert_article(article(3))
+                    return result
+
+                setattr(db, self.LAST_READ_BEFORE_INSERT, interleave)
+                db.insert_article(article(4))
+                self.assertEqual(db.get_batch_status([article(3)['url']])['new'], [])
+                self.assertIn(article(3)['url'], db.seen_filter)
+            finally:
+                db.close()
+
+    def test_seen_filter_with_out_of_order_commits(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            db = self.make_db(seen_filter=SeenUrlFilter(os.path.join(tmp, "articles.seen"), capacity=1000))
+            other = self.make_db()
+            try:
+                with self.db.transaction():
+                    # Article 1 takes the first id but is still uncommitted while a second writer
+                    # inserts article 2 and the filter syncs
+                    self.db.insert_article(article(1))
+                    writer = threading.Thread(target=other.insert_article, args=(article(2),))
+                    writer.start()
+                    time.sleep(0.3)
+                    db.get_batch_status([article(3)['url']])
+                writer.join()
+
+                urls = [article(i)['url'] for i in range(1, 4)]
+                self.assertEqual(db.get_batch_status(urls)['new'], urls[2:])
+                self.assertEqual(db.get_existing_urls(urls), set(urls[:2]))
+            finally:
+                other.close()
+                db.close()
+
+    def test_archiving_keeps_urls_seen(self):
+        self.db.insert_articles([article(1, crawl_datetime="2024-01-01 10:00:00"),
+                                 article(2, crawl_datetime="2024-01-02 10:00:00"),
+                                 article(3, crawl_datetime="2024-12-01 10:00:00")])
+        urls = [article(i)['url'] for i in range(1, 5)]
+        for platform in ('telegram', 'instagram', 'x'):
+            self.db.mark_as_posted(urls[0], platform)
+        self.db.store_translation(urls[0], 'fa', "Translated one", "Translated body")
+        self.db.store_message_ids(urls[0], [10], sent_at="2024-01-01T11:00:00")
+
+        # Article 2 was never posted and article 3 is too recent
+        records = self.db.export_archivable_articles("2024-06-01")
+        self.assertEqual([r['url'] for r in records], urls[:1])
+        record = records[0]
+        self.assertEqual(record['content'], "Body text of article 1.")
+        self.assertEqual(record['translations'], {'fa': {'title': "Translated one", 'content': "Translated body"}})
+        self.assertEqual(record['posts']['x']['status'], 'posted')
+        self.assertEqual(record['messages'], [{'platform': 'telegram', 'message_id': 10,
+                                               'sent_at': "2024-01-01T11:00:00"}])
+        self.assertEqual([r['url'] for r in self.db.export_archivable_articles("2024-06-01",
+                                                                               include_unfinished=True)],
+                         urls[:2])
+
+        self.assertEqual(self.db.remove_archived_articles(records), 1)
+        self.assertIsNone(self.db.retrieve_article(urls[0]))
+        self.assertEqual(self.db.get_message_ids(), [])
+        self.assertEqual(self.db.search_articles("Translated"), [])
+        self.assertEqual(self.db.export_archivable_articles("2024-06-01"), [])
+
+        self.assertEqual(self.db.get_existing_urls(urls), set(urls[:3]))
+        self.assertTrue(self.db.article_exists(urls[0]))
+        self.assertEqual(self.db.get_batch_status(urls[:1])['posted'], urls[:1])
+        self.assertEqual(self.db.insert_articles([article(1)]), 0)
+        self.db.vacuum()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            db = self.make_db(seen_filter=SeenUrlFilter(os.path.join(tmp, "articles.seen"), capacity=1000))
+            try:
+                self.assertTrue(all(url in db.seen_filter for url in urls[:3]))
+                self.assertEqual(db.get_batch_status(urls)['new'], urls[3:])
+            finally:
+                db.close()
+
+    def test_schema_is_current(self):
+        self.assertEqual(self.db.schema_version(), len(type(self.db).MIGRATIONS))
+        again = self.make_db()
+        self.assertEqual(again.schema_version(), len(type(self.db).MIGRATIONS))
+        again.close()
+
+
+class TestSQLiteStorage(StorageContract, unittest.TestCase):
+    LAST_READ_BEFORE_INSERT = 'get_existing_urls'
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "articles.db")
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        self.tmp.cleanup()
+
+    def make_db(self, **options):
+        return ArticleDatabase(self.path, **options)
+
+    def test_open_database_picks_backend(self):
+        for dsn in (self.path, f"sqlite:///{self.path}"):
+            db = open_database(dsn)
+            self.assertIsInstance(db, ArticleDatabase)
+            db.close()
+        with self.assertRaises(ValueError):
+            open_database("mysql://localhost/articles")
+
+
+@unittest.skipUnless(POSTGRES_DSN and psycopg, "set ARTICLE_DB_TEST_DSN (and install psycopg) to test PostgreSQL")
+class TestPostgresStorage(StorageContract, unittest.TestCase):
+    def setUp(self):
+        self.schema = f"test_{uuid.uuid4().hex[:12]}"
+        with psycopg.connect(POSTGRES_DSN, autocommit=True) as conn:
+            conn.execute(f"CREATE SCHEMA {self.schema}")
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        with psycopg.connect(POSTGRES_DSN, autocommit=True) as conn:
+            conn.execute(f"DROP SCHEMA {self.schema} CASCADE")
+
+    def make_db(self, **options):
+        return PostgresArticleDatabase(POSTGRES_DSN, max_pool_size=2, options=f"-c search_path={self.schema}",
+                                       **options)
+
+    def test_open_database_picks_backend(self):
+        db = open_database(POSTGRES_DSN, options=f"-c search_path={self.schema}")
+        self.assertIsInstance(db, PostgresArticleDatabase)
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()